@@ -1,15 +1,41 @@
 # Core engine exports
 from .config import EnvConfig
+from .dataset import TrajectoryDataset
 from .game_interface import (
+    ChildBatch,
     GameState,
     Shape,
+    StepInfo,
+    get_topology,
 )
+from .replay import ReplayResult, replay
+from .sampling import sample_actions
+from .session import GameSession, SessionManager
+from .state_pool import PooledGameState, StatePool
+from .subproc_vec import SubprocVecGameState
+from .trajectory import TrajectoryRecorder, TrajectoryWriter
 from .utils import ActionType, geometry
+from .vec_interface import VecGameState
 
 __all__ = [
     # Core Interface & Config
     "GameState",
+    "VecGameState",
+    "SubprocVecGameState",
+    "StatePool",
+    "PooledGameState",
+    "TrajectoryRecorder",
+    "TrajectoryWriter",
+    "TrajectoryDataset",
+    "SessionManager",
+    "GameSession",
     "Shape",
+    "StepInfo",
+    "ChildBatch",
+    "sample_actions",
+    "replay",
+    "ReplayResult",
+    "get_topology",
     "EnvConfig",
     # Utilities & Types
     "utils",
@@ -0,0 +1,72 @@
+// File: src/trianglengin/cpp/alloc_counter.cpp
+#include "alloc_counter.h"
+
+#ifdef TRIANGLENGIN_COUNT_ALLOCS
+#include <cstdlib>
+#include <new>
+
+namespace
+{
+  thread_local std::int64_t thread_allocation_count = 0;
+
+  void *counted_malloc(std::size_t size)
+  {
+    ++thread_allocation_count;
+    return std::malloc(size == 0 ? 1 : size);
+  }
+} // namespace
+
+namespace trianglengin::cpp::alloc_counter
+{
+  std::int64_t thread_allocations()
+  {
+    return thread_allocation_count;
+  }
+} // namespace trianglengin::cpp::alloc_counter
+
+// Replacements use malloc/free, so memory may be released by code outside this
+// module (and vice versa) exactly as with the default operators. The module is
+// loaded with local symbol scope and linked with -Bsymbolic where supported, so
+// these replacements only serve allocations made by the module's own code.
+void *operator new(std::size_t size)
+{
+  if (void *ptr = counted_malloc(size))
+    return ptr;
+  throw std::bad_alloc();
+}
+
+void *operator new[](std::size_t size)
+{
+  if (void *ptr = counted_malloc(size))
+    return ptr;
+  throw std::bad_alloc();
+}
+
+void *operator new(std::size_t size, const std::nothrow_t &) noexcept
+{
+  return counted_malloc(size);
+}
+
+void *operator new[](std::size_t size, const std::nothrow_t &) noexcept
+{
+  return counted_malloc(size);
+}
+
+void operator delete(void *ptr) noexcept { std::free(ptr); }
+void operator delete[](void *ptr) noexcept { std::free(ptr); }
+void operator delete(void *ptr, std::size_t) noexcept { std::free(ptr); }
+void operator delete[](void *ptr, std::size_t) noexcept { std::free(ptr); }
+void operator delete(void *ptr, const std::nothrow_t &) noexcept { std::free(ptr); }
+void operator delete[](void *ptr, const std::nothrow_t &) noexcept { std::free(ptr); }
+
+#else // !TRIANGLENGIN_COUNT_ALLOCS
+
+namespace trianglengin::cpp::alloc_counter
+{
+  std::int64_t thread_allocations()
+  {
+    return -1;
+  }
+} // namespace trianglengin::cpp::alloc_counter
+
+#endif // TRIANGLENGIN_COUNT_ALLOCS
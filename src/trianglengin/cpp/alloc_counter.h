@@ -0,0 +1,26 @@
+// File: src/trianglengin/cpp/alloc_counter.h
+#ifndef TRIANGLENGIN_CPP_ALLOC_COUNTER_H
+#define TRIANGLENGIN_CPP_ALLOC_COUNTER_H
+
+#pragma once
+
+#include <cstdint>
+
+namespace trianglengin::cpp::alloc_counter
+{
+  // Counting is a debug facility: it replaces the global operator new/delete
+  // (see alloc_counter.cpp) and is only compiled in when the module is built
+  // with the TRIANGLENGIN_COUNT_ALLOCS CMake option.
+#ifdef TRIANGLENGIN_COUNT_ALLOCS
+  constexpr bool enabled = true;
+#else
+  constexpr bool enabled = false;
+#endif
+
+  // Number of operator new calls made by this extension module on the calling
+  // thread, or -1 if counting is disabled.
+  std::int64_t thread_allocations();
+
+} // namespace trianglengin::cpp::alloc_counter
+
+#endif // TRIANGLENGIN_CPP_ALLOC_COUNTER_H
@@ -9,10 +9,24 @@
 #include <stdexcept>
 #include <cstring>
 #include <optional>
+#include <algorithm>
+#include <utility>
+#include <string>
 
 #include "game_state.h"
 #include "config.h"
 #include "structs.h"
+#include "sampling.h"
+#include "observation.h"
+#include "expansion.h"
+#include "board_features.h"
+#include "topology.h"
+#include "grid_data.h"
+#include "shape_logic.h"
+#include "grid_logic.h"
+#include "alloc_counter.h"
+#include "state_pool.h"
+#include "replay.h"
 
 namespace py = pybind11;
 namespace tg = trianglengin::cpp;
@@ -66,7 +80,7 @@ py::object cpp_shape_to_python(const std::optional<tg::ShapeCpp> &shape_opt)
     return py::none();
   const auto &shape = shape_opt.value();
   py::list triangles_py;
-  for (const auto &tri : shape.triangles)
+  for (const auto &tri : shape.triangles())
   {
     triangles_py.append(py::make_tuple(std::get<0>(tri), std::get<1>(tri), std::get<2>(tri)));
   }
@@ -123,7 +137,222 @@ std::optional<tg::ShapeCpp> python_to_cpp_shape(const py::object &shape_py)
   }
 }
 
-PYBIND11_MODULE(trianglengin_cpp, m)
+// Helper to validate a caller-provided bool/uint8 output buffer
+uint8_t *mask_buffer_ptr(py::array &out, py::ssize_t expected_size)
+{
+  const auto dtype = out.dtype();
+  if (!dtype.is(py::dtype::of<bool>()) && !dtype.is(py::dtype::of<uint8_t>()))
+  {
+    throw py::type_error("Mask output array must have dtype bool or uint8.");
+  }
+  if (!(out.flags() & py::array::c_style) || !out.writeable())
+  {
+    throw py::value_error("Mask output array must be C-contiguous and writeable.");
+  }
+  if (out.size() != expected_size)
+  {
+    throw py::value_error("Mask output array has " + std::to_string(out.size()) +
+                          " elements, expected " + std::to_string(expected_size) + ".");
+  }
+  return static_cast<uint8_t *>(out.mutable_data());
+}
+
+// Helper to validate a caller-provided float32 output buffer
+float *float_buffer_ptr(py::array &out, py::ssize_t expected_size)
+{
+  if (!out.dtype().is(py::dtype::of<float>()))
+  {
+    throw py::type_error("Observation output array must have dtype float32.");
+  }
+  if (!(out.flags() & py::array::c_style) || !out.writeable())
+  {
+    throw py::value_error("Observation output array must be C-contiguous and writeable.");
+  }
+  if (out.size() != expected_size)
+  {
+    throw py::value_error("Observation output array has " + std::to_string(out.size()) +
+                          " elements, expected " + std::to_string(expected_size) + ".");
+  }
+  return static_cast<float *>(out.mutable_data());
+}
+
+// Helper to resolve an optional output array, allocating one of `shape` if None
+py::array output_array_or_new(const py::object &out_obj, const std::vector<py::ssize_t> &shape, const py::dtype &dtype)
+{
+  if (out_obj.is_none())
+  {
+    return py::array(dtype, shape);
+  }
+  if (!py::isinstance<py::array>(out_obj))
+  {
+    throw py::type_error("Output must be a NumPy array.");
+  }
+  return py::reinterpret_borrow<py::array>(out_obj);
+}
+
+// Returns the data of a C-contiguous, writeable `out` of dtype T with `expected_size` elements
+template <typename T>
+T *typed_buffer_ptr(py::array &out, py::ssize_t expected_size, const std::string &name)
+{
+  if (!out.dtype().is(py::dtype::of<T>()))
+  {
+    throw py::type_error(name + " output array has the wrong dtype.");
+  }
+  if (!(out.flags() & py::array::c_style) || !out.writeable())
+  {
+    throw py::value_error(name + " output array must be C-contiguous and writeable.");
+  }
+  if (out.size() != expected_size)
+  {
+    throw py::value_error(name + " output array has " + std::to_string(out.size()) +
+                          " elements, expected " + std::to_string(expected_size) + ".");
+  }
+  return static_cast<T *>(out.mutable_data());
+}
+
+// Helper to check that all states share the board layout of the first one
+void check_same_layout(const std::vector<tg::GameStateCpp *> &states)
+{
+  const auto &config = states[0]->get_config();
+  for (const auto *gs : states)
+  {
+    const auto &other = gs->get_config();
+    if (other.rows != config.rows || other.cols != config.cols || other.num_shape_slots != config.num_shape_slots)
+    {
+      throw py::value_error("All states in a batch must share the same rows, cols and num_shape_slots.");
+    }
+  }
+}
+
+// Encodes observations of `states` into a (N, C, H, W) float32 buffer, GIL released
+void encode_observations(const std::vector<tg::GameStateCpp *> &states, py::array &out)
+{
+  if (states.empty())
+  {
+    return;
+  }
+  check_same_layout(states);
+  const auto &config = states[0]->get_config();
+  const py::ssize_t obs_size = static_cast<py::ssize_t>(tg::observation::num_channels(config)) * config.rows * config.cols;
+  float *ptr = float_buffer_ptr(out, static_cast<py::ssize_t>(states.size()) * obs_size);
+  py::gil_scoped_release release;
+  for (size_t i = 0; i < states.size(); ++i)
+  {
+    tg::observation::encode(*states[i], ptr + i * obs_size);
+  }
+}
+
+// Computes board features of `states` into a (N, F) float32 buffer, GIL released
+void compute_features(const std::vector<tg::GameStateCpp *> &states, py::array &out)
+{
+  if (states.empty())
+  {
+    return;
+  }
+  check_same_layout(states);
+  const py::ssize_t num_features = tg::features::num_features(states[0]->get_config());
+  float *ptr = float_buffer_ptr(out, static_cast<py::ssize_t>(states.size()) * num_features);
+  py::gil_scoped_release release;
+  for (size_t i = 0; i < states.size(); ++i)
+  {
+    tg::features::compute(*states[i], ptr + i * num_features);
+  }
+}
+
+// Helper to copy a vector of ints into a new 1-D int32 array
+py::array_t<int32_t> int_vector_to_numpy(const std::vector<int> &values)
+{
+  py::array_t<int32_t> result(static_cast<py::ssize_t>(values.size()));
+  std::copy(values.begin(), values.end(), result.mutable_data());
+  return result;
+}
+
+// Helper to flatten ragged index lists into CSR form: (offsets, values)
+std::pair<py::array_t<int32_t>, py::array_t<int32_t>> ragged_to_csr(const std::vector<std::vector<int>> &rows)
+{
+  py::array_t<int32_t> offsets(static_cast<py::ssize_t>(rows.size() + 1));
+  int32_t *offsets_ptr = offsets.mutable_data();
+  offsets_ptr[0] = 0;
+  for (size_t i = 0; i < rows.size(); ++i)
+  {
+    offsets_ptr[i + 1] = offsets_ptr[i] + static_cast<int32_t>(rows[i].size());
+  }
+  py::array_t<int32_t> values(static_cast<py::ssize_t>(offsets_ptr[rows.size()]));
+  int32_t *values_ptr = values.mutable_data();
+  for (const auto &row : rows)
+  {
+    values_ptr = std::copy(row.begin(), row.end(), values_ptr);
+  }
+  return {offsets, values};
+}
+
+// Helper to export the board topology and shape template footprints as NumPy arrays
+py::dict topology_to_numpy(const tg::Topology &topo)
+{
+  const py::ssize_t rows = topo.rows;
+  const py::ssize_t cols = topo.cols;
+  py::array_t<bool> death_np({rows, cols});
+  py::array_t<bool> up_np({rows, cols});
+  auto death_m = death_np.mutable_unchecked<2>();
+  auto up_m = up_np.mutable_unchecked<2>();
+  for (py::ssize_t r = 0; r < rows; ++r)
+  {
+    for (py::ssize_t c = 0; c < cols; ++c)
+    {
+      death_m(r, c) = topo.death_grid[r][c];
+      up_m(r, c) = (r + c) % 2 != 0;
+    }
+  }
+
+  const auto &templates = tg::shape_logic::get_shape_templates();
+  py::array_t<int32_t> template_offsets(static_cast<py::ssize_t>(templates.size() + 1));
+  int32_t *template_offsets_ptr = template_offsets.mutable_data();
+  template_offsets_ptr[0] = 0;
+  for (size_t t = 0; t < templates.size(); ++t)
+  {
+    template_offsets_ptr[t + 1] = template_offsets_ptr[t] + static_cast<int32_t>(templates[t].size());
+  }
+  py::array_t<int32_t> template_cells({static_cast<py::ssize_t>(template_offsets_ptr[templates.size()]), py::ssize_t{3}});
+  auto template_cells_m = template_cells.mutable_unchecked<2>();
+  py::ssize_t k = 0;
+  for (const auto &footprint : templates)
+  {
+    for (const auto &[dr, dc, is_up] : footprint)
+    {
+      template_cells_m(k, 0) = dr;
+      template_cells_m(k, 1) = dc;
+      template_cells_m(k, 2) = is_up ? 1 : 0;
+      ++k;
+    }
+  }
+
+  auto [line_offsets, line_cells] = ragged_to_csr(topo.line_cells);
+  auto [cell_line_offsets, cell_lines] = ragged_to_csr(topo.cell_lines);
+  py::dict result;
+  result["death"] = death_np;
+  result["up"] = up_np;
+  result["line_offsets"] = line_offsets;
+  result["line_cells"] = line_cells;
+  result["cell_line_offsets"] = cell_line_offsets;
+  result["cell_lines"] = cell_lines;
+  result["template_offsets"] = template_offsets;
+  result["template_cells"] = template_cells;
+  return result;
+}
+
+// Helper to collect C++ state pointers from a Python sequence of GameStateCpp
+std::vector<tg::GameStateCpp *> collect_states(const py::sequence &states_py)
+{
+  std::vector<tg::GameStateCpp *> states;
+  states.reserve(states_py.size());
+  for (const auto &item : states_py)
+  {
+    states.push_back(&item.cast<tg::GameStateCpp &>());
+  }
+  return states;
+}
+
+PYBIND11_MODULE(trianglengin_cpp, m, py::mod_gil_not_used())
 {
   m.doc() = "C++ core module for Trianglengin";
 
@@ -135,12 +364,153 @@ PYBIND11_MODULE(trianglengin_cpp, m)
            py::arg("config"), py::arg("initial_seed"))
       .def("reset", &tg::GameStateCpp::reset)
       .def("step", &tg::GameStateCpp::step, py::arg("action"))
+      .def("step_ex", [](tg::GameStateCpp &gs, tg::Action action, bool record_cells)
+           {
+            tg::StepInfo info = gs.step_ex(action, record_cells);
+            py::object placed = py::none();
+            py::object cleared = py::none();
+            if (record_cells) {
+                placed = int_vector_to_numpy(info.placed_cells);
+                cleared = int_vector_to_numpy(info.cleared_cells);
+            }
+            return py::make_tuple(info.reward, info.done, info.placed_count, info.cleared_count,
+                                  info.lines_cleared, info.refilled, placed, cleared); },
+           py::arg("action"), py::arg("record_cells") = false,
+           "Steps and returns (reward, done, placed_count, cleared_count, lines_cleared, refilled, placed_cells, cleared_cells).")
+      .def("evaluate_actions", [](tg::GameStateCpp &gs)
+           {
+            std::vector<tg::ActionOutcome> outcomes = gs.evaluate_actions();
+            const auto n = static_cast<py::ssize_t>(outcomes.size());
+            py::array_t<int64_t> actions(n);
+            py::array_t<double> rewards(n);
+            py::array_t<int32_t> placed(n);
+            py::array_t<int32_t> cleared(n);
+            py::array_t<int32_t> lines(n);
+            py::array_t<bool> refilled(n);
+            py::array_t<bool> dones(n);
+            auto actions_m = actions.mutable_unchecked<1>();
+            auto rewards_m = rewards.mutable_unchecked<1>();
+            auto placed_m = placed.mutable_unchecked<1>();
+            auto cleared_m = cleared.mutable_unchecked<1>();
+            auto lines_m = lines.mutable_unchecked<1>();
+            auto refilled_m = refilled.mutable_unchecked<1>();
+            auto dones_m = dones.mutable_unchecked<1>();
+            for (py::ssize_t i = 0; i < n; ++i) {
+                const auto &o = outcomes[i];
+                actions_m(i) = o.action;
+                rewards_m(i) = o.reward;
+                placed_m(i) = o.placed_count;
+                cleared_m(i) = o.cleared_count;
+                lines_m(i) = o.lines_cleared;
+                refilled_m(i) = o.refilled;
+                dones_m(i) = o.done;
+            }
+            py::dict result;
+            result["action"] = actions;
+            result["reward"] = rewards;
+            result["placed_count"] = placed;
+            result["cleared_count"] = cleared;
+            result["lines_cleared"] = lines;
+            result["refilled"] = refilled;
+            result["done"] = dones;
+            return result; },
+           "Evaluates every valid action without cloning and returns struct-of-arrays outcomes.")
       .def("is_over", &tg::GameStateCpp::is_over)
       .def("get_score", &tg::GameStateCpp::get_score)
-      .def("get_valid_actions", &tg::GameStateCpp::get_valid_actions, py::arg("force_recalculate") = false, py::return_value_policy::reference_internal)
+      .def("get_valid_actions", &tg::GameStateCpp::get_valid_actions, py::arg("force_recalculate") = false)
+      .def("get_valid_action_mask", [](tg::GameStateCpp &gs, const py::object &out_obj, bool flat)
+           {
+            const auto &config = gs.get_config();
+            py::array out;
+            if (out_obj.is_none()) {
+                if (flat) {
+                    out = py::array_t<bool>(gs.action_dim());
+                } else {
+                    out = py::array_t<bool>({config.num_shape_slots, config.rows, config.cols});
+                }
+            } else if (py::isinstance<py::array>(out_obj)) {
+                out = py::reinterpret_borrow<py::array>(out_obj);
+            } else {
+                throw py::type_error("Mask output must be a NumPy array.");
+            }
+            gs.fill_valid_action_mask(mask_buffer_ptr(out, gs.action_dim()));
+            return out; }, py::arg("out") = py::none(), py::arg("flat") = false,
+           "Writes the valid-action mask into `out` (or a new bool array) and returns it.")
+      .def("get_observation", [](tg::GameStateCpp &gs, const py::object &out_obj)
+           {
+            const auto &config = gs.get_config();
+            py::array out = output_array_or_new(
+                out_obj, {tg::observation::num_channels(config), config.rows, config.cols}, py::dtype::of<float>());
+            encode_observations({&gs}, out);
+            return out; }, py::arg("out") = py::none(),
+           "Encodes the state as (channels, rows, cols) float32 planes.")
+      .def("get_board_features", [](tg::GameStateCpp &gs, const py::object &out_obj)
+           {
+            py::array out = output_array_or_new(
+                out_obj, {tg::features::num_features(gs.get_config())}, py::dtype::of<float>());
+            compute_features({&gs}, out);
+            return out; }, py::arg("out") = py::none(),
+           "Computes the fixed-length board feature vector as float32.")
+      .def("get_line_table", [](const tg::GameStateCpp &gs)
+           {
+            const auto &line_cells = gs.get_grid_data().get_line_cells();
+            size_t max_len = 0;
+            for (const auto &cells : line_cells) {
+                max_len = std::max(max_len, cells.size());
+            }
+            const auto num_lines = static_cast<py::ssize_t>(line_cells.size());
+            py::array_t<int32_t> cells_np({num_lines, static_cast<py::ssize_t>(max_len)});
+            py::array_t<int32_t> lengths_np(num_lines);
+            auto cells_m = cells_np.mutable_unchecked<2>();
+            auto lengths_m = lengths_np.mutable_unchecked<1>();
+            for (py::ssize_t i = 0; i < num_lines; ++i) {
+                const auto &cells = line_cells[i];
+                lengths_m(i) = static_cast<int32_t>(cells.size());
+                for (size_t j = 0; j < max_len; ++j) {
+                    cells_m(i, j) = j < cells.size() ? cells[j] : -1;
+                }
+            }
+            py::dict result;
+            result["cells"] = cells_np;
+            result["lengths"] = lengths_np;
+            return result; },
+           "Returns the line table: padded flat cell indices (-1 padding) and line lengths.")
+      .def("get_line_fill", [](const tg::GameStateCpp &gs)
+           {
+            const auto &grid_data = gs.get_grid_data();
+            const auto &line_fill = grid_data.get_line_fill();
+            const auto &line_cells = grid_data.get_line_cells();
+            py::array_t<float> result(static_cast<py::ssize_t>(line_fill.size()));
+            auto result_m = result.mutable_unchecked<1>();
+            for (size_t i = 0; i < line_fill.size(); ++i) {
+                result_m(i) = static_cast<float>(line_fill[i]) / static_cast<float>(line_cells[i].size());
+            }
+            return result; },
+           "Returns the fill ratio of every line as float32.")
+      .def("get_line_threats", [](tg::GameStateCpp &gs)
+           {
+            auto threats = gs.get_line_threats();
+            const auto n = static_cast<py::ssize_t>(threats.size());
+            py::array_t<int32_t> lines_np(n);
+            py::array_t<int64_t> actions_np(n);
+            auto lines_m = lines_np.mutable_unchecked<1>();
+            auto actions_m = actions_np.mutable_unchecked<1>();
+            for (py::ssize_t i = 0; i < n; ++i) {
+                lines_m(i) = threats[i].first;
+                actions_m(i) = threats[i].second;
+            }
+            py::dict result;
+            result["line"] = lines_np;
+            result["action"] = actions_np;
+            return result; },
+           "Returns (line, action) pairs where a single valid placement completes the line.")
+      .def("expand", &tg::ChildBatchCpp::expand,
+           "Creates every child state (one per valid action) in a contiguous batch.")
       .def("get_current_step", &tg::GameStateCpp::get_current_step)
       .def("get_last_cleared_triangles", &tg::GameStateCpp::get_last_cleared_triangles) // Added binding
       .def("get_game_over_reason", &tg::GameStateCpp::get_game_over_reason)
+      .def("get_last_step_allocations", &tg::GameStateCpp::get_last_step_allocations,
+           "Returns the number of heap allocations made by the most recent step, or -1 if counting is disabled.")
       .def("get_shapes_cpp", [](const tg::GameStateCpp &gs)
            {
             py::list shapes_list;
@@ -148,30 +518,37 @@ PYBIND11_MODULE(trianglengin_cpp, m)
                 shapes_list.append(cpp_shape_to_python(shape_opt));
             }
             return shapes_list; })
+      .def("get_packed_occupancy", [](const tg::GameStateCpp &gs)
+           {
+            const auto& grid = gs.get_grid_data();
+            std::string packed((static_cast<std::size_t>(grid.rows()) * grid.cols() + 7) / 8, '\0');
+            grid.pack_occupancy(reinterpret_cast<uint8_t *>(packed.data()));
+            return py::bytes(packed); },
+           "Returns the occupancy grid bit-packed in little-endian bit order (as np.packbits(bitorder=\"little\")).")
+      .def("get_slot_template_ids", [](const tg::GameStateCpp &gs)
+           {
+            std::vector<int8_t> ids(gs.get_shapes().size());
+            gs.fill_slot_template_ids(ids.data());
+            return std::vector<int>(ids.begin(), ids.end()); },
+           "Returns the shape template index in each slot (-1 if empty, -2 if not a template).")
       .def("get_grid_occupied_flat", [](const tg::GameStateCpp &gs)
            {
-            const auto& grid = gs.get_grid_data().get_occupied_grid();
-            size_t rows = grid.size();
-            size_t cols = (rows > 0) ? grid[0].size() : 0;
-            py::array_t<bool> result({rows, cols});
-            auto buf = result.request();
-            bool *ptr = static_cast<bool *>(buf.ptr);
-            for (size_t r = 0; r < rows; ++r) {
-                for (size_t c = 0; c < cols; ++c) {
-                    ptr[r * cols + c] = grid[r][c];
-                }
+            const auto& grid = gs.get_grid_data();
+            const int num_cells = grid.rows() * grid.cols();
+            py::array_t<bool> result({grid.rows(), grid.cols()});
+            bool *ptr = result.mutable_data();
+            for (int idx = 0; idx < num_cells; ++idx) {
+                ptr[idx] = grid.is_occupied_flat(idx);
             }
             return result; })
       .def("get_grid_colors_flat", [](const tg::GameStateCpp &gs)
            {
-            const auto& grid = gs.get_grid_data().get_color_id_grid();
-            size_t rows = grid.size();
-            size_t cols = (rows > 0) ? grid[0].size() : 0;
-            py::array_t<int8_t> result({rows, cols});
-            auto buf = result.request();
-            int8_t *ptr = static_cast<int8_t *>(buf.ptr);
-             for (size_t r = 0; r < rows; ++r) {
-                std::memcpy(ptr + r * cols, grid[r].data(), cols * sizeof(int8_t));
+            const auto& grid = gs.get_grid_data();
+            const int num_cells = grid.rows() * grid.cols();
+            py::array_t<int8_t> result({grid.rows(), grid.cols()});
+            int8_t *ptr = result.mutable_data();
+            for (int idx = 0; idx < num_cells; ++idx) {
+                ptr[idx] = grid.get_color_id_flat(idx);
             }
             return result; })
       .def("get_grid_death_flat", [](const tg::GameStateCpp &gs)
@@ -189,7 +566,44 @@ PYBIND11_MODULE(trianglengin_cpp, m)
             }
             return result; })
       .def("copy", &tg::GameStateCpp::copy)
+      .def("has_inline_storage", &tg::GameStateCpp::has_inline_storage,
+           "Returns True if the state uses the inline small-board layout (allocation-free copies).")
+      .def("has_shared_storage", &tg::GameStateCpp::has_shared_storage,
+           "Returns True if heap buffers are still shared copy-on-write with a copy of this state.")
+      .def("copy_from", &tg::GameStateCpp::copy_from, py::arg("other"),
+           "Overwrites this state with another state in place, reusing its storage.")
       .def("debug_toggle_cell", &tg::GameStateCpp::debug_toggle_cell, py::arg("r"), py::arg("c"))
+      .def("can_place_many", [](const tg::GameStateCpp &gs, const py::object &shape_obj, py::array_t<int32_t, py::array::c_style | py::array::forcecast> rows, py::array_t<int32_t, py::array::c_style | py::array::forcecast> cols)
+           {
+            if (rows.size() != cols.size()) {
+                throw std::invalid_argument("rows and cols must have the same number of elements.");
+            }
+            tg::ShapeCpp shape;
+            if (py::isinstance<py::int_>(shape_obj)) {
+                const auto &templates = tg::shape_logic::get_shape_templates();
+                const int template_idx = shape_obj.cast<int>();
+                if (template_idx < 0 || template_idx >= static_cast<int>(templates.size())) {
+                    throw py::index_error("Shape template index " + std::to_string(template_idx) + " out of range.");
+                }
+                shape.footprint = tg::shape_logic::template_footprint(static_cast<size_t>(template_idx));
+            } else {
+                auto shape_opt = python_to_cpp_shape(shape_obj);
+                if (!shape_opt) {
+                    throw std::invalid_argument("A shape or template index is required.");
+                }
+                shape = std::move(*shape_opt);
+            }
+            py::array_t<bool> result(static_cast<py::ssize_t>(rows.size()));
+            const int32_t *rows_ptr = rows.data();
+            const int32_t *cols_ptr = cols.data();
+            auto *out_ptr = reinterpret_cast<uint8_t *>(result.mutable_data());
+            {
+                py::gil_scoped_release release;
+                tg::grid_logic::can_place_many(gs.get_grid_data(), shape, rows_ptr, cols_ptr,
+                                               static_cast<size_t>(rows.size()), out_ptr);
+            }
+            return result; }, py::arg("shape"), py::arg("rows"), py::arg("cols"),
+           "Checks placement of a shape (or template index) at many anchors; returns a flat bool array.")
       .def("debug_set_shapes", [](tg::GameStateCpp &gs, const py::list &shapes_py)
            {
             std::vector<std::optional<tg::ShapeCpp>> shapes_cpp;
@@ -200,6 +614,289 @@ PYBIND11_MODULE(trianglengin_cpp, m)
             }
             gs.debug_set_shapes(shapes_cpp); }, py::arg("new_shapes"), "Sets the shapes in the preview slots directly (for debugging/testing).");
 
+  py::class_<tg::StatePool::Pin>(m, "PinnedStateCpp")
+      .def("state", &tg::StatePool::Pin::state, py::return_value_policy::reference_internal,
+           "Returns the pinned state; raises IndexError once its handle was released.")
+      .def_property_readonly("valid", &tg::StatePool::Pin::valid)
+      .def_property_readonly("handle", &tg::StatePool::Pin::handle);
+
+  py::class_<tg::StatePool>(m, "StatePoolCpp")
+      .def(py::init<size_t>(), py::arg("slab_size") = 1024)
+      .def("clone", py::overload_cast<const tg::GameStateCpp &>(&tg::StatePool::clone), py::arg("src"),
+           "Copies a state into the pool and returns its handle.")
+      .def("clone", py::overload_cast<tg::StatePool::Handle>(&tg::StatePool::clone), py::arg("src"),
+           "Copies a pooled state (by handle) and returns the new handle.")
+      .def("pin", &tg::StatePool::pin, py::arg("handle"), py::keep_alive<0, 1>(),
+           "Pins a pooled state so references to it stay valid after release() or clear().")
+      .def("release", &tg::StatePool::release, py::arg("handle"))
+      .def("clear", &tg::StatePool::clear)
+      .def("__len__", &tg::StatePool::size)
+      .def_property_readonly("capacity", &tg::StatePool::capacity)
+      .def_property_readonly("slab_size", &tg::StatePool::slab_size);
+
+  py::class_<tg::ChildBatchCpp>(m, "ChildBatchCpp")
+      .def("__len__", &tg::ChildBatchCpp::size)
+      .def("get_state", &tg::ChildBatchCpp::state, py::arg("index"), py::return_value_policy::reference_internal)
+      .def("get_actions", [](const tg::ChildBatchCpp &batch)
+           {
+            py::array_t<int64_t> result(static_cast<py::ssize_t>(batch.size()));
+            std::copy(batch.actions().begin(), batch.actions().end(), result.mutable_data());
+            return result; })
+      .def("get_rewards", [](const tg::ChildBatchCpp &batch)
+           {
+            py::array_t<double> result(static_cast<py::ssize_t>(batch.size()));
+            std::copy(batch.rewards().begin(), batch.rewards().end(), result.mutable_data());
+            return result; })
+      .def("get_dones", [](const tg::ChildBatchCpp &batch)
+           {
+            py::array_t<bool> result(static_cast<py::ssize_t>(batch.size()));
+            std::copy(batch.dones().begin(), batch.dones().end(), result.mutable_data());
+            return result; })
+      .def("get_observations", [](tg::ChildBatchCpp &batch, const py::object &out_obj)
+           {
+            std::vector<tg::GameStateCpp *> states;
+            states.reserve(batch.size());
+            for (size_t i = 0; i < batch.size(); ++i) {
+                states.push_back(&batch.state(i));
+            }
+            const auto &config = batch.config();
+            const py::ssize_t channels = tg::observation::num_channels(config);
+            py::array out = output_array_or_new(
+                out_obj, {static_cast<py::ssize_t>(batch.size()), channels, config.rows, config.cols}, py::dtype::of<float>());
+            encode_observations(states, out);
+            return out; }, py::arg("out") = py::none(),
+           "Encodes all children as (N, channels, rows, cols) float32 planes.")
+      .def("get_board_features", [](tg::ChildBatchCpp &batch, const py::object &out_obj)
+           {
+            std::vector<tg::GameStateCpp *> states;
+            states.reserve(batch.size());
+            for (size_t i = 0; i < batch.size(); ++i) {
+                states.push_back(&batch.state(i));
+            }
+            const py::ssize_t num_features = tg::features::num_features(batch.config());
+            py::array out = output_array_or_new(
+                out_obj, {static_cast<py::ssize_t>(batch.size()), num_features}, py::dtype::of<float>());
+            compute_features(states, out);
+            return out; }, py::arg("out") = py::none(),
+           "Computes board features of all children as (N, num_features) float32.");
+
+  m.def("get_board_features_batch", [](const py::sequence &states_py, py::array out)
+        {
+          std::vector<tg::GameStateCpp *> states = collect_states(states_py);
+          compute_features(states, out);
+          return out; },
+        py::arg("states"), py::arg("out"),
+        "Computes the board features of all states into `out` (N, num_features).");
+
+  m.def("get_observation_batch", [](const py::sequence &states_py, py::array out)
+        {
+          std::vector<tg::GameStateCpp *> states = collect_states(states_py);
+          encode_observations(states, out);
+          return out; },
+        py::arg("states"), py::arg("out"),
+        "Encodes the observations of all states into `out` (N, channels, rows, cols).");
+
+  m.def("step_ex_batch", [](const py::sequence &states_py, const py::array_t<int64_t, py::array::c_style | py::array::forcecast> &actions)
+        {
+          std::vector<tg::GameStateCpp *> states = collect_states(states_py);
+          const auto n = static_cast<py::ssize_t>(states.size());
+          if (actions.ndim() != 1 || actions.size() != n)
+          {
+            throw py::value_error("actions must be a 1-D array with one entry per state.");
+          }
+          py::array_t<double> rewards(n);
+          py::array_t<bool> dones(n);
+          py::array_t<int32_t> placed(n);
+          py::array_t<int32_t> cleared(n);
+          py::array_t<int32_t> lines(n);
+          py::array_t<bool> refilled(n);
+          const int64_t *actions_ptr = actions.data();
+          double *rewards_ptr = rewards.mutable_data();
+          bool *dones_ptr = dones.mutable_data();
+          int32_t *placed_ptr = placed.mutable_data();
+          int32_t *cleared_ptr = cleared.mutable_data();
+          int32_t *lines_ptr = lines.mutable_data();
+          bool *refilled_ptr = refilled.mutable_data();
+          {
+            py::gil_scoped_release release;
+            for (py::ssize_t i = 0; i < n; ++i)
+            {
+              // Values outside [0, action_dim) would be truncated by the cast; step them as -1 (invalid)
+              const int64_t raw = actions_ptr[i];
+              const bool in_range = raw >= 0 && raw < states[i]->action_dim();
+              tg::StepInfo info = states[i]->step_ex(in_range ? static_cast<tg::Action>(raw) : -1);
+              rewards_ptr[i] = info.reward;
+              dones_ptr[i] = info.done;
+              placed_ptr[i] = info.placed_count;
+              cleared_ptr[i] = info.cleared_count;
+              lines_ptr[i] = info.lines_cleared;
+              refilled_ptr[i] = info.refilled;
+            }
+          }
+          py::dict result;
+          result["reward"] = rewards;
+          result["done"] = dones;
+          result["placed_count"] = placed;
+          result["cleared_count"] = cleared;
+          result["lines_cleared"] = lines;
+          result["refilled"] = refilled;
+          return result; },
+        py::arg("states"), py::arg("actions"),
+        "Steps every state with its action (GIL released) and returns the step records as parallel arrays.");
+
+  m.def("get_thread_allocation_count", &tg::alloc_counter::thread_allocations,
+        "Returns the number of heap allocations made by the engine on the calling thread, or -1 if counting is disabled.");
+  m.attr("ALLOC_COUNTING") = tg::alloc_counter::enabled;
+
+  m.def("get_topology", [](const py::object &py_config)
+        { return topology_to_numpy(*tg::get_topology(python_to_cpp_env_config(py_config))); },
+        py::arg("config"),
+        "Exports the board topology of a config as NumPy arrays (masks and CSR line tables).");
+
+  m.def("encode_board_batch", [](const py::object &py_config,
+                                  const py::array_t<uint8_t, py::array::c_style | py::array::forcecast> &boards,
+                                  const py::array_t<int8_t, py::array::c_style | py::array::forcecast> &slots,
+                                  std::optional<py::array> obs_out, std::optional<py::array> mask_out)
+        {
+          const tg::EnvConfigCpp config = python_to_cpp_env_config(py_config);
+          const py::ssize_t plane_size = static_cast<py::ssize_t>(config.rows) * config.cols;
+          const py::ssize_t board_bytes = (plane_size + 7) / 8;
+          if (boards.ndim() != 2 || boards.shape(1) != board_bytes)
+          {
+            throw py::value_error("boards must have shape (N, " + std::to_string(board_bytes) + ").");
+          }
+          const py::ssize_t n = boards.shape(0);
+          if (slots.ndim() != 2 || slots.shape(0) != n || slots.shape(1) != config.num_shape_slots)
+          {
+            throw py::value_error("slots must have shape (N, " + std::to_string(config.num_shape_slots) + ").");
+          }
+          const py::ssize_t obs_size = static_cast<py::ssize_t>(tg::observation::num_channels(config)) * plane_size;
+          const py::ssize_t action_dim = static_cast<py::ssize_t>(config.num_shape_slots) * plane_size;
+          float *obs_ptr = obs_out ? float_buffer_ptr(*obs_out, n * obs_size) : nullptr;
+          uint8_t *mask_ptr = mask_out ? mask_buffer_ptr(*mask_out, n * action_dim) : nullptr;
+          const uint8_t *boards_ptr = boards.data();
+          const int8_t *slots_ptr = slots.data();
+          {
+            py::gil_scoped_release release;
+            tg::GridData grid(config);
+            for (py::ssize_t i = 0; i < n; ++i)
+            {
+              tg::observation::encode_board(grid, config.num_shape_slots, boards_ptr + i * board_bytes,
+                                            slots_ptr + i * config.num_shape_slots,
+                                            obs_ptr ? obs_ptr + i * obs_size : nullptr,
+                                            mask_ptr ? mask_ptr + i * action_dim : nullptr);
+            }
+          } },
+        py::arg("config"), py::arg("boards"), py::arg("slots"), py::arg("obs_out") = py::none(), py::arg("mask_out") = py::none(),
+        "Encodes stored boards (bit-packed occupancy and slot template ids) into observation planes and/or action masks.");
+
+  m.def("replay", [](const py::object &py_config, unsigned int seed,
+                     const py::array_t<int64_t, py::array::c_style | py::array::forcecast> &actions,
+                     std::optional<py::array> boards, std::optional<py::array> slots,
+                     std::optional<py::array> masks, std::optional<py::array> observations,
+                     std::optional<py::array> rewards, bool verify)
+        {
+          const tg::EnvConfigCpp config = python_to_cpp_env_config(py_config);
+          if (actions.ndim() != 1)
+          {
+            throw py::value_error("actions must be a 1-D array.");
+          }
+          const py::ssize_t n = actions.size();
+          const py::ssize_t plane_size = static_cast<py::ssize_t>(config.rows) * config.cols;
+          tg::replay::Outputs out;
+          if (boards)
+            out.boards = typed_buffer_ptr<uint8_t>(*boards, n * ((plane_size + 7) / 8), "boards");
+          if (slots)
+            out.slots = typed_buffer_ptr<int8_t>(*slots, n * config.num_shape_slots, "slots");
+          if (masks)
+            out.masks = mask_buffer_ptr(*masks, n * config.num_shape_slots * plane_size);
+          if (observations)
+            out.observations = float_buffer_ptr(*observations, n * tg::observation::num_channels(config) * plane_size);
+          if (rewards)
+            out.rewards = typed_buffer_ptr<double>(*rewards, n, "rewards");
+          const int64_t *actions_ptr = actions.data();
+          tg::replay::Result result;
+          {
+            py::gil_scoped_release release;
+            result = tg::replay::run(config, seed, actions_ptr, static_cast<std::size_t>(n), out, verify);
+          }
+          return py::make_tuple(result.steps, result.invalid_step, result.done, result.score); },
+        py::arg("config"), py::arg("seed"), py::arg("actions"), py::arg("boards") = py::none(),
+        py::arg("slots") = py::none(), py::arg("masks") = py::none(), py::arg("observations") = py::none(),
+        py::arg("rewards") = py::none(), py::arg("verify") = true,
+        "Replays a game from its seed and actions, filling the given per-step arrays. "
+        "Returns (steps, invalid_step, done, score).");
+
+  m.def("get_valid_action_mask_batch", [](const py::sequence &states_py, py::array out)
+        {
+          std::vector<tg::GameStateCpp *> states = collect_states(states_py);
+          if (states.empty())
+          {
+            return out;
+          }
+          const int action_dim = states[0]->action_dim();
+          for (const auto *gs : states)
+          {
+            if (gs->action_dim() != action_dim)
+            {
+              throw py::value_error("All states in a batch must share the same action dimension.");
+            }
+          }
+          uint8_t *ptr = mask_buffer_ptr(out, static_cast<py::ssize_t>(states.size()) * action_dim);
+          {
+            py::gil_scoped_release release;
+            for (size_t i = 0; i < states.size(); ++i)
+            {
+              states[i]->fill_valid_action_mask(ptr + i * action_dim);
+            }
+          }
+          return out; },
+        py::arg("states"), py::arg("out"),
+        "Fills `out` with the valid-action masks of all states (one row per state).");
+
+  m.def("sample_actions_batch", [](const py::sequence &states_py,
+                                   const py::array_t<double, py::array::c_style | py::array::forcecast> &logits,
+                                   const py::array_t<double, py::array::c_style | py::array::forcecast> &uniforms,
+                                   double temperature, int top_k)
+        {
+          std::vector<tg::GameStateCpp *> states = collect_states(states_py);
+          const auto n = static_cast<py::ssize_t>(states.size());
+          if (logits.ndim() != 2 || logits.shape(0) != n)
+          {
+            throw py::value_error("logits must have shape (num_states, action_dim).");
+          }
+          if (uniforms.ndim() != 1 || uniforms.size() != n)
+          {
+            throw py::value_error("uniforms must be a 1-D array with one entry per state.");
+          }
+          const py::ssize_t action_dim = logits.shape(1);
+          for (const auto *gs : states)
+          {
+            if (gs->action_dim() != action_dim)
+            {
+              throw py::value_error("logits action dimension does not match the states' action space.");
+            }
+          }
+          py::array_t<int64_t> actions(n);
+          int64_t *actions_ptr = actions.mutable_data();
+          const double *logits_ptr = logits.data();
+          const double *uniforms_ptr = uniforms.data();
+          {
+            py::gil_scoped_release release;
+            std::vector<std::pair<double, tg::Action>> candidates;
+            for (py::ssize_t i = 0; i < n; ++i)
+            {
+              const double *row = logits_ptr + i * action_dim;
+              candidates.clear();
+              states[i]->for_each_valid_action([&](tg::Action action)
+                                               { candidates.emplace_back(row[action], action); });
+              actions_ptr[i] = tg::sample_from_logits(candidates, uniforms_ptr[i], temperature, top_k);
+            }
+          }
+          return actions; },
+        py::arg("states"), py::arg("logits"), py::arg("uniforms"), py::arg("temperature"), py::arg("top_k"),
+        "Samples one valid action per state from masked logits (GIL released). Returns -1 for states without valid actions.");
+
 #ifdef VERSION_INFO
   m.attr("__version__") = VERSION_INFO;
 #else
@@ -0,0 +1,139 @@
+// File: src/trianglengin/cpp/board_features.cpp
+#include "board_features.h"
+#include "game_state.h"
+#include "grid_logic.h"
+#include "shape_logic.h"
+#include <numeric>
+#include <vector>
+
+namespace trianglengin::cpp::features
+{
+  namespace
+  {
+    int find_root(std::vector<int> &parent, int i)
+    {
+      while (parent[i] != i)
+      {
+        parent[i] = parent[parent[i]]; // Path halving
+        i = parent[i];
+      }
+      return i;
+    }
+
+    bool is_empty_cell(const GridData &grid_data, int r, int c)
+    {
+      return grid_data.is_valid(r, c) && !grid_data.is_death(r, c) && !grid_data.is_occupied(r, c);
+    }
+  } // namespace
+
+  int num_features(const EnvConfigCpp &config)
+  {
+    return kSlotMobility + config.num_shape_slots;
+  }
+
+  void compute(const GameStateCpp &state, float *out)
+  {
+    const auto &config = state.get_config();
+    const auto &grid_data = state.get_grid_data();
+    const int rows = config.rows;
+    const int cols = config.cols;
+
+    // --- Empty regions (union-find over edge-sharing empty triangles) ---
+    std::vector<int> parent(rows * cols);
+    std::iota(parent.begin(), parent.end(), 0);
+    int empty_cells = 0;
+    int isolated_empty = 0;
+    for (int r = 0; r < rows; ++r)
+    {
+      for (int c = 0; c < cols; ++c)
+      {
+        if (!is_empty_cell(grid_data, r, c))
+          continue;
+        ++empty_cells;
+        // Up triangles share their base with the cell below, down ones with the cell above
+        const int vertical_r = grid_data.is_up(r, c) ? r + 1 : r - 1;
+        const int neighbors[3][2] = {{r, c - 1}, {r, c + 1}, {vertical_r, c}};
+        bool has_empty_neighbor = false;
+        for (const auto &[nr, nc] : neighbors)
+        {
+          if (!is_empty_cell(grid_data, nr, nc))
+            continue;
+          has_empty_neighbor = true;
+          int a = find_root(parent, r * cols + c);
+          int b = find_root(parent, nr * cols + nc);
+          if (a != b)
+            parent[a] = b;
+        }
+        if (!has_empty_neighbor)
+          ++isolated_empty;
+      }
+    }
+    int empty_regions = 0;
+    for (int r = 0; r < rows; ++r)
+    {
+      for (int c = 0; c < cols; ++c)
+      {
+        if (is_empty_cell(grid_data, r, c) && find_root(parent, r * cols + c) == r * cols + c)
+          ++empty_regions;
+      }
+    }
+
+    // --- Empty cells that no template placement can cover ---
+    std::vector<uint8_t> coverable(rows * cols, 0);
+    ShapeCpp probe;
+    const auto &templates = shape_logic::get_shape_templates();
+    for (size_t t = 0; t < templates.size(); ++t)
+    {
+      const auto &footprint = templates[t];
+      probe.footprint = shape_logic::template_footprint(t);
+      grid_logic::for_each_fit(grid_data, probe, [&](int anchor)
+                               {
+        const int r = anchor / cols;
+        const int c = anchor % cols;
+        for (const auto &[dr, dc, is_up_ignored] : footprint)
+        {
+          coverable[(r + dr) * cols + (c + dc)] = 1;
+        }
+        return true; });
+    }
+    int uncoverable_empty = 0;
+    for (int r = 0; r < rows; ++r)
+    {
+      for (int c = 0; c < cols; ++c)
+      {
+        if (is_empty_cell(grid_data, r, c) && !coverable[r * cols + c])
+          ++uncoverable_empty;
+      }
+    }
+
+    // --- Lines missing exactly one triangle ---
+    int near_complete_lines = 0;
+    const auto &line_fill = grid_data.get_line_fill();
+    const auto &line_cells = grid_data.get_line_cells();
+    for (size_t line_idx = 0; line_idx < line_cells.size(); ++line_idx)
+    {
+      if (static_cast<int>(line_cells[line_idx].size()) - line_fill[line_idx] == 1)
+        ++near_complete_lines;
+    }
+
+    out[kEmptyCells] = static_cast<float>(empty_cells);
+    out[kEmptyRegions] = static_cast<float>(empty_regions);
+    out[kIsolatedEmpty] = static_cast<float>(isolated_empty);
+    out[kUncoverableEmpty] = static_cast<float>(uncoverable_empty);
+    out[kNearCompleteLines] = static_cast<float>(near_complete_lines);
+
+    // --- Per-slot mobility (number of legal anchors) ---
+    const auto &shapes = state.get_shapes();
+    for (int k = 0; k < config.num_shape_slots; ++k)
+    {
+      int mobility = 0;
+      if (k < static_cast<int>(shapes.size()) && shapes[k].has_value())
+      {
+        grid_logic::for_each_fit(grid_data, shapes[k].value(), [&mobility](int)
+                                 { ++mobility; return true; });
+      }
+      out[kSlotMobility + k] = static_cast<float>(mobility);
+    }
+  }
+
+} // namespace trianglengin::cpp::features
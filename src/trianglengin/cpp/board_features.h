@@ -0,0 +1,34 @@
+// File: src/trianglengin/cpp/board_features.h
+#ifndef TRIANGLENGIN_CPP_BOARD_FEATURES_H
+#define TRIANGLENGIN_CPP_BOARD_FEATURES_H
+
+#pragma once
+
+#include "config.h"
+
+namespace trianglengin::cpp
+{
+  class GameStateCpp;
+
+  namespace features
+  {
+    // Layout of the feature vector; slot mobility follows at index kSlotMobility + k
+    enum FeatureIndex
+    {
+      kEmptyCells = 0,
+      kEmptyRegions,
+      kIsolatedEmpty,
+      kUncoverableEmpty,
+      kNearCompleteLines,
+      kSlotMobility,
+    };
+
+    int num_features(const EnvConfigCpp &config);
+
+    // Writes num_features(config) floats describing the board into `out`
+    void compute(const GameStateCpp &state, float *out);
+
+  } // namespace features
+} // namespace trianglengin::cpp
+
+#endif // TRIANGLENGIN_CPP_BOARD_FEATURES_H
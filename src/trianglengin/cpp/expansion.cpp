@@ -0,0 +1,43 @@
+// File: src/trianglengin/cpp/expansion.cpp
+#include "expansion.h"
+#include <stdexcept>
+#include <string>
+
+namespace trianglengin::cpp
+{
+
+  ChildBatchCpp ChildBatchCpp::expand(GameStateCpp &parent)
+  {
+    ChildBatchCpp batch;
+    batch.config_ = parent.get_config_ptr();
+    if (parent.is_over())
+    {
+      return batch;
+    }
+    const std::vector<Action> valid_actions = parent.get_valid_actions();
+    const size_t n = valid_actions.size();
+    batch.children_.reserve(n);
+    batch.actions_.reserve(n);
+    batch.rewards_.reserve(n);
+    batch.dones_.reserve(n);
+    for (Action action : valid_actions)
+    {
+      batch.children_.push_back(parent);
+      StepInfo info = batch.children_.back().step_ex(action);
+      batch.actions_.push_back(action);
+      batch.rewards_.push_back(info.reward);
+      batch.dones_.push_back(info.done ? 1 : 0);
+    }
+    return batch;
+  }
+
+  GameStateCpp &ChildBatchCpp::state(size_t index)
+  {
+    if (index >= children_.size())
+    {
+      throw std::out_of_range("Child index " + std::to_string(index) + " out of range.");
+    }
+    return children_[index];
+  }
+
+} // namespace trianglengin::cpp
@@ -0,0 +1,41 @@
+// File: src/trianglengin/cpp/expansion.h
+#ifndef TRIANGLENGIN_CPP_EXPANSION_H
+#define TRIANGLENGIN_CPP_EXPANSION_H
+
+#pragma once
+
+#include <vector>
+#include <cstdint>
+#include <memory>
+
+#include "game_state.h"
+
+namespace trianglengin::cpp
+{
+  // All children of a node, stored contiguously and addressed by index
+  class ChildBatchCpp
+  {
+  public:
+    // Copies `parent` once per valid action and steps each copy
+    static ChildBatchCpp expand(GameStateCpp &parent);
+
+    size_t size() const { return children_.size(); }
+    GameStateCpp &state(size_t index);
+
+    const std::vector<Action> &actions() const { return actions_; }
+    const std::vector<double> &rewards() const { return rewards_; }
+    const std::vector<uint8_t> &dones() const { return dones_; }
+    // The parent's config, available even when there are no children
+    const EnvConfigCpp &config() const { return *config_; }
+
+  private:
+    std::shared_ptr<const EnvConfigCpp> config_;
+    std::vector<GameStateCpp> children_;
+    std::vector<Action> actions_;
+    std::vector<double> rewards_;
+    std::vector<uint8_t> dones_;
+  };
+
+} // namespace trianglengin::cpp
+
+#endif // TRIANGLENGIN_CPP_EXPANSION_H
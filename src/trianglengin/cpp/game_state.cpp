@@ -3,22 +3,59 @@
 #include "game_state.h"
 #include "grid_logic.h"
 #include "shape_logic.h"
+#include "alloc_counter.h"
 #include <stdexcept>
 #include <numeric>
 #include <iostream>
 #include <algorithm> // For std::min
+#include <utility>   // For std::as_const
+#include <thread>
 
 namespace trianglengin::cpp
 {
+  namespace
+  {
+    // Per-thread scratch buffers of the step path. They keep their capacity
+    // between steps and are not part of the state, so copies stay cheap.
+    struct StepScratch
+    {
+      std::vector<int> placed_cells;
+      std::vector<int> cleared_cells;
+      std::vector<int> completed_lines;
+      std::vector<const ShapeCpp *> shapes;
+    };
+
+    StepScratch make_step_scratch()
+    {
+      // Sized for the inline board so default-board steps never grow them
+      StepScratch scratch;
+      scratch.placed_cells.reserve(16);
+      scratch.cleared_cells.reserve(kInlineCells);
+      scratch.completed_lines.reserve(kInlineLines);
+      scratch.shapes.reserve(kInlineShapeSlots);
+      return scratch;
+    }
+
+    StepScratch &step_scratch()
+    {
+      thread_local StepScratch scratch = make_step_scratch();
+      return scratch;
+    }
+  } // namespace
 
   GameStateCpp::GameStateCpp(const EnvConfigCpp &config, unsigned int initial_seed)
-      : config_(config),
-        grid_data_(config_),
-        shapes_(config_.num_shape_slots),
+      : config_(std::make_shared<const EnvConfigCpp>(config)),
+        grid_data_(*config_),
+        shapes_(config.num_shape_slots, std::nullopt),
         score_(0.0),
         current_step_(0),
         last_cleared_triangles_(0), // Initialize added member
         game_over_(false),
+        game_over_reason_(GameOverReason::None),
+        game_over_detail_(0),
+        last_step_allocations_(alloc_counter::enabled ? 0 : -1),
+        valid_action_bits_(action_words(config), 0),
+        num_valid_actions_(0),
         rng_(initial_seed)
   {
     reset();
@@ -26,6 +63,13 @@ namespace trianglengin::cpp
 
   // --- Explicit Copy Constructor ---
   GameStateCpp::GameStateCpp(const GameStateCpp &other)
+      : GameStateCpp(other, other.action_cache_.ready())
+  {
+  }
+
+  // The valid-action cache is copied only if it was published when the copy
+  // started: another thread may be filling it, so its words are not read otherwise
+  GameStateCpp::GameStateCpp(const GameStateCpp &other, bool cache_ready)
       : config_(other.config_),
         grid_data_(other.grid_data_),
         shapes_(other.shapes_),
@@ -34,9 +78,14 @@ namespace trianglengin::cpp
         last_cleared_triangles_(other.last_cleared_triangles_), // Copy added member
         game_over_(other.game_over_),
         game_over_reason_(other.game_over_reason_),
-        valid_actions_cache_(other.valid_actions_cache_),
+        game_over_detail_(other.game_over_detail_),
+        last_step_allocations_(other.last_step_allocations_),
+        valid_action_bits_(cache_ready ? other.valid_action_bits_ : ActionBits(action_words(*other.config_), 0)),
+        num_valid_actions_(cache_ready ? other.num_valid_actions_ : 0),
         rng_(other.rng_)
   {
+    if (cache_ready)
+      action_cache_.publish();
   }
 
   // --- Explicit Copy Assignment Operator ---
@@ -52,7 +101,20 @@ namespace trianglengin::cpp
       last_cleared_triangles_ = other.last_cleared_triangles_; // Copy added member
       game_over_ = other.game_over_;
       game_over_reason_ = other.game_over_reason_;
-      valid_actions_cache_ = other.valid_actions_cache_;
+      game_over_detail_ = other.game_over_detail_;
+      last_step_allocations_ = other.last_step_allocations_;
+      if (other.action_cache_.ready())
+      {
+        valid_action_bits_ = other.valid_action_bits_;
+        num_valid_actions_ = other.num_valid_actions_;
+        action_cache_.publish();
+      }
+      else
+      {
+        valid_action_bits_.assign(action_words(*config_), 0);
+        num_valid_actions_ = 0;
+        action_cache_.invalidate();
+      }
       rng_ = other.rng_;
     }
     return *this;
@@ -66,33 +128,128 @@ namespace trianglengin::cpp
     current_step_ = 0;
     last_cleared_triangles_ = 0; // Reset added member
     game_over_ = false;
-    game_over_reason_ = std::nullopt;
-    valid_actions_cache_ = std::nullopt;
+    game_over_reason_ = GameOverReason::None;
+    game_over_detail_ = 0;
+    last_step_allocations_ = alloc_counter::enabled ? 0 : -1;
+    invalidate_action_cache();
     shape_logic::refill_shape_slots(*this, rng_);
     check_initial_state_game_over();
   }
 
   void GameStateCpp::check_initial_state_game_over()
   {
-    get_valid_actions(true);
+    update_game_over_lazy();
+  }
+
+  void GameStateCpp::update_game_over_lazy()
+  {
+    // Only answer "is there any legal move?"; the full action set is
+    // enumerated on demand by get_valid_actions().
+    invalidate_action_cache();
+    if (!game_over_ && !has_any_valid_action())
+    {
+      force_game_over(GameOverReason::NoValidActions);
+    }
+  }
+
+  bool GameStateCpp::has_any_valid_action() const
+  {
+    if (action_cache_.ready())
+    {
+      return num_valid_actions_ > 0;
+    }
+    std::vector<const ShapeCpp *> &shapes = step_scratch().shapes;
+    shapes.clear();
+    for (const auto &shape_opt : shapes_)
+    {
+      if (shape_opt.has_value())
+        shapes.push_back(&shape_opt.value());
+    }
+    return any_shape_fits(grid_data_, shapes);
+  }
+
+  bool GameStateCpp::any_shape_fits(const GridData &grid, std::vector<const ShapeCpp *> &shapes)
+  {
+    // Try the smallest shapes first: they are the most likely to fit.
+    std::sort(shapes.begin(), shapes.end(), [](const ShapeCpp *a, const ShapeCpp *b)
+              { return a->triangles().size() < b->triangles().size(); });
+
+    for (const ShapeCpp *shape : shapes)
+    {
+      // for_each_fit returns false as soon as the callback stops at a fit
+      if (!grid_logic::for_each_fit(grid, *shape, [](int)
+                                    { return false; }))
+      {
+        return true;
+      }
+    }
+    return false;
+  }
+
+  bool GameStateCpp::is_action_valid(Action action) const
+  {
+    if (action < 0 || action >= action_dim())
+    {
+      return false;
+    }
+    if (action_cache_.ready())
+    {
+      return (std::as_const(valid_action_bits_)[action >> 6] >> (action & 63)) & 1u;
+    }
+    auto [shape_idx, r, c] = decode_action(action);
+    return shapes_[shape_idx].has_value() && grid_logic::can_place(grid_data_, shapes_[shape_idx].value(), r, c);
   }
 
   std::tuple<double, bool> GameStateCpp::step(Action action)
+  {
+    StepInfo info;
+    step_internal(action, info, false);
+    return {info.reward, info.done};
+  }
+
+  StepInfo GameStateCpp::step_ex(Action action, bool record_cells)
+  {
+    StepInfo info;
+    step_internal(action, info, record_cells);
+    return info;
+  }
+
+  void GameStateCpp::apply_invalid_step(GameOverReason reason, int detail, StepInfo &info)
+  {
+    force_game_over(reason, detail);
+    score_ += config_->penalty_game_over;
+    info.reward = config_->penalty_game_over;
+    info.done = true;
+  }
+
+  void GameStateCpp::step_internal(Action action, StepInfo &info, bool record_cells)
+  {
+    if constexpr (alloc_counter::enabled)
+    {
+      const std::int64_t allocations_before = alloc_counter::thread_allocations();
+      step_impl(action, info, record_cells);
+      last_step_allocations_ = static_cast<int>(alloc_counter::thread_allocations() - allocations_before);
+    }
+    else
+    {
+      step_impl(action, info, record_cells);
+    }
+  }
+
+  void GameStateCpp::step_impl(Action action, StepInfo &info, bool record_cells)
   {
     last_cleared_triangles_ = 0; // Reset before potential clearing
 
     if (game_over_)
     {
-      return {0.0, true};
+      info.done = true;
+      return;
     }
 
-    const auto &valid_actions = get_valid_actions();
-
-    if (valid_actions.find(action) == valid_actions.end())
+    if (!is_action_valid(action))
     {
-      force_game_over("Invalid action provided: " + std::to_string(action));
-      score_ += config_.penalty_game_over;
-      return {config_.penalty_game_over, true};
+      apply_invalid_step(GameOverReason::InvalidAction, action, info);
+      return;
     }
 
     int shape_idx, r, c;
@@ -102,33 +259,29 @@ namespace trianglengin::cpp
     }
     catch (const std::out_of_range &e)
     {
-      force_game_over("Failed to decode action: " + std::to_string(action));
-      score_ += config_.penalty_game_over;
-      return {config_.penalty_game_over, true};
+      apply_invalid_step(GameOverReason::DecodeFailed, action, info);
+      return;
     }
 
     if (shape_idx < 0 || shape_idx >= static_cast<int>(shapes_.size()) || !shapes_[shape_idx].has_value())
     {
-      force_game_over("Action references invalid/empty shape slot: " + std::to_string(shape_idx));
-      score_ += config_.penalty_game_over;
-      return {config_.penalty_game_over, true};
+      apply_invalid_step(GameOverReason::EmptySlot, shape_idx, info);
+      return;
     }
 
     const ShapeCpp &shape_to_place = shapes_[shape_idx].value();
 
     if (!grid_logic::can_place(grid_data_, shape_to_place, r, c))
     {
-      force_game_over("Placement check failed for valid action (logic error?). Action: " + std::to_string(action));
-      score_ += config_.penalty_game_over;
-      return {config_.penalty_game_over, true};
+      apply_invalid_step(GameOverReason::PlacementFailed, action, info);
+      return;
     }
 
     // --- Placement ---
-    std::set<Coord> newly_occupied_coords;
-    int placed_count = 0;
-    auto &occupied_grid = grid_data_.get_occupied_grid_mut();
-    auto &color_grid = grid_data_.get_color_id_grid_mut();
-    for (const auto &tri_data : shape_to_place.triangles)
+    StepScratch &scratch = step_scratch();
+    std::vector<int> &placed_cells = scratch.placed_cells;
+    placed_cells.clear();
+    for (const auto &tri_data : shape_to_place.triangles())
     {
       int dr, dc;
       bool is_up_ignored;
@@ -137,24 +290,19 @@ namespace trianglengin::cpp
       int target_c = c + dc;
       if (!grid_data_.is_valid(target_r, target_c) || grid_data_.is_death(target_r, target_c))
       {
-        force_game_over("Attempted placement out of bounds/death zone during execution. Action: " + std::to_string(action));
-        score_ += config_.penalty_game_over;
-        return {config_.penalty_game_over, true};
+        apply_invalid_step(GameOverReason::OutOfBounds, action, info);
+        return;
       }
-      occupied_grid[target_r][target_c] = true;
-      color_grid[target_r][target_c] = static_cast<int8_t>(shape_to_place.color_id);
-      newly_occupied_coords.insert({target_r, target_c});
-      placed_count++;
+      grid_data_.set_cell(target_r, target_c, true, static_cast<int8_t>(shape_to_place.color_id));
+      placed_cells.push_back(target_r * config_->cols + target_c);
     }
+    const int placed_count = static_cast<int>(placed_cells.size());
     shapes_[shape_idx] = std::nullopt;
 
     // --- Line Clearing ---
-    int lines_cleared_count;
-    std::set<Coord> cleared_coords;
-    LineFsSet cleared_lines_fs;
-    std::tie(lines_cleared_count, cleared_coords, cleared_lines_fs) =
-        grid_logic::check_and_clear_lines(grid_data_, newly_occupied_coords);
-    int cleared_count = static_cast<int>(cleared_coords.size());
+    const int lines_cleared_count = grid_logic::clear_completed_lines(
+        grid_data_, placed_cells, scratch.completed_lines, scratch.cleared_cells);
+    const int cleared_count = static_cast<int>(scratch.cleared_cells.size());
     last_cleared_triangles_ = cleared_count; // Store cleared count
 
     // --- Refill ---
@@ -174,13 +322,12 @@ namespace trianglengin::cpp
 
     // --- Update State & Check Game Over ---
     current_step_++;
-    invalidate_action_cache();
-    get_valid_actions(true);
+    update_game_over_lazy();
 
     // --- Calculate Reward & Update Score ---
     double reward = 0.0;
-    reward += static_cast<double>(placed_count) * config_.reward_per_placed_triangle;
-    reward += static_cast<double>(cleared_count) * config_.reward_per_cleared_triangle;
+    reward += static_cast<double>(placed_count) * config_->reward_per_placed_triangle;
+    reward += static_cast<double>(cleared_count) * config_->reward_per_cleared_triangle;
 
     if (game_over_)
     {
@@ -188,11 +335,136 @@ namespace trianglengin::cpp
     }
     else
     {
-      reward += config_.reward_per_step_alive;
+      reward += config_->reward_per_step_alive;
     }
     score_ += reward;
 
-    return {reward, game_over_};
+    info.reward = reward;
+    info.done = game_over_;
+    info.placed_count = placed_count;
+    info.cleared_count = cleared_count;
+    info.lines_cleared = lines_cleared_count;
+    info.refilled = all_slots_empty;
+    if (record_cells)
+    {
+      info.placed_cells.assign(placed_cells.begin(), placed_cells.end());
+      std::sort(info.placed_cells.begin(), info.placed_cells.end());
+      info.cleared_cells.assign(scratch.cleared_cells.begin(), scratch.cleared_cells.end());
+    }
+  }
+
+  std::vector<ActionOutcome> GameStateCpp::evaluate_actions()
+  {
+    std::vector<ActionOutcome> outcomes;
+    if (game_over_)
+    {
+      return outcomes;
+    }
+    const std::vector<Action> valid_actions = get_valid_actions();
+    outcomes.reserve(valid_actions.size());
+
+    const int cols = config_->cols;
+    // Trial placements go to a private copy so concurrent readers of this
+    // state never observe them (heap boards are detached once, on first write)
+    GridData grid = grid_data_;
+    // (row, col, previous_occupied_state, previous_color_id), as in StepUndoInfo
+    std::vector<std::tuple<int, int, bool, int8_t>> changed_cells;
+    std::set<Coord> newly_occupied_coords;
+    std::vector<const ShapeCpp *> next_shapes;
+    // A refill draws the same shapes whichever action triggers it
+    std::optional<std::vector<ShapeCpp>> refill_shapes;
+
+    for (Action action : valid_actions)
+    {
+      auto [shape_idx, r, c] = decode_action(action);
+      const ShapeCpp &shape = std::as_const(shapes_)[shape_idx].value();
+      changed_cells.clear();
+      newly_occupied_coords.clear();
+
+      // Place on the scratch grid; every change is undone below
+      for (const auto &[dr, dc, is_up_ignored] : shape.triangles())
+      {
+        int target_r = r + dr;
+        int target_c = c + dc;
+        changed_cells.emplace_back(target_r, target_c, false, grid.get_color_id_flat(target_r * cols + target_c));
+        grid.set_cell(target_r, target_c, true, static_cast<int8_t>(shape.color_id));
+        newly_occupied_coords.insert({target_r, target_c});
+      }
+      auto [lines_cleared, cleared_coords, cleared_line_indices] =
+          grid_logic::find_completed_lines(grid, newly_occupied_coords);
+      for (const auto &[cr, cc] : cleared_coords)
+      {
+        changed_cells.emplace_back(cr, cc, true, grid.get_color_id_flat(cr * cols + cc));
+        grid.set_cell(cr, cc, false, NO_COLOR_ID);
+      }
+
+      next_shapes.clear();
+      for (int i = 0; i < static_cast<int>(shapes_.size()); ++i)
+      {
+        if (i != shape_idx && std::as_const(shapes_)[i].has_value())
+          next_shapes.push_back(&std::as_const(shapes_)[i].value());
+      }
+      bool refilled = next_shapes.empty();
+      if (refilled)
+      {
+        if (!refill_shapes.has_value())
+        {
+          std::mt19937 rng_copy = rng_;
+          refill_shapes = shape_logic::generate_refill_shapes(rng_copy, shapes_.size());
+        }
+        for (const auto &refill_shape : *refill_shapes)
+          next_shapes.push_back(&refill_shape);
+      }
+      bool done = !any_shape_fits(grid, next_shapes);
+
+      for (auto it = changed_cells.rbegin(); it != changed_cells.rend(); ++it)
+      {
+        const auto &[ur, uc, was_occupied, prev_color] = *it;
+        grid.set_cell(ur, uc, was_occupied, prev_color);
+      }
+
+      ActionOutcome outcome;
+      outcome.action = action;
+      outcome.placed_count = static_cast<int>(shape.triangles().size());
+      outcome.cleared_count = static_cast<int>(cleared_coords.size());
+      outcome.lines_cleared = lines_cleared;
+      outcome.refilled = refilled;
+      outcome.done = done;
+      outcome.reward = static_cast<double>(outcome.placed_count) * config_->reward_per_placed_triangle +
+                       static_cast<double>(outcome.cleared_count) * config_->reward_per_cleared_triangle +
+                       (done ? 0.0 : config_->reward_per_step_alive);
+      outcomes.push_back(outcome);
+    }
+    return outcomes;
+  }
+
+  std::vector<std::pair<int, Action>> GameStateCpp::get_line_threats()
+  {
+    std::vector<std::pair<int, Action>> threats;
+    const auto &line_cells = grid_data_.get_line_cells();
+    const auto &line_fill = grid_data_.get_line_fill();
+    std::vector<int> covered(line_cells.size(), 0);
+    std::vector<int> touched_lines;
+    for_each_valid_action([&](Action action)
+                          {
+      auto [shape_idx, r, c] = decode_action(action);
+      touched_lines.clear();
+      for (const auto &[dr, dc, is_up_ignored] : std::as_const(shapes_)[shape_idx]->triangles())
+      {
+        for (int line_idx : grid_data_.get_cell_lines(r + dr, c + dc))
+        {
+          if (covered[line_idx]++ == 0)
+            touched_lines.push_back(line_idx);
+        }
+      }
+      std::sort(touched_lines.begin(), touched_lines.end());
+      for (int line_idx : touched_lines)
+      {
+        if (line_fill[line_idx] + covered[line_idx] == static_cast<int>(line_cells[line_idx].size()))
+          threats.emplace_back(line_idx, action);
+        covered[line_idx] = 0;
+      } });
+    return threats;
   }
 
   bool GameStateCpp::is_over() const
@@ -200,13 +472,16 @@ namespace trianglengin::cpp
     return game_over_;
   }
 
-  void GameStateCpp::force_game_over(const std::string &reason)
+  void GameStateCpp::force_game_over(GameOverReason reason, int detail)
   {
     if (!game_over_)
     {
       game_over_ = true;
       game_over_reason_ = reason;
-      valid_actions_cache_ = std::set<Action>();
+      game_over_detail_ = detail;
+      std::fill(valid_action_bits_.begin(), valid_action_bits_.end(), uint64_t{0});
+      num_valid_actions_ = 0;
+      action_cache_.publish();
     }
   }
 
@@ -215,77 +490,177 @@ namespace trianglengin::cpp
     return score_;
   }
 
-  const std::set<Action> &GameStateCpp::get_valid_actions(bool force_recalculate)
+  bool ActionCacheFlag::try_begin_fill() noexcept
   {
-    if (game_over_)
+    uint8_t expected = Stale;
+    return state_.compare_exchange_strong(expected, Filling, std::memory_order_acquire);
+  }
+
+  void ActionCacheFlag::wait_ready() const noexcept
+  {
+    while (!ready())
+      std::this_thread::yield();
+  }
+
+  std::size_t GameStateCpp::action_words(const EnvConfigCpp &config)
+  {
+    return (static_cast<std::size_t>(config.num_shape_slots) * config.rows * config.cols + 63) / 64;
+  }
+
+  const ActionBits &GameStateCpp::ensure_valid_actions() const
+  {
+    if (!action_cache_.ready())
     {
-      if (!valid_actions_cache_.has_value() || !valid_actions_cache_->empty())
+      if (action_cache_.try_begin_fill())
       {
-        valid_actions_cache_ = std::set<Action>();
+        // Mutations settle game_over_ eagerly (update_game_over_lazy), so
+        // filling the cache never changes anything but the cache itself
+        num_valid_actions_ = calculate_valid_actions_internal(valid_action_bits_);
+        action_cache_.publish();
+      }
+      else
+      {
+        action_cache_.wait_ready();
       }
-      return *valid_actions_cache_;
     }
+    return valid_action_bits_;
+  }
 
-    if (!force_recalculate && valid_actions_cache_.has_value())
+  std::vector<Action> GameStateCpp::get_valid_actions(bool force_recalculate)
+  {
+    std::vector<Action> valid_actions;
+    if (force_recalculate && !game_over_)
     {
-      return *valid_actions_cache_;
+      // Recomputed into a local set, leaving the shared cache untouched
+      ActionBits bits(action_words(*config_), 0);
+      valid_actions.reserve(calculate_valid_actions_internal(bits));
+      for_each_set_bit(std::as_const(bits), [&](Action action)
+                       { valid_actions.push_back(action); });
+      return valid_actions;
     }
+    valid_actions.reserve(num_valid_actions());
+    for_each_valid_action([&](Action action)
+                          { valid_actions.push_back(action); });
+    return valid_actions;
+  }
 
-    calculate_valid_actions_internal();
+  int GameStateCpp::num_valid_actions()
+  {
+    ensure_valid_actions();
+    return num_valid_actions_;
+  }
+
+  void GameStateCpp::fill_valid_action_mask(uint8_t *out)
+  {
+    std::fill(out, out + action_dim(), static_cast<uint8_t>(0));
+    for_each_valid_action([out](Action action)
+                          { out[action] = 1; });
+  }
 
-    if (!game_over_ && valid_actions_cache_->empty())
+  bool GameStateCpp::is_valid_action(Action action)
+  {
+    if (action < 0 || action >= action_dim())
+      return false;
+    const ActionBits &bits = ensure_valid_actions();
+    return (bits[action >> 6] >> (action & 63)) & 1u;
+  }
+
+  void GameStateCpp::fill_slot_template_ids(int8_t *out) const
+  {
+    const int num_templates = static_cast<int>(shape_logic::get_shape_templates().size());
+    for (std::size_t i = 0; i < shapes_.size(); ++i)
     {
-      force_game_over("No valid actions available.");
+      const int id = shapes_[i].has_value() ? shapes_[i]->footprint_id() : -1;
+      out[i] = static_cast<int8_t>(id < 0 ? -1 : (id < num_templates ? id : -2));
     }
+  }
 
-    return *valid_actions_cache_;
+  int GameStateCpp::action_dim() const
+  {
+    return config_->num_shape_slots * config_->rows * config_->cols;
   }
 
   void GameStateCpp::invalidate_action_cache()
   {
-    valid_actions_cache_ = std::nullopt;
+    action_cache_.invalidate();
   }
 
-  void GameStateCpp::calculate_valid_actions_internal() const
+  int GameStateCpp::calculate_valid_actions_internal(ActionBits &bits) const
   {
-    std::set<Action> valid_actions;
+    std::fill(bits.begin(), bits.end(), uint64_t{0});
+    if (game_over_)
+    {
+      return 0; // A finished game has no valid actions
+    }
+    int count = 0;
     for (int shape_idx = 0; shape_idx < static_cast<int>(shapes_.size()); ++shape_idx)
     {
       if (!shapes_[shape_idx].has_value())
         continue;
-      const ShapeCpp &shape = shapes_[shape_idx].value();
-      for (int r = 0; r < config_.rows; ++r)
-      {
-        for (int c = 0; c < config_.cols; ++c)
-        {
-          if (grid_logic::can_place(grid_data_, shape, r, c))
-          {
-            valid_actions.insert(encode_action(shape_idx, r, c));
-          }
-        }
-      }
+      // Actions of a slot are its flat anchors offset by the slot's block
+      const Action base = shape_idx * config_->rows * config_->cols;
+      grid_logic::for_each_fit(grid_data_, shapes_[shape_idx].value(), [&](int anchor)
+                               {
+        const Action action = base + anchor;
+        bits[action >> 6] |= uint64_t{1} << (action & 63);
+        ++count;
+        return true; });
     }
-    valid_actions_cache_ = std::move(valid_actions);
+    return count;
   }
 
   int GameStateCpp::get_current_step() const { return current_step_; }
   int GameStateCpp::get_last_cleared_triangles() const { return last_cleared_triangles_; } // Added implementation
-  std::optional<std::string> GameStateCpp::get_game_over_reason() const { return game_over_reason_; }
+  std::optional<std::string> GameStateCpp::get_game_over_reason() const
+  {
+    const std::string detail = std::to_string(game_over_detail_);
+    switch (game_over_reason_)
+    {
+    case GameOverReason::None:
+      return std::nullopt;
+    case GameOverReason::NoValidActions:
+      return "No valid actions available.";
+    case GameOverReason::InvalidAction:
+      return "Invalid action provided: " + detail;
+    case GameOverReason::DecodeFailed:
+      return "Failed to decode action: " + detail;
+    case GameOverReason::EmptySlot:
+      return "Action references invalid/empty shape slot: " + detail;
+    case GameOverReason::PlacementFailed:
+      return "Placement check failed for valid action (logic error?). Action: " + detail;
+    case GameOverReason::OutOfBounds:
+      return "Attempted placement out of bounds/death zone during execution. Action: " + detail;
+    }
+    return std::nullopt;
+  }
 
   GameStateCpp GameStateCpp::copy() const
   {
     return GameStateCpp(*this);
   }
 
+  bool GameStateCpp::has_inline_storage() const
+  {
+    return grid_data_.is_inline() && shapes_.is_inline() && valid_action_bits_.is_inline();
+  }
+
+  bool GameStateCpp::has_shared_storage() const
+  {
+    return grid_data_.is_shared() || shapes_.is_shared() || valid_action_bits_.is_shared();
+  }
+
+  void GameStateCpp::copy_from(const GameStateCpp &other)
+  {
+    // Member-wise assignment: inline buffers are copied flat, heap buffers are shared copy-on-write
+    *this = other;
+  }
+
   void GameStateCpp::debug_toggle_cell(int r, int c)
   {
     if (grid_data_.is_valid(r, c) && !grid_data_.is_death(r, c))
     {
-      auto &occupied_grid = grid_data_.get_occupied_grid_mut();
-      auto &color_grid = grid_data_.get_color_id_grid_mut();
-      bool was_occupied = occupied_grid[r][c];
-      occupied_grid[r][c] = !was_occupied;
-      color_grid[r][c] = was_occupied ? NO_COLOR_ID : DEBUG_COLOR_ID;
+      bool was_occupied = grid_data_.is_occupied(r, c);
+      grid_data_.set_cell(r, c, !was_occupied, was_occupied ? NO_COLOR_ID : DEBUG_COLOR_ID);
       last_cleared_triangles_ = 0; // Reset cleared count after manual toggle
       if (!was_occupied)
       {
@@ -293,8 +668,7 @@ namespace trianglengin::cpp
         auto clear_result = grid_logic::check_and_clear_lines(grid_data_, {{r, c}});
         last_cleared_triangles_ = static_cast<int>(std::get<1>(clear_result).size());
       }
-      invalidate_action_cache();
-      get_valid_actions(true);
+      update_game_over_lazy();
     }
   }
 
@@ -309,32 +683,31 @@ namespace trianglengin::cpp
     {
       shapes_[i] = std::nullopt;
     }
-    invalidate_action_cache();
-    get_valid_actions(true);
+    update_game_over_lazy();
   }
 
   Action GameStateCpp::encode_action(int shape_idx, int r, int c) const
   {
-    int grid_size = config_.rows * config_.cols;
-    if (shape_idx < 0 || shape_idx >= config_.num_shape_slots || r < 0 || r >= config_.rows || c < 0 || c >= config_.cols)
+    int grid_size = config_->rows * config_->cols;
+    if (shape_idx < 0 || shape_idx >= config_->num_shape_slots || r < 0 || r >= config_->rows || c < 0 || c >= config_->cols)
     {
       throw std::out_of_range("encode_action arguments out of range during valid action calculation.");
     }
-    return shape_idx * grid_size + r * config_.cols + c;
+    return shape_idx * grid_size + r * config_->cols + c;
   }
 
   std::tuple<int, int, int> GameStateCpp::decode_action(Action action) const
   {
-    int action_dim = config_.num_shape_slots * config_.rows * config_.cols;
+    int action_dim = config_->num_shape_slots * config_->rows * config_->cols;
     if (action < 0 || action >= action_dim)
     {
       throw std::out_of_range("Action index out of range: " + std::to_string(action));
     }
-    int grid_size = config_.rows * config_.cols;
+    int grid_size = config_->rows * config_->cols;
     int shape_idx = action / grid_size;
     int remainder = action % grid_size;
-    int r = remainder / config_.cols;
-    int c = remainder % config_.cols;
+    int r = remainder / config_->cols;
+    int c = remainder % config_->cols;
     return {shape_idx, r, c};
   }
 
@@ -4,6 +4,7 @@
 
 #pragma once
 
+#include <atomic>
 #include <vector>
 #include <set>
 #include <optional>
@@ -11,6 +12,7 @@
 #include <memory>
 #include <string> // Include string for optional<string>
 #include <tuple>  // Include tuple for std::tuple
+#include <utility>
 
 #include "config.h"
 #include "structs.h"
@@ -21,6 +23,61 @@
 
 namespace trianglengin::cpp
 {
+  // Inline capacities of the per-state buffers; the default config (3 slots,
+  // 360 actions) fits, so cloning a default state never allocates.
+  constexpr std::size_t kInlineShapeSlots = 4;
+  constexpr std::size_t kInlineActionWords = 8;
+
+  using ShapeSlots = SmallBuffer<std::optional<ShapeCpp>, kInlineShapeSlots>;
+  // Valid-action cache: bit (a % 64) of word (a / 64) is set if action a is valid
+  using ActionBits = SmallBuffer<uint64_t, kInlineActionWords>;
+
+  // Fill state of the lazily computed valid-action cache. Concurrent readers of
+  // one state race to fill it: the winner computes it and publishes it with a
+  // release store, the others wait for that. Mutations require exclusive
+  // access and simply mark the cache stale. Copyable so states stay copyable.
+  class ActionCacheFlag
+  {
+  public:
+    enum State : uint8_t
+    {
+      Stale,
+      Filling,
+      Ready,
+    };
+
+    ActionCacheFlag() noexcept : state_(Stale) {}
+    ActionCacheFlag(const ActionCacheFlag &other) noexcept : state_(other.ready() ? Ready : Stale) {}
+    ActionCacheFlag &operator=(const ActionCacheFlag &other) noexcept
+    {
+      state_.store(other.ready() ? Ready : Stale, std::memory_order_relaxed);
+      return *this;
+    }
+
+    bool ready() const noexcept { return state_.load(std::memory_order_acquire) == Ready; }
+    // True if the caller won the right to fill a stale cache and must publish()
+    bool try_begin_fill() noexcept;
+    // Blocks until another thread publishes the cache it is filling
+    void wait_ready() const noexcept;
+    void publish() noexcept { state_.store(Ready, std::memory_order_release); }
+    void invalidate() noexcept { state_.store(Stale, std::memory_order_relaxed); }
+
+  private:
+    std::atomic<uint8_t> state_;
+  };
+
+  // Why a game ended; the message is only formatted when requested
+  enum class GameOverReason : uint8_t
+  {
+    None,
+    NoValidActions,
+    InvalidAction,
+    DecodeFailed,
+    EmptySlot,
+    PlacementFailed,
+    OutOfBounds,
+  };
+
 
   class GameStateCpp
   {
@@ -36,43 +93,104 @@ namespace trianglengin::cpp
 
     void reset();
     std::tuple<double, bool> step(Action action);
+    StepInfo step_ex(Action action, bool record_cells = false);
+    // Outcomes of every valid action, computed in place without cloning the state
+    std::vector<ActionOutcome> evaluate_actions();
+    // (line index, action) pairs where the valid action completes the line
+    std::vector<std::pair<int, Action>> get_line_threats();
     bool is_over() const;
     double get_score() const;
-    const std::set<Action> &get_valid_actions(bool force_recalculate = false);
+    // Valid actions in ascending order
+    std::vector<Action> get_valid_actions(bool force_recalculate = false);
+    int num_valid_actions();
+    // Calls fn(action) for every valid action in ascending order, without allocating
+    // Safe to call from several threads on a state no thread is mutating
+    template <typename Fn>
+    void for_each_valid_action(Fn &&fn) const
+    {
+      for_each_set_bit(ensure_valid_actions(), std::forward<Fn>(fn));
+    }
+    // Writes a 0/1 flag for every encoded action into `out` (action_dim bytes)
+    void fill_valid_action_mask(uint8_t *out);
+    // True if `action` is currently valid (answered from the valid-action cache)
+    bool is_valid_action(Action action);
+    // Writes the template index of each slot into `out` (-1 if empty, -2 if not a template)
+    void fill_slot_template_ids(int8_t *out) const;
+    int action_dim() const;
     int get_current_step() const;
     int get_last_cleared_triangles() const; // Added getter
     std::optional<std::string> get_game_over_reason() const;
+    GameOverReason get_game_over_reason_code() const { return game_over_reason_; }
+    // Heap allocations made by the most recent step, or -1 if the module was
+    // built without allocation counting (see alloc_counter.h)
+    int get_last_step_allocations() const { return last_step_allocations_; }
     GameStateCpp copy() const; // Keep Python-facing copy method
+    // Overwrites this state with `other`, reusing this state's existing storage
+    void copy_from(const GameStateCpp &other);
     void debug_toggle_cell(int r, int c);
     void invalidate_action_cache(); // Moved to public
+    // True if copying this state is allocation-free (all buffers stored inline)
+    bool has_inline_storage() const;
+    // True if heap storage is still shared copy-on-write with a copy of this state
+    bool has_shared_storage() const;
     // Debug method to force shapes into slots
     void debug_set_shapes(const std::vector<std::optional<ShapeCpp>> &new_shapes);
 
     // Accessors needed by logic functions or bindings
     const GridData &get_grid_data() const { return grid_data_; }
     GridData &get_grid_data_mut() { return grid_data_; }
-    const std::vector<std::optional<ShapeCpp>> &get_shapes() const { return shapes_; }
-    std::vector<std::optional<ShapeCpp>> &get_shapes_mut() { return shapes_; }
-    const EnvConfigCpp &get_config() const { return config_; }
+    const ShapeSlots &get_shapes() const { return shapes_; }
+    ShapeSlots &get_shapes_mut() { return shapes_; }
+    const EnvConfigCpp &get_config() const { return *config_; }
+    const std::shared_ptr<const EnvConfigCpp> &get_config_ptr() const { return config_; }
     // Expose RNG state for copying if needed (or handle seeding in copy)
     std::mt19937 get_rng_state() const { return rng_; }
 
   private:
-    EnvConfigCpp config_;
+    GameStateCpp(const GameStateCpp &other, bool cache_ready);
+    // Number of 64-bit words in a valid-action bitset for `config`
+    static std::size_t action_words(const EnvConfigCpp &config);
+    template <typename Fn>
+    static void for_each_set_bit(const ActionBits &bits, Fn &&fn)
+    {
+      for (std::size_t w = 0; w < bits.size(); ++w)
+      {
+        for (uint64_t word = bits[w]; word != 0; word &= word - 1)
+        {
+          fn(static_cast<Action>(w * 64 + __builtin_ctzll(word)));
+        }
+      }
+    }
+
+    std::shared_ptr<const EnvConfigCpp> config_; // Shared between copies
     GridData grid_data_;
-    std::vector<std::optional<ShapeCpp>> shapes_;
+    ShapeSlots shapes_;
     double score_;
     int current_step_;
     int last_cleared_triangles_; // Added member
     bool game_over_;
-    std::optional<std::string> game_over_reason_;
-    mutable std::optional<std::set<Action>> valid_actions_cache_; // Mutable for const getter
+    GameOverReason game_over_reason_;
+    int game_over_detail_; // Action or slot index reported in the reason message
+    int last_step_allocations_;
+    // Lazily filled by readers, guarded by action_cache_ (see ActionCacheFlag)
+    mutable ActionBits valid_action_bits_;
+    mutable int num_valid_actions_;
+    mutable ActionCacheFlag action_cache_;
     std::mt19937 rng_;
 
     void check_initial_state_game_over();
-    void force_game_over(const std::string &reason);
+    void update_game_over_lazy();
+    bool has_any_valid_action() const;
+    static bool any_shape_fits(const GridData &grid, std::vector<const ShapeCpp *> &shapes);
+    bool is_action_valid(Action action) const;
+    void force_game_over(GameOverReason reason, int detail = 0);
     // void invalidate_action_cache(); // Moved from private
-    void calculate_valid_actions_internal() const; // Made const
+    // Writes the valid actions into `bits`; returns their count
+    int calculate_valid_actions_internal(ActionBits &bits) const;
+    const ActionBits &ensure_valid_actions() const;
+    void step_internal(Action action, StepInfo &info, bool record_cells);
+    void step_impl(Action action, StepInfo &info, bool record_cells);
+    void apply_invalid_step(GameOverReason reason, int detail, StepInfo &info);
 
     // Action encoding/decoding (can be private if only used internally)
     Action encode_action(int shape_idx, int r, int c) const;
@@ -15,18 +15,26 @@
 
 #include "config.h"
 #include "structs.h"
+#include "topology.h"
+#include "small_buffer.h"
 
 namespace trianglengin::cpp
 {
-  using Line = std::vector<Coord>;
-  using LineFs = std::set<Coord>;
-  using LineFsSet = std::set<LineFs>;
-  using CoordMap = std::map<Coord, LineFsSet>;
+  // Boards within kInlineCells cells (see topology.h) and kInlineLines lines
+  // keep all cell state inside the GridData object, so copying a grid is a
+  // flat copy without heap allocation. Larger boards fall back to heap
+  // storage transparently; heap buffers are shared copy-on-write, so copying
+  // a large grid defers the real copy until the first mutation.
+  constexpr std::size_t kInlineLines = 64;
+
+  using OccupancyBits = SmallBuffer<uint64_t, kInlineCellWords>;
+  using ColorIds = SmallBuffer<int8_t, kInlineCells>;
+  using LineFill = SmallBuffer<int, kInlineLines>;
 
   class GridData
   {
   public:
-    // Constructor takes config by const reference but stores by value
+    // Only the grid geometry of the config is used; it is shared via Topology
     explicit GridData(const EnvConfigCpp &config);
 
     void reset();
@@ -36,14 +44,39 @@ namespace trianglengin::cpp
     std::optional<int> get_color_id(int r, int c) const;
     bool is_up(int r, int c) const;
 
-    const std::vector<std::vector<bool>> &get_occupied_grid() const { return occupied_grid_; }
-    const std::vector<std::vector<int8_t>> &get_color_id_grid() const { return color_id_grid_; }
-    const std::vector<std::vector<bool>> &get_death_grid() const { return death_grid_; }
-    std::vector<std::vector<bool>> &get_occupied_grid_mut() { return occupied_grid_; }
-    std::vector<std::vector<int8_t>> &get_color_id_grid_mut() { return color_id_grid_; }
-
-    const std::vector<Line> &get_lines() const { return lines_; }
-    const CoordMap &get_coord_to_lines_map() const { return coord_to_lines_map_; }
+    // Unchecked accessors by flat cell index (r * cols + c)
+    bool is_occupied_flat(int idx) const { return (occupied_bits_[idx >> 6] >> (idx & 63)) & 1u; }
+    int8_t get_color_id_flat(int idx) const { return color_ids_[idx]; }
+    // Occupancy bitboard: bit (idx % 64) of word (idx / 64) is flat cell idx
+    const OccupancyBits &get_occupied_bits() const { return occupied_bits_; }
+    // Writes (rows * cols + 7) / 8 bytes: bit (idx % 8) of byte (idx / 8) is flat cell idx
+    void pack_occupancy(uint8_t *out) const;
+    const std::vector<std::vector<bool>> &get_death_grid() const { return topology_->death_grid; }
+    // Sets a cell's occupancy and color, keeping the per-line fill counters in sync
+    void set_cell(int r, int c, bool occupied, int8_t color_id);
+    // Unchecked variant taking a flat cell index (r * cols + c)
+    void set_cell_flat(int idx, bool occupied, int8_t color_id);
+
+    const std::vector<Line> &get_lines() const { return topology_->lines; }
+    const CoordMap &get_coord_to_lines_map() const { return topology_->coord_to_lines_map; }
+    // Shared, immutable geometry (death cells, lines) of this grid
+    const std::shared_ptr<const Topology> &topology() const { return topology_; }
+
+    // Line membership by index: flat cell indices (r * cols + c) of each line,
+    // and the indices of the lines through each flat cell
+    const std::vector<std::vector<int>> &get_line_cells() const { return topology_->line_cells; }
+    const std::vector<int> &get_cell_lines(int r, int c) const { return topology_->cell_lines[r * cols_ + c]; }
+    // Number of occupied cells in each line, maintained incrementally
+    const LineFill &get_line_fill() const { return line_fill_; }
+    bool is_line_complete(int line_idx) const
+    {
+      return line_fill_[line_idx] == static_cast<int>(topology_->line_cells[line_idx].size());
+    }
+
+    // True if all cell state is stored inline (board within the inline limits)
+    bool is_inline() const { return occupied_bits_.is_inline() && color_ids_.is_inline() && line_fill_.is_inline(); }
+    // True if any heap cell buffer is still shared with a copy (copy-on-write)
+    bool is_shared() const { return occupied_bits_.is_shared() || color_ids_.is_shared() || line_fill_.is_shared(); }
 
     int rows() const { return rows_; }
     int cols() const { return cols_; }
@@ -57,19 +90,12 @@ namespace trianglengin::cpp
     GridData &operator=(GridData &&other) noexcept = default;
 
   private:
-    EnvConfigCpp config_; // Store config by value now
     int rows_;
     int cols_;
-    std::vector<std::vector<bool>> occupied_grid_;
-    std::vector<std::vector<int8_t>> color_id_grid_;
-    std::vector<std::vector<bool>> death_grid_;
-
-    std::vector<Line> lines_;
-    CoordMap coord_to_lines_map_;
-
-    void precompute_lines();
-    bool is_live(int r, int c) const;
-    std::optional<Coord> get_neighbor(int r, int c, const std::string &direction, bool backward) const;
+    OccupancyBits occupied_bits_;
+    ColorIds color_ids_;
+    std::shared_ptr<const Topology> topology_;
+    LineFill line_fill_;
   };
 
 } // namespace trianglengin::cpp
@@ -1,18 +1,34 @@
 
 #include "grid_logic.h"
 #include <stdexcept> // For potential errors, though can_place returns bool
+#include <algorithm>
 
 namespace trianglengin::cpp::grid_logic
 {
 
   bool can_place(const GridData &grid_data, const ShapeCpp &shape, int r, int c)
   {
-    if (shape.triangles.empty())
+    if (shape.triangles().empty())
     {
       return false; // Cannot place an empty shape
     }
 
-    for (const auto &tri_data : shape.triangles)
+    // Fast path: precomputed placement mask for templates on small boards
+    const PlacementTable &table = grid_data.topology()->placements;
+    if (table.covers(shape.footprint_id()) && grid_data.is_valid(r, c))
+    {
+      const std::size_t entry = static_cast<std::size_t>(shape.footprint_id()) * table.num_cells + r * grid_data.cols() + c;
+      if (!table.placeable[entry])
+      {
+        return false;
+      }
+      const uint64_t *occupied = grid_data.get_occupied_bits().data();
+      const uint64_t *mask = &table.masks[entry * table.words];
+      return table.words == 1 ? detail::mask_fits<1>(occupied, mask)
+                              : detail::mask_fits<kInlineCellWords>(occupied, mask);
+    }
+
+    for (const auto &tri_data : shape.triangles())
     {
       int dr, dc;
       bool shape_is_up;
@@ -50,76 +66,99 @@ namespace trianglengin::cpp::grid_logic
     return true;
   }
 
-  std::tuple<int, std::set<Coord>, LineFsSet> check_and_clear_lines(
-      GridData &grid_data,
+  void can_place_many(const GridData &grid_data, const ShapeCpp &shape,
+                      const int32_t *rows, const int32_t *cols, size_t count, uint8_t *out)
+  {
+    for (size_t i = 0; i < count; ++i)
+    {
+      out[i] = can_place(grid_data, shape, rows[i], cols[i]) ? 1 : 0;
+    }
+  }
+
+  std::tuple<int, std::set<Coord>, std::vector<int>> find_completed_lines(
+      const GridData &grid_data,
       const std::set<Coord> &newly_occupied_coords)
   {
+    std::vector<int> completed_lines;
+    std::set<Coord> coords_to_clear;
     if (newly_occupied_coords.empty())
     {
-      return {0, {}, {}};
+      return {0, coords_to_clear, completed_lines};
     }
 
-    const auto &coord_map = grid_data.get_coord_to_lines_map();
-    LineFsSet candidate_lines;
+    // Only lines through a newly occupied coord can have become complete;
+    // the fill counters make each completion check O(1).
+    for (const auto &[r, c] : newly_occupied_coords)
+    {
+      for (int line_idx : grid_data.get_cell_lines(r, c))
+      {
+        if (grid_data.is_line_complete(line_idx) &&
+            std::find(completed_lines.begin(), completed_lines.end(), line_idx) == completed_lines.end())
+        {
+          completed_lines.push_back(line_idx);
+        }
+      }
+    }
 
-    // 1. Find all maximal lines potentially affected by the new placements
-    for (const auto &coord : newly_occupied_coords)
+    const int cols = grid_data.cols();
+    for (int line_idx : completed_lines)
     {
-      auto it = coord_map.find(coord);
-      if (it != coord_map.end())
+      for (int cell : grid_data.get_line_cells()[line_idx])
       {
-        // Add all lines associated with this coordinate to the candidates
-        candidate_lines.insert(it->second.begin(), it->second.end());
+        coords_to_clear.insert({cell / cols, cell % cols});
       }
     }
 
-    LineFsSet lines_to_clear;
-    std::set<Coord> coords_to_clear;
+    return {static_cast<int>(completed_lines.size()), coords_to_clear, completed_lines};
+  }
 
-    // 2. Check each candidate line for completion
-    for (const auto &line_fs : candidate_lines)
+  std::tuple<int, std::set<Coord>, std::vector<int>> check_and_clear_lines(
+      GridData &grid_data,
+      const std::set<Coord> &newly_occupied_coords)
+  {
+    auto [lines_cleared, coords_to_clear, completed_lines] =
+        find_completed_lines(grid_data, newly_occupied_coords);
+
+    for (const auto &[r, c] : coords_to_clear)
     {
-      if (line_fs.size() < 2)
-        continue; // Should not happen based on precomputation filter
+      grid_data.set_cell(r, c, false, NO_COLOR_ID);
+    }
 
-      bool line_complete = true;
-      for (const auto &coord : line_fs)
+    return {lines_cleared, coords_to_clear, completed_lines};
+  }
+
+  int clear_completed_lines(GridData &grid_data, const std::vector<int> &placed_cells,
+                            std::vector<int> &completed_lines, std::vector<int> &cleared_cells)
+  {
+    completed_lines.clear();
+    cleared_cells.clear();
+    const int cols = grid_data.cols();
+    for (int cell : placed_cells)
+    {
+      for (int line_idx : grid_data.get_cell_lines(cell / cols, cell % cols))
       {
-        // A line is complete if ALL its coordinates are occupied
-        if (!grid_data.is_occupied(std::get<0>(coord), std::get<1>(coord)))
+        if (grid_data.is_line_complete(line_idx) &&
+            std::find(completed_lines.begin(), completed_lines.end(), line_idx) == completed_lines.end())
         {
-          line_complete = false;
-          break;
+          completed_lines.push_back(line_idx);
         }
       }
-
-      if (line_complete)
-      {
-        lines_to_clear.insert(line_fs);
-        // Add coordinates from this completed line to the set to be cleared
-        coords_to_clear.insert(line_fs.begin(), line_fs.end());
-      }
     }
-
-    // 3. Clear the identified coordinates
-    if (!coords_to_clear.empty())
+    // Completion is decided before clearing; a cell shared by two completed
+    // lines is already empty when the second line reaches it.
+    for (int line_idx : completed_lines)
     {
-      auto &occupied_grid = grid_data.get_occupied_grid_mut();
-      auto &color_grid = grid_data.get_color_id_grid_mut();
-      for (const auto &coord : coords_to_clear)
+      for (int cell : grid_data.get_line_cells()[line_idx])
       {
-        int r = std::get<0>(coord);
-        int c = std::get<1>(coord);
-        // Ensure we don't try to clear out-of-bounds (shouldn't happen)
-        if (grid_data.is_valid(r, c))
+        if (grid_data.is_occupied_flat(cell))
         {
-          occupied_grid[r][c] = false;
-          color_grid[r][c] = NO_COLOR_ID;
+          grid_data.set_cell_flat(cell, false, NO_COLOR_ID);
+          cleared_cells.push_back(cell);
         }
       }
     }
-
-    return {static_cast<int>(lines_to_clear.size()), coords_to_clear, lines_to_clear};
+    std::sort(cleared_cells.begin(), cleared_cells.end());
+    return static_cast<int>(completed_lines.size());
   }
 
-} // namespace trianglengin::cpp::grid_logic
\ No newline at end of file
+} // namespace trianglengin::cpp::grid_logic
@@ -7,6 +7,7 @@
 #include <set>
 #include <tuple>
 #include <vector>
+#include <cstdint>
 
 #include "grid_data.h" // Needs GridData definition
 #include "structs.h"   // Needs ShapeCpp, Coord, LineFsSet definitions
@@ -21,9 +22,83 @@ namespace trianglengin::cpp
   {
     bool can_place(const GridData &grid_data, const ShapeCpp &shape, int r, int c);
 
-    std::tuple<int, std::set<Coord>, LineFsSet>
+    namespace detail
+    {
+      // Fixed word count lets the compiler fully unroll the overlap test
+      template <std::size_t W>
+      inline bool mask_fits(const uint64_t *occupied, const uint64_t *mask)
+      {
+        uint64_t overlap = 0;
+        for (std::size_t w = 0; w < W; ++w)
+        {
+          overlap |= occupied[w] & mask[w];
+        }
+        return overlap == 0;
+      }
+
+      template <std::size_t W, typename Fn>
+      bool scan_table(const PlacementTable &table, const uint64_t *occupied, int footprint_id, Fn &fn)
+      {
+        const std::size_t base = static_cast<std::size_t>(footprint_id) * table.num_cells;
+        for (int anchor = 0; anchor < table.num_cells; ++anchor)
+        {
+          const std::size_t entry = base + anchor;
+          if (table.placeable[entry] && mask_fits<W>(occupied, &table.masks[entry * W]) && !fn(anchor))
+          {
+            return false;
+          }
+        }
+        return true;
+      }
+    } // namespace detail
+
+    // Calls fn(anchor) with the flat index (r * cols + c) of every anchor where
+    // `shape` fits, in ascending order, until fn returns false. Returns false
+    // if stopped early. Predefined templates on small boards use the
+    // precomputed placement masks of the topology.
+    template <typename Fn>
+    bool for_each_fit(const GridData &grid_data, const ShapeCpp &shape, Fn &&fn)
+    {
+      const PlacementTable &table = grid_data.topology()->placements;
+      const int footprint_id = shape.footprint_id();
+      if (table.covers(footprint_id))
+      {
+        const uint64_t *occupied = grid_data.get_occupied_bits().data();
+        return table.words == 1
+                   ? detail::scan_table<1>(table, occupied, footprint_id, fn)
+                   : detail::scan_table<kInlineCellWords>(table, occupied, footprint_id, fn);
+      }
+      const int cols = grid_data.cols();
+      const int num_cells = grid_data.rows() * cols;
+      for (int anchor = 0; anchor < num_cells; ++anchor)
+      {
+        if (can_place(grid_data, shape, anchor / cols, anchor % cols) && !fn(anchor))
+        {
+          return false;
+        }
+      }
+      return true;
+    }
+
+    // Tests `count` anchors (rows[i], cols[i]) for `shape`, writing 1/0 to out[i].
+    void can_place_many(const GridData &grid_data, const ShapeCpp &shape,
+                        const int32_t *rows, const int32_t *cols, size_t count, uint8_t *out);
+
+    // Finds the lines completed by newly occupied coords without modifying the grid.
+    // Returns (number of lines, coords to clear, completed line indices).
+    std::tuple<int, std::set<Coord>, std::vector<int>>
+    find_completed_lines(const GridData &grid_data, const std::set<Coord> &newly_occupied_coords);
+
+    std::tuple<int, std::set<Coord>, std::vector<int>>
     check_and_clear_lines(GridData &grid_data, const std::set<Coord> &newly_occupied_coords);
 
+    // Allocation-free variant used by the step path. Clears every line completed
+    // through the newly occupied flat cells; writes the completed line indices and
+    // the cleared flat cells (unique, ascending) into the caller's buffers, which
+    // are cleared first and keep their capacity. Returns the number of lines.
+    int clear_completed_lines(GridData &grid_data, const std::vector<int> &placed_cells,
+                              std::vector<int> &completed_lines, std::vector<int> &cleared_cells);
+
   } // namespace grid_logic
 } // namespace trianglengin::cpp
 
@@ -0,0 +1,85 @@
+// File: src/trianglengin/cpp/observation.cpp
+#include "observation.h"
+#include "game_state.h"
+#include "grid_data.h"
+#include "grid_logic.h"
+#include "shape_logic.h"
+#include <algorithm>
+
+namespace trianglengin::cpp::observation
+{
+
+  int num_channels(const EnvConfigCpp &config)
+  {
+    return 2 + config.num_shape_slots;
+  }
+
+  void encode(GameStateCpp &state, float *out)
+  {
+    const auto &config = state.get_config();
+    const int plane_size = config.rows * config.cols;
+    std::fill(out, out + num_channels(config) * plane_size, 0.0f);
+
+    const auto &grid_data = state.get_grid_data();
+    const auto &death_grid = grid_data.get_death_grid();
+    float *occupied_plane = out;
+    float *death_plane = out + plane_size;
+    for (int r = 0; r < config.rows; ++r)
+    {
+      for (int c = 0; c < config.cols; ++c)
+      {
+        occupied_plane[r * config.cols + c] = grid_data.is_occupied_flat(r * config.cols + c) ? 1.0f : 0.0f;
+        death_plane[r * config.cols + c] = death_grid[r][c] ? 1.0f : 0.0f;
+      }
+    }
+
+    // Encoded actions are laid out exactly like the per-slot anchor planes
+    float *anchor_planes = out + 2 * plane_size;
+    state.for_each_valid_action([anchor_planes](Action action)
+                                { anchor_planes[action] = 1.0f; });
+  }
+
+  void encode_board(GridData &grid, int num_slots, const uint8_t *packed, const int8_t *slot_ids,
+                    float *obs_out, uint8_t *mask_out)
+  {
+    const int plane_size = grid.rows() * grid.cols();
+    const int num_templates = static_cast<int>(shape_logic::get_shape_templates().size());
+    grid.reset();
+    for (int idx = 0; idx < plane_size; ++idx)
+    {
+      if ((packed[idx >> 3] >> (idx & 7)) & 1u)
+        grid.set_cell_flat(idx, true, static_cast<int8_t>(DEBUG_COLOR_ID));
+    }
+
+    if (obs_out)
+    {
+      std::fill(obs_out, obs_out + (2 + num_slots) * plane_size, 0.0f);
+      const auto &death_grid = grid.get_death_grid();
+      for (int idx = 0; idx < plane_size; ++idx)
+      {
+        obs_out[idx] = grid.is_occupied_flat(idx) ? 1.0f : 0.0f;
+        obs_out[plane_size + idx] = death_grid[idx / grid.cols()][idx % grid.cols()] ? 1.0f : 0.0f;
+      }
+    }
+    if (mask_out)
+      std::fill(mask_out, mask_out + num_slots * plane_size, uint8_t{0});
+
+    for (int slot = 0; slot < num_slots; ++slot)
+    {
+      const int template_idx = slot_ids[slot];
+      if (template_idx < 0 || template_idx >= num_templates)
+        continue;
+      const ShapeCpp shape(shape_logic::template_footprint(static_cast<size_t>(template_idx)), ColorCpp{}, template_idx);
+      float *anchor_plane = obs_out ? obs_out + (2 + slot) * plane_size : nullptr;
+      uint8_t *slot_mask = mask_out ? mask_out + slot * plane_size : nullptr;
+      grid_logic::for_each_fit(grid, shape, [&](int anchor)
+                               {
+        if (anchor_plane)
+          anchor_plane[anchor] = 1.0f;
+        if (slot_mask)
+          slot_mask[anchor] = 1;
+        return true; });
+    }
+  }
+
+} // namespace trianglengin::cpp::observation
@@ -0,0 +1,36 @@
+// File: src/trianglengin/cpp/observation.h
+#ifndef TRIANGLENGIN_CPP_OBSERVATION_H
+#define TRIANGLENGIN_CPP_OBSERVATION_H
+
+#pragma once
+
+#include <cstdint>
+
+#include "config.h"
+
+namespace trianglengin::cpp
+{
+  class GameStateCpp;
+  class GridData;
+
+  namespace observation
+  {
+    // Planes: 0 = occupied, 1 = death, 2 + k = valid anchors of slot k
+    int num_channels(const EnvConfigCpp &config);
+
+    // Writes num_channels * rows * cols floats (C, H, W order) into `out`
+    void encode(GameStateCpp &state, float *out);
+
+    // Encodes a stored board: `packed` holds one occupancy bit per flat cell
+    // (bit idx % 8 of byte idx / 8) and `slot_ids` the template index of each
+    // of `num_slots` slots (negative = empty or not a template). `grid` is
+    // scratch storage with the board's geometry and is overwritten. Writes
+    // the observation planes into `obs_out` and the valid-action mask into
+    // `mask_out`; either may be null.
+    void encode_board(GridData &grid, int num_slots, const uint8_t *packed, const int8_t *slot_ids,
+                      float *obs_out, uint8_t *mask_out);
+
+  } // namespace observation
+} // namespace trianglengin::cpp
+
+#endif // TRIANGLENGIN_CPP_OBSERVATION_H
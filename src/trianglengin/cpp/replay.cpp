@@ -0,0 +1,50 @@
+// File: src/trianglengin/cpp/replay.cpp
+#include "replay.h"
+#include "game_state.h"
+#include "observation.h"
+#include <tuple>
+
+namespace trianglengin::cpp::replay
+{
+
+  Result run(const EnvConfigCpp &config, unsigned int seed, const int64_t *actions,
+             std::size_t count, const Outputs &out, bool verify)
+  {
+    GameStateCpp state(config, seed);
+    const std::size_t plane_size = static_cast<std::size_t>(config.rows) * config.cols;
+    const std::size_t board_bytes = (plane_size + 7) / 8;
+    const std::size_t num_slots = static_cast<std::size_t>(config.num_shape_slots);
+    const std::size_t action_dim = static_cast<std::size_t>(state.action_dim());
+    const std::size_t obs_size = static_cast<std::size_t>(observation::num_channels(config)) * plane_size;
+
+    Result result;
+    for (std::size_t t = 0; t < count && !state.is_over(); ++t)
+    {
+      // Values outside [0, action_dim) would be truncated by the cast; map them to -1 (illegal)
+      const bool in_range = actions[t] >= 0 && static_cast<uint64_t>(actions[t]) < action_dim;
+      const Action action = in_range ? static_cast<Action>(actions[t]) : -1;
+      if (verify && !state.is_valid_action(action))
+      {
+        result.invalid_step = static_cast<int>(t);
+        break;
+      }
+      if (out.boards)
+        state.get_grid_data().pack_occupancy(out.boards + t * board_bytes);
+      if (out.slots)
+        state.fill_slot_template_ids(out.slots + t * num_slots);
+      if (out.masks)
+        state.fill_valid_action_mask(out.masks + t * action_dim);
+      if (out.observations)
+        observation::encode(state, out.observations + t * obs_size);
+
+      const double reward = std::get<0>(state.step(action));
+      if (out.rewards)
+        out.rewards[t] = reward;
+      ++result.steps;
+    }
+    result.done = state.is_over();
+    result.score = state.get_score();
+    return result;
+  }
+
+} // namespace trianglengin::cpp::replay
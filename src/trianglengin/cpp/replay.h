@@ -0,0 +1,45 @@
+// File: src/trianglengin/cpp/replay.h
+#ifndef TRIANGLENGIN_CPP_REPLAY_H
+#define TRIANGLENGIN_CPP_REPLAY_H
+
+#pragma once
+
+#include <cstddef>
+#include <cstdint>
+
+#include "config.h"
+
+namespace trianglengin::cpp
+{
+  namespace replay
+  {
+    // Optional per-step outputs, each with one row per replayed action; null
+    // pointers are skipped. Board data is taken before the step's action.
+    struct Outputs
+    {
+      uint8_t *boards = nullptr;     // (rows * cols + 7) / 8 bytes, bit-packed occupancy
+      int8_t *slots = nullptr;       // num_shape_slots template ids (-1 empty, -2 not a template)
+      uint8_t *masks = nullptr;      // action_dim valid-action flags
+      float *observations = nullptr; // observation::num_channels * rows * cols planes
+      double *rewards = nullptr;     // reward of the step
+    };
+
+    struct Result
+    {
+      int steps = 0;         // Actions applied
+      int invalid_step = -1; // Index of the first illegal action, -1 if none
+      bool done = false;     // Whether the game is over after the last applied action
+      double score = 0.0;
+    };
+
+    // Rebuilds a game from `seed` by applying `actions` in order; actions outside
+    // [0, action_dim) are illegal. Stops at the first illegal action when
+    // `verify` is set (reported in invalid_step) and whenever the game ends, so
+    // rows past result.steps are left untouched.
+    Result run(const EnvConfigCpp &config, unsigned int seed, const int64_t *actions,
+               std::size_t count, const Outputs &out, bool verify);
+
+  } // namespace replay
+} // namespace trianglengin::cpp
+
+#endif // TRIANGLENGIN_CPP_REPLAY_H
@@ -0,0 +1,81 @@
+// File: src/trianglengin/cpp/sampling.cpp
+#include "sampling.h"
+#include <algorithm>
+#include <cmath>
+
+namespace trianglengin::cpp
+{
+
+  Action sample_from_logits(std::vector<std::pair<double, Action>> &candidates,
+                            double uniform, double temperature, int top_k)
+  {
+    if (candidates.empty())
+    {
+      return -1;
+    }
+
+    // Non-finite logits (NaN, +-inf) are treated as masked
+    const size_t finite = static_cast<size_t>(std::count_if(
+        candidates.begin(), candidates.end(),
+        [](const std::pair<double, Action> &c)
+        { return std::isfinite(c.first); }));
+    if (finite == 0)
+    {
+      // Nothing usable left: fall back to uniform over the valid actions
+      const auto index = std::min(static_cast<size_t>(uniform * static_cast<double>(candidates.size())),
+                                  candidates.size() - 1);
+      return candidates[index].second;
+    }
+    if (finite < candidates.size())
+    {
+      candidates.erase(std::remove_if(candidates.begin(), candidates.end(),
+                                      [](const std::pair<double, Action> &c)
+                                      { return !std::isfinite(c.first); }),
+                       candidates.end());
+    }
+
+    auto by_logit_desc = [](const std::pair<double, Action> &a, const std::pair<double, Action> &b)
+    {
+      // Ties are broken by the smaller action index for determinism
+      return a.first > b.first || (a.first == b.first && a.second < b.second);
+    };
+
+    if (temperature <= 0.0)
+    {
+      return std::min_element(candidates.begin(), candidates.end(), by_logit_desc)->second;
+    }
+
+    size_t count = candidates.size();
+    if (top_k > 0 && static_cast<size_t>(top_k) < count)
+    {
+      count = static_cast<size_t>(top_k);
+      std::partial_sort(candidates.begin(), candidates.begin() + count, candidates.end(), by_logit_desc);
+    }
+
+    double max_logit = candidates[0].first;
+    for (size_t i = 1; i < count; ++i)
+    {
+      max_logit = std::max(max_logit, candidates[i].first);
+    }
+
+    // Reuse the logit slot for the unnormalized probability
+    double total = 0.0;
+    for (size_t i = 0; i < count; ++i)
+    {
+      candidates[i].first = std::exp((candidates[i].first - max_logit) / temperature);
+      total += candidates[i].first;
+    }
+
+    double target = uniform * total;
+    for (size_t i = 0; i < count; ++i)
+    {
+      target -= candidates[i].first;
+      if (target < 0.0)
+      {
+        return candidates[i].second;
+      }
+    }
+    return candidates[count - 1].second; // Guard against rounding
+  }
+
+} // namespace trianglengin::cpp
@@ -0,0 +1,25 @@
+// File: src/trianglengin/cpp/sampling.h
+#ifndef TRIANGLENGIN_CPP_SAMPLING_H
+#define TRIANGLENGIN_CPP_SAMPLING_H
+
+#pragma once
+
+#include <vector>
+#include <utility>
+
+#include "structs.h"
+
+namespace trianglengin::cpp
+{
+  // Picks an action from (logit, action) candidates.
+  // temperature <= 0 selects the argmax; top_k > 0 restricts sampling to the
+  // k highest logits. `uniform` is a draw from [0, 1). Returns -1 if empty.
+  // Non-finite logits are masked out; if none are finite, the action is drawn
+  // uniformly from all candidates.
+  // The candidate vector is reordered in place.
+  Action sample_from_logits(std::vector<std::pair<double, Action>> &candidates,
+                            double uniform, double temperature, int top_k);
+
+} // namespace trianglengin::cpp
+
+#endif // TRIANGLENGIN_CPP_SAMPLING_H
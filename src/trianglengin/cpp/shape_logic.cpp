@@ -3,6 +3,9 @@
 #include "game_state.h" // Include full definition for implementation
 #include <stdexcept>
 #include <algorithm>
+#include <deque>
+#include <map>
+#include <mutex>
 
 namespace trianglengin::cpp::shape_logic
 {
@@ -47,9 +50,76 @@ namespace trianglengin::cpp::shape_logic
 
 } // namespace trianglengin::cpp::shape_logic
 
+namespace trianglengin::cpp
+{
+  namespace
+  {
+    // Owns every interned footprint; std::deque keeps their addresses stable
+    struct FootprintRegistry
+    {
+      std::mutex mutex;
+      std::deque<Footprint> footprints;
+      std::map<std::vector<TriangleData>, const Footprint *> index;
+      // Template footprints by template index; written only by the constructor,
+      // so it may be read without the lock while footprints grows
+      std::vector<const Footprint *> templates;
+
+      FootprintRegistry()
+      {
+        // Templates keep their index as id, even when two templates share cells
+        for (const auto &triangles : shape_logic::PREDEFINED_SHAPE_TEMPLATES_CPP)
+        {
+          footprints.push_back({static_cast<int>(footprints.size()), triangles});
+          index.emplace(triangles, &footprints.back());
+          templates.push_back(&footprints.back());
+        }
+      }
+    };
+
+    FootprintRegistry &footprint_registry()
+    {
+      static FootprintRegistry registry;
+      return registry;
+    }
+  } // namespace
+
+  const Footprint *intern_footprint(const std::vector<TriangleData> &triangles)
+  {
+    if (triangles.empty())
+    {
+      return nullptr;
+    }
+    auto &registry = footprint_registry();
+    std::lock_guard<std::mutex> lock(registry.mutex);
+    auto it = registry.index.find(triangles);
+    if (it != registry.index.end())
+    {
+      return it->second;
+    }
+    registry.footprints.push_back({static_cast<int>(registry.footprints.size()), triangles});
+    const Footprint *footprint = &registry.footprints.back();
+    registry.index.emplace(triangles, footprint);
+    return footprint;
+  }
+
+} // namespace trianglengin::cpp
+
 namespace trianglengin::cpp::shape_logic
 {
 
+  const std::vector<std::vector<TriangleData>> &get_shape_templates()
+  {
+    return PREDEFINED_SHAPE_TEMPLATES_CPP;
+  }
+
+  const Footprint *template_footprint(size_t template_index)
+  {
+    // The template table is immutable after construction, unlike the
+    // footprints deque that intern_footprint appends to under the lock
+    static const std::vector<const Footprint *> &templates = footprint_registry().templates;
+    return templates.at(template_index);
+  }
+
   ShapeCpp generate_random_shape(
       std::mt19937 &rng,
       const std::vector<ColorCpp> &available_colors,
@@ -62,14 +132,24 @@ namespace trianglengin::cpp::shape_logic
 
     std::uniform_int_distribution<size_t> template_dist(0, PREDEFINED_SHAPE_TEMPLATES_CPP.size() - 1);
     size_t template_index = template_dist(rng);
-    const auto &chosen_template = PREDEFINED_SHAPE_TEMPLATES_CPP[template_index];
 
     std::uniform_int_distribution<size_t> color_dist(0, available_colors.size() - 1);
     size_t color_index = color_dist(rng);
     const auto &chosen_color = available_colors[color_index];
     int chosen_color_id = available_color_ids[color_index];
 
-    return ShapeCpp(chosen_template, chosen_color, chosen_color_id);
+    return ShapeCpp(template_footprint(template_index), chosen_color, chosen_color_id);
+  }
+
+  std::vector<ShapeCpp> generate_refill_shapes(std::mt19937 &rng, size_t count)
+  {
+    std::vector<ShapeCpp> shapes;
+    shapes.reserve(count);
+    for (size_t i = 0; i < count; ++i)
+    {
+      shapes.push_back(generate_random_shape(rng, SHAPE_COLORS_CPP, SHAPE_COLOR_IDS_CPP));
+    }
+    return shapes;
   }
 
   void refill_shape_slots(GameStateCpp &game_state, std::mt19937 &rng)
@@ -89,10 +169,10 @@ namespace trianglengin::cpp::shape_logic
       return;
 
     // Use the mutable getter to modify shapes
-    auto &shapes_ref = game_state.get_shapes_mut();
-    for (size_t i = 0; i < shapes_ref.size(); ++i)
+    // Draws in the same order as generate_refill_shapes, without a temporary vector
+    for (auto &slot : game_state.get_shapes_mut())
     {
-      shapes_ref[i] = generate_random_shape(rng, SHAPE_COLORS_CPP, SHAPE_COLOR_IDS_CPP);
+      slot = generate_random_shape(rng, SHAPE_COLORS_CPP, SHAPE_COLOR_IDS_CPP);
     }
     game_state.invalidate_action_cache();
   }
@@ -20,6 +20,15 @@ namespace trianglengin::cpp
   {
     std::vector<ShapeCpp> load_shape_templates();
 
+    // Triangle footprints of all predefined shape templates
+    const std::vector<std::vector<TriangleData>> &get_shape_templates();
+
+    // Interned footprint of a predefined template (its id equals the index)
+    const Footprint *template_footprint(size_t template_index);
+
+    // Draws `count` random shapes, advancing `rng` exactly as a refill would
+    std::vector<ShapeCpp> generate_refill_shapes(std::mt19937 &rng, size_t count);
+
     void refill_shape_slots(GameStateCpp &game_state, std::mt19937 &rng);
 
   } // namespace shape_logic
@@ -0,0 +1,143 @@
+// File: src/trianglengin/cpp/small_buffer.h
+#ifndef TRIANGLENGIN_CPP_SMALL_BUFFER_H
+#define TRIANGLENGIN_CPP_SMALL_BUFFER_H
+
+#pragma once
+
+#include <array>
+#include <vector>
+#include <atomic>
+#include <utility>
+#include <cstddef>
+#include <algorithm>
+
+namespace trianglengin::cpp
+{
+  // Fixed-size buffer with inline storage for up to N elements and a heap
+  // fallback for larger sizes. Buffers that fit inline live inside the owning
+  // object, so copying them is a flat copy with no allocation. Heap buffers
+  // are copy-on-write: copies share the heap block until one of them is
+  // accessed through a non-const accessor, which detaches it first.
+  // The block's reference count is read with acquire ordering before writing
+  // in place, so independent copies may be mutated from different threads.
+  template <typename T, std::size_t N>
+  class SmallBuffer
+  {
+  public:
+    SmallBuffer() = default;
+    SmallBuffer(std::size_t size, const T &value) { assign(size, value); }
+    SmallBuffer(const SmallBuffer &other) : size_(other.size_), inline_(other.inline_), heap_(other.heap_)
+    {
+      if (heap_)
+        heap_->refs.fetch_add(1, std::memory_order_relaxed);
+    }
+    SmallBuffer(SmallBuffer &&other) noexcept
+        : size_(other.size_), inline_(std::move(other.inline_)), heap_(std::exchange(other.heap_, nullptr))
+    {
+      other.size_ = 0;
+    }
+    SmallBuffer &operator=(const SmallBuffer &other)
+    {
+      if (this != &other)
+      {
+        if (other.heap_)
+          other.heap_->refs.fetch_add(1, std::memory_order_relaxed);
+        release();
+        size_ = other.size_;
+        inline_ = other.inline_;
+        heap_ = other.heap_;
+      }
+      return *this;
+    }
+    SmallBuffer &operator=(SmallBuffer &&other) noexcept
+    {
+      if (this != &other)
+      {
+        release();
+        size_ = std::exchange(other.size_, 0);
+        inline_ = std::move(other.inline_);
+        heap_ = std::exchange(other.heap_, nullptr);
+      }
+      return *this;
+    }
+    ~SmallBuffer() { release(); }
+
+    void assign(std::size_t size, const T &value)
+    {
+      size_ = size;
+      if (size <= N)
+      {
+        release();
+        std::fill_n(inline_.begin(), size, value);
+      }
+      else if (unique())
+      {
+        heap_->values.assign(size, value);
+      }
+      else
+      {
+        release();
+        heap_ = new HeapBlock{std::vector<T>(size, value)};
+      }
+    }
+
+    std::size_t size() const { return size_; }
+    bool empty() const { return size_ == 0; }
+    bool is_inline() const { return size_ <= N; }
+    // True if this buffer's heap block is shared with a copy (never for inline buffers)
+    bool is_shared() const { return !is_inline() && heap_ && !unique(); }
+    bool shares_storage_with(const SmallBuffer &other) const { return !is_inline() && heap_ == other.heap_; }
+
+    T *data()
+    {
+      if (is_inline())
+        return inline_.data();
+      detach();
+      return heap_->values.data();
+    }
+    const T *data() const { return is_inline() ? inline_.data() : heap_->values.data(); }
+    T &operator[](std::size_t i) { return data()[i]; }
+    const T &operator[](std::size_t i) const { return data()[i]; }
+
+    T *begin() { return data(); }
+    T *end() { return data() + size_; }
+    const T *begin() const { return data(); }
+    const T *end() const { return data() + size_; }
+
+  private:
+    struct HeapBlock
+    {
+      std::vector<T> values;
+      std::atomic<std::size_t> refs{1};
+    };
+
+    // True if this buffer is the block's only owner. The acquire load pairs
+    // with the release decrement of a copy that let go of the block, so that
+    // copy's reads happen before any in-place write made after this check.
+    bool unique() const { return heap_ && heap_->refs.load(std::memory_order_acquire) == 1; }
+
+    void detach()
+    {
+      if (!unique())
+      {
+        HeapBlock *copy = new HeapBlock{heap_->values};
+        release();
+        heap_ = copy;
+      }
+    }
+
+    void release()
+    {
+      if (heap_ && heap_->refs.fetch_sub(1, std::memory_order_acq_rel) == 1)
+        delete heap_;
+      heap_ = nullptr;
+    }
+
+    std::size_t size_ = 0;
+    std::array<T, N> inline_{};
+    HeapBlock *heap_ = nullptr;
+  };
+
+} // namespace trianglengin::cpp
+
+#endif // TRIANGLENGIN_CPP_SMALL_BUFFER_H
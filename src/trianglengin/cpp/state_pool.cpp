@@ -0,0 +1,223 @@
+// File: src/trianglengin/cpp/state_pool.cpp
+#include "state_pool.h"
+#include <new>
+#include <stdexcept>
+#include <string>
+
+namespace trianglengin::cpp
+{
+
+  StatePool::Pin::Pin(StatePool &pool, Handle handle) : pool_(pool), handle_(handle) {}
+
+  StatePool::Pin::~Pin()
+  {
+    pool_.unpin(handle_);
+  }
+
+  GameStateCpp &StatePool::Pin::state() const
+  {
+    std::lock_guard<std::mutex> lock(pool_.mutex_);
+    // The pin keeps the storage alive even if the state is released later
+    return pool_.get_locked(handle_);
+  }
+
+  bool StatePool::Pin::valid() const
+  {
+    std::lock_guard<std::mutex> lock(pool_.mutex_);
+    return pool_.is_live_locked(handle_);
+  }
+
+  StatePool::StatePool(size_t slab_size) : slab_size_(slab_size)
+  {
+    if (slab_size_ == 0)
+    {
+      throw std::invalid_argument("slab_size must be positive.");
+    }
+  }
+
+  StatePool::~StatePool()
+  {
+    for (size_t index = 0; index < slots_.size(); ++index)
+    {
+      if (slots_[index].state != SlotState::Free)
+      {
+        slot_ptr(static_cast<uint32_t>(index))->~GameStateCpp();
+      }
+    }
+  }
+
+  GameStateCpp *StatePool::slot_ptr(uint32_t index)
+  {
+    Slot &slot = slabs_[index / slab_size_][index % slab_size_];
+    return std::launder(reinterpret_cast<GameStateCpp *>(slot.bytes));
+  }
+
+  uint32_t StatePool::acquire()
+  {
+    if (free_list_.empty())
+    {
+      // Add a slab; its slots are handed out in ascending order
+      const auto first = static_cast<uint32_t>(capacity_locked());
+      slabs_.push_back(std::make_unique<Slot[]>(slab_size_));
+      slots_.resize(capacity_locked());
+      for (size_t i = slab_size_; i-- > 0;)
+      {
+        free_list_.push_back(first + static_cast<uint32_t>(i));
+      }
+    }
+    uint32_t index = free_list_.back();
+    free_list_.pop_back();
+    return index;
+  }
+
+  StatePool::Handle StatePool::clone(const GameStateCpp &src)
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return clone_locked(src);
+  }
+
+  StatePool::Handle StatePool::clone_locked(const GameStateCpp &src)
+  {
+    uint32_t index = acquire();
+    try
+    {
+      ::new (static_cast<void *>(slabs_[index / slab_size_][index % slab_size_].bytes)) GameStateCpp(src);
+    }
+    catch (...)
+    {
+      free_list_.push_back(index);
+      throw;
+    }
+    SlotInfo &info = slots_[index];
+    info.state = SlotState::Live;
+    ++live_count_;
+    return (static_cast<Handle>(info.generation) << 32) | index;
+  }
+
+  StatePool::Handle StatePool::clone(Handle src)
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    // Resolve the source first: acquiring may add a slab but never moves states
+    return clone_locked(get_locked(src));
+  }
+
+  bool StatePool::is_live_locked(Handle handle) const
+  {
+    const uint32_t index = slot_index(handle);
+    return index < slots_.size() && slots_[index].state == SlotState::Live &&
+           slots_[index].generation == generation(handle);
+  }
+
+  GameStateCpp &StatePool::get(Handle handle)
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return get_locked(handle);
+  }
+
+  GameStateCpp &StatePool::get_locked(Handle handle)
+  {
+    if (!is_live_locked(handle))
+    {
+      throw std::out_of_range("Invalid state pool handle: " + std::to_string(handle));
+    }
+    return *slot_ptr(slot_index(handle));
+  }
+
+  std::unique_ptr<StatePool::Pin> StatePool::pin(Handle handle)
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    get_locked(handle); // Validate
+    ++slots_[slot_index(handle)].pins;
+    return std::unique_ptr<Pin>(new Pin(*this, handle));
+  }
+
+  void StatePool::unpin(Handle handle)
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    const uint32_t index = slot_index(handle);
+    SlotInfo &info = slots_[index];
+    if (--info.pins == 0 && info.state == SlotState::Released)
+    {
+      destroy_locked(index);
+    }
+  }
+
+  void StatePool::release(Handle handle)
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    get_locked(handle); // Validate
+    release_locked(slot_index(handle));
+  }
+
+  void StatePool::release_locked(uint32_t index)
+  {
+    SlotInfo &info = slots_[index];
+    ++info.generation;
+    --live_count_;
+    if (info.pins > 0)
+    {
+      info.state = SlotState::Released;
+    }
+    else
+    {
+      destroy_locked(index);
+    }
+  }
+
+  void StatePool::destroy_locked(uint32_t index)
+  {
+    slot_ptr(index)->~GameStateCpp();
+    slots_[index].state = SlotState::Free;
+    free_list_.push_back(index);
+  }
+
+  void StatePool::clear()
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    clear_locked();
+  }
+
+  void StatePool::clear_locked()
+  {
+    for (size_t index = 0; index < slots_.size(); ++index)
+    {
+      SlotInfo &info = slots_[index];
+      if (info.state == SlotState::Live)
+      {
+        ++info.generation;
+        if (info.pins > 0)
+        {
+          info.state = SlotState::Released;
+        }
+        else
+        {
+          slot_ptr(static_cast<uint32_t>(index))->~GameStateCpp();
+          info.state = SlotState::Free;
+        }
+      }
+    }
+    // Rebuild the free list so slots are handed out in ascending order again
+    free_list_.clear();
+    for (size_t index = slots_.size(); index-- > 0;)
+    {
+      if (slots_[index].state == SlotState::Free)
+      {
+        free_list_.push_back(static_cast<uint32_t>(index));
+      }
+    }
+    live_count_ = 0;
+  }
+
+  size_t StatePool::size() const
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return live_count_;
+  }
+
+  size_t StatePool::capacity() const
+  {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return capacity_locked();
+  }
+
+} // namespace trianglengin::cpp
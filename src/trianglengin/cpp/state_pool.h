@@ -0,0 +1,121 @@
+// File: src/trianglengin/cpp/state_pool.h
+#ifndef TRIANGLENGIN_CPP_STATE_POOL_H
+#define TRIANGLENGIN_CPP_STATE_POOL_H
+
+#pragma once
+
+#include <vector>
+#include <memory>
+#include <mutex>
+#include <cstdint>
+
+#include "game_state.h"
+
+namespace trianglengin::cpp
+{
+  // Arena of game states allocated from contiguous slabs and addressed by
+  // handle. Released slots are reused; clear() releases everything at once
+  // while keeping the slabs. States within the inline small-board limits are
+  // cloned into a pool without touching the heap once the slabs exist.
+  // A handle carries its slot's generation, which is bumped whenever the slot
+  // is released, so stale handles are rejected instead of aliasing the slot's
+  // next occupant. Pool operations are serialized by an internal mutex so
+  // threads may share a pool; the states themselves follow the GameStateCpp
+  // threading rules.
+  class StatePool
+  {
+  public:
+    // Slot index in the low 32 bits, slot generation in the high 32 bits
+    using Handle = uint64_t;
+
+    // Keeps a pooled state's storage alive while it is referenced from outside
+    // the pool. Releasing a pinned state invalidates its handle at once, but
+    // destroys the state only when the last pin goes away, so a reference
+    // obtained through state() never dangles. The pin must not outlive its pool.
+    class Pin
+    {
+    public:
+      ~Pin();
+      Pin(const Pin &) = delete;
+      Pin &operator=(const Pin &) = delete;
+
+      // Throws std::out_of_range once the handle has been released
+      GameStateCpp &state() const;
+      bool valid() const;
+      Handle handle() const { return handle_; }
+
+    private:
+      friend class StatePool;
+      Pin(StatePool &pool, Handle handle);
+
+      StatePool &pool_;
+      Handle handle_;
+    };
+
+    explicit StatePool(size_t slab_size = 1024);
+    ~StatePool();
+    StatePool(const StatePool &) = delete;
+    StatePool &operator=(const StatePool &) = delete;
+
+    // Copies `src` into a free slot and returns its handle
+    Handle clone(const GameStateCpp &src);
+    Handle clone(Handle src);
+    // Throws std::out_of_range for handles that are not live. The reference is
+    // unguarded once this returns; use pin() if another thread may release it.
+    GameStateCpp &get(Handle handle);
+    std::unique_ptr<Pin> pin(Handle handle);
+    void release(Handle handle);
+    // Destroys all live states (pinned ones once unpinned); slabs are kept
+    void clear();
+
+    size_t size() const;
+    size_t capacity() const;
+    size_t slab_size() const { return slab_size_; }
+
+  private:
+    struct alignas(GameStateCpp) Slot
+    {
+      unsigned char bytes[sizeof(GameStateCpp)];
+    };
+
+    enum class SlotState : uint8_t
+    {
+      Free,
+      Live,
+      Released // Released while pinned; destroyed by the last unpin
+    };
+
+    struct SlotInfo
+    {
+      uint32_t generation = 0;
+      uint32_t pins = 0;
+      SlotState state = SlotState::Free;
+    };
+
+    static uint32_t slot_index(Handle handle) { return static_cast<uint32_t>(handle); }
+    static uint32_t generation(Handle handle) { return static_cast<uint32_t>(handle >> 32); }
+
+    GameStateCpp *slot_ptr(uint32_t index);
+    // Helpers below expect mutex_ to be held
+    uint32_t acquire();
+    Handle clone_locked(const GameStateCpp &src);
+    bool is_live_locked(Handle handle) const;
+    GameStateCpp &get_locked(Handle handle);
+    // Bumps the slot's generation and destroys it unless pinned
+    void release_locked(uint32_t index);
+    void destroy_locked(uint32_t index);
+    void unpin(Handle handle);
+    void clear_locked();
+    size_t capacity_locked() const { return slabs_.size() * slab_size_; }
+
+    mutable std::mutex mutex_;
+    size_t slab_size_;
+    std::vector<std::unique_ptr<Slot[]>> slabs_;
+    std::vector<SlotInfo> slots_;
+    std::vector<uint32_t> free_list_;
+    size_t live_count_ = 0;
+  };
+
+} // namespace trianglengin::cpp
+
+#endif // TRIANGLENGIN_CPP_STATE_POOL_H
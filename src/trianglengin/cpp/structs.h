@@ -22,22 +22,72 @@ namespace trianglengin::cpp
   const int NO_COLOR_ID = -1;
   const int DEBUG_COLOR_ID = -2;
 
-  struct ShapeCpp
+  // Immutable triangle footprint, interned so that equal footprints share one
+  // instance. The predefined templates are interned first, so a template's
+  // index in shape_logic::get_shape_templates() is also its footprint id.
+  struct Footprint
   {
+    int id;
     std::vector<TriangleData> triangles;
+  };
+
+  // Returns the interned footprint for `triangles` (thread-safe), or nullptr if empty
+  const Footprint *intern_footprint(const std::vector<TriangleData> &triangles);
+
+  // A shape refers to its interned footprint, so copying a shape never allocates
+  struct ShapeCpp
+  {
+    const Footprint *footprint;
     ColorCpp color;
     int color_id;
 
-    ShapeCpp() : color_id(NO_COLOR_ID) {}
-    ShapeCpp(std::vector<TriangleData> tris, ColorCpp c, int id)
-        : triangles(std::move(tris)), color(c), color_id(id) {}
+    ShapeCpp() : footprint(nullptr), color_id(NO_COLOR_ID) {}
+    ShapeCpp(const std::vector<TriangleData> &tris, ColorCpp c, int id)
+        : footprint(intern_footprint(tris)), color(c), color_id(id) {}
+    ShapeCpp(const Footprint *fp, ColorCpp c, int id)
+        : footprint(fp), color(c), color_id(id) {}
+
+    const std::vector<TriangleData> &triangles() const
+    {
+      static const std::vector<TriangleData> empty;
+      return footprint ? footprint->triangles : empty;
+    }
+    // Footprint id (the template index for predefined shapes), -1 if empty
+    int footprint_id() const { return footprint ? footprint->id : -1; }
 
     bool operator==(const ShapeCpp &other) const
     {
-      return triangles == other.triangles && color == other.color && color_id == other.color_id;
+      return (footprint == other.footprint || triangles() == other.triangles()) &&
+             color == other.color && color_id == other.color_id;
     }
   };
 
+  // Summary of a single step, filled by GameStateCpp::step_ex
+  struct StepInfo
+  {
+    double reward = 0.0;
+    bool done = false;
+    int placed_count = 0;
+    int cleared_count = 0;
+    int lines_cleared = 0;
+    bool refilled = false;
+    // Flat cell indices (r * cols + c), only filled when requested
+    std::vector<int> placed_cells;
+    std::vector<int> cleared_cells;
+  };
+
+  // Immediate outcome of one valid action, filled by GameStateCpp::evaluate_actions
+  struct ActionOutcome
+  {
+    Action action = -1;
+    double reward = 0.0;
+    int placed_count = 0;
+    int cleared_count = 0;
+    int lines_cleared = 0;
+    bool refilled = false;
+    bool done = false;
+  };
+
   // --- NEW: Structure to hold undo information ---
   struct StepUndoInfo
   {
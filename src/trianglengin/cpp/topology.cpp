@@ -0,0 +1,246 @@
+// File: src/trianglengin/cpp/topology.cpp
+#include "topology.h"
+#include "shape_logic.h"
+#include <stdexcept>
+#include <algorithm>
+#include <mutex>
+#include <optional>
+#include <string>
+
+namespace trianglengin::cpp
+{
+  namespace
+  {
+    using TopologyKey = std::tuple<int, int, std::vector<std::tuple<int, int>>>;
+
+    bool is_valid(const Topology &topo, int r, int c)
+    {
+      return r >= 0 && r < topo.rows && c >= 0 && c < topo.cols;
+    }
+
+    bool is_live(const Topology &topo, int r, int c)
+    {
+      return is_valid(topo, r, c) && !topo.death_grid[r][c];
+    }
+
+    std::optional<Coord> get_neighbor(const Topology &topo, int r, int c, const std::string &direction, bool backward)
+    {
+      bool up = (r + c) % 2 != 0;
+      int nr = -1, nc = -1;
+
+      if (direction == "h")
+      {
+        int dc = backward ? -1 : 1;
+        nr = r;
+        nc = c + dc;
+      }
+      else if (direction == "d1")
+      { // TL-BR
+        if (backward)
+        {
+          nr = up ? r : r - 1;
+          nc = up ? c - 1 : c;
+        }
+        else
+        {
+          nr = up ? r + 1 : r;
+          nc = up ? c : c + 1;
+        }
+      }
+      else if (direction == "d2")
+      { // BL-TR
+        if (backward)
+        {
+          nr = up ? r + 1 : r;
+          nc = up ? c : c - 1;
+        }
+        else
+        {
+          nr = up ? r : r - 1;
+          nc = up ? c + 1 : c;
+        }
+      }
+      else
+      {
+        throw std::invalid_argument("Unknown direction: " + direction);
+      }
+
+      if (!is_valid(topo, nr, nc))
+        return std::nullopt;
+      return Coord{nr, nc};
+    }
+
+    void precompute_lines(Topology &topo)
+    {
+      std::set<Line> maximal_lines_set;
+      std::set<std::tuple<Coord, std::string>> processed_starts;
+      const std::vector<std::string> directions = {"h", "d1", "d2"};
+
+      for (int r_init = 0; r_init < topo.rows; ++r_init)
+      {
+        for (int c_init = 0; c_init < topo.cols; ++c_init)
+        {
+          if (!is_live(topo, r_init, c_init))
+            continue;
+          Coord start_coord = {r_init, c_init};
+          for (const auto &direction : directions)
+          {
+            Coord line_start_coord = start_coord;
+            // Find the true start of the line segment in this direction
+            while (true)
+            {
+              auto prev_coord_opt = get_neighbor(topo, std::get<0>(line_start_coord), std::get<1>(line_start_coord), direction, true);
+              if (prev_coord_opt && is_live(topo, std::get<0>(*prev_coord_opt), std::get<1>(*prev_coord_opt)))
+              {
+                line_start_coord = *prev_coord_opt;
+              }
+              else
+                break;
+            }
+            // Check if we already processed this line starting from this coordinate and direction
+            if (processed_starts.count({line_start_coord, direction}))
+              continue;
+
+            // Trace the line forward from the true start
+            Line current_line;
+            std::optional<Coord> trace_coord_opt = line_start_coord;
+            while (trace_coord_opt && is_live(topo, std::get<0>(*trace_coord_opt), std::get<1>(*trace_coord_opt)))
+            {
+              current_line.push_back(*trace_coord_opt);
+              trace_coord_opt = get_neighbor(topo, std::get<0>(*trace_coord_opt), std::get<1>(*trace_coord_opt), direction, false);
+            }
+
+            // Store the line if it's long enough and mark it as processed
+            if (current_line.size() >= 2) // Only store lines of length 2 or more
+            {
+              maximal_lines_set.insert(current_line);
+              processed_starts.insert({line_start_coord, direction});
+            }
+          }
+        }
+      }
+
+      // Convert set to vector and sort for deterministic order
+      topo.lines = std::vector<Line>(maximal_lines_set.begin(), maximal_lines_set.end());
+      std::sort(topo.lines.begin(), topo.lines.end(), [](const Line &a, const Line &b)
+                {
+              if (a.empty() || b.empty()) return b.empty(); // Handle empty lines if they somehow occur
+              // Sort primarily by starting row, then starting column, then size
+              if (std::get<0>(a[0]) != std::get<0>(b[0])) return std::get<0>(a[0]) < std::get<0>(b[0]);
+              if (std::get<1>(a[0]) != std::get<1>(b[0])) return std::get<1>(a[0]) < std::get<1>(b[0]);
+              return a.size() < b.size(); });
+
+      // Index-based membership tables
+      topo.line_cells.assign(topo.lines.size(), {});
+      topo.cell_lines.assign(topo.rows * topo.cols, {});
+      for (size_t line_idx = 0; line_idx < topo.lines.size(); ++line_idx)
+      {
+        for (const auto &[r, c] : topo.lines[line_idx])
+        {
+          topo.line_cells[line_idx].push_back(r * topo.cols + c);
+          topo.cell_lines[r * topo.cols + c].push_back(static_cast<int>(line_idx));
+        }
+      }
+
+      // Build the coordinate-to-lines map
+      for (const auto &line_vec : topo.lines)
+      {
+        // Use a set of Coords (LineFs) as the value in the map for efficient lookup
+        LineFs line_fs(line_vec.begin(), line_vec.end());
+        for (const auto &coord : line_vec)
+        {
+          topo.coord_to_lines_map[coord].insert(line_fs);
+        }
+      }
+    }
+
+    void precompute_placements(Topology &topo)
+    {
+      const int num_cells = topo.rows * topo.cols;
+      if (static_cast<std::size_t>(num_cells) > kInlineCells)
+      {
+        return; // Large boards use the generic placement check
+      }
+      const auto &templates = shape_logic::get_shape_templates();
+      PlacementTable &table = topo.placements;
+      table.words = (static_cast<std::size_t>(num_cells) + 63) / 64;
+      table.num_templates = static_cast<int>(templates.size());
+      table.num_cells = num_cells;
+      table.placeable.assign(templates.size() * num_cells, 0);
+      table.masks.assign(templates.size() * num_cells * table.words, 0);
+      for (std::size_t t = 0; t < templates.size(); ++t)
+      {
+        for (int anchor = 0; anchor < num_cells; ++anchor)
+        {
+          const int r = anchor / topo.cols;
+          const int c = anchor % topo.cols;
+          const std::size_t entry = t * num_cells + anchor;
+          uint64_t *mask = &table.masks[entry * table.words];
+          bool placeable = !templates[t].empty();
+          for (const auto &[dr, dc, shape_is_up] : templates[t])
+          {
+            const int tr = r + dr;
+            const int tc = c + dc;
+            if (!is_live(topo, tr, tc) || ((tr + tc) % 2 != 0) != shape_is_up)
+            {
+              placeable = false;
+              break;
+            }
+            const int idx = tr * topo.cols + tc;
+            mask[idx >> 6] |= uint64_t{1} << (idx & 63);
+          }
+          table.placeable[entry] = placeable ? 1 : 0;
+        }
+      }
+    }
+
+    std::shared_ptr<const Topology> build_topology(const EnvConfigCpp &config)
+    {
+      auto topo = std::make_shared<Topology>();
+      topo->rows = config.rows;
+      topo->cols = config.cols;
+      if (topo->rows <= 0 || topo->cols <= 0)
+      {
+        throw std::invalid_argument("Grid dimensions must be positive.");
+      }
+      if (config.playable_range_per_row.size() != static_cast<size_t>(topo->rows))
+      {
+        throw std::invalid_argument("Playable range size mismatch with rows.");
+      }
+      topo->death_grid.assign(topo->rows, std::vector<bool>(topo->cols, true));
+      for (int r = 0; r < topo->rows; ++r)
+      {
+        const auto &[start_col, end_col] = config.playable_range_per_row[r];
+        if (start_col < 0 || end_col > topo->cols || start_col > end_col) // Allow start == end
+        {
+          throw std::invalid_argument("Invalid playable range for row " + std::to_string(r));
+        }
+        for (int c = start_col; c < end_col; ++c)
+        {
+          topo->death_grid[r][c] = false;
+        }
+      }
+      precompute_lines(*topo);
+      precompute_placements(*topo);
+      return topo;
+    }
+  } // namespace
+
+  std::shared_ptr<const Topology> get_topology(const EnvConfigCpp &config)
+  {
+    static std::mutex cache_mutex;
+    static std::map<TopologyKey, std::shared_ptr<const Topology>> cache;
+
+    TopologyKey key{config.rows, config.cols, config.playable_range_per_row};
+    std::lock_guard<std::mutex> lock(cache_mutex);
+    auto it = cache.find(key);
+    if (it != cache.end())
+    {
+      return it->second;
+    }
+    auto topo = build_topology(config);
+    cache.emplace(std::move(key), topo);
+    return topo;
+  }
+
+} // namespace trianglengin::cpp
@@ -0,0 +1,71 @@
+// File: src/trianglengin/cpp/topology.h
+#ifndef TRIANGLENGIN_CPP_TOPOLOGY_H
+#define TRIANGLENGIN_CPP_TOPOLOGY_H
+
+#pragma once
+
+#include <vector>
+#include <set>
+#include <map>
+#include <tuple>
+#include <memory>
+#include <cstddef>
+#include <cstdint>
+
+#include "config.h"
+#include "structs.h"
+
+namespace trianglengin::cpp
+{
+  using Line = std::vector<Coord>;
+  using LineFs = std::set<Coord>;
+  using LineFsSet = std::set<LineFs>;
+  using CoordMap = std::map<Coord, LineFsSet>;
+
+  // Boards of up to kInlineCells cells (the default 8x15 board has 120) store
+  // their occupancy as an inline bitboard of kInlineCellWords words.
+  constexpr std::size_t kInlineCells = 128;
+  constexpr std::size_t kInlineCellWords = kInlineCells / 64;
+
+  // Placement masks of the predefined shape templates, built for boards that
+  // fit the inline bitboard. Entry t * num_cells + i describes template t
+  // anchored at flat cell i (r * cols + c).
+  struct PlacementTable
+  {
+    std::size_t words = 0; // Bitboard words per mask (1 or 2); 0 if no table
+    int num_templates = 0;
+    int num_cells = 0;
+    // 1 if the footprint lies on live cells of matching orientation
+    std::vector<uint8_t> placeable;
+    // Cells covered by the footprint, `words` words per entry
+    std::vector<uint64_t> masks;
+
+    bool covers(int footprint_id) const
+    {
+      return words != 0 && footprint_id >= 0 && footprint_id < num_templates;
+    }
+  };
+
+  // Immutable board geometry derived from the grid part of an EnvConfigCpp
+  // (rows, cols, playable ranges). Built once per distinct geometry and shared
+  // by every GridData using it, so copying a grid only copies its cell state.
+  struct Topology
+  {
+    int rows = 0;
+    int cols = 0;
+    std::vector<std::vector<bool>> death_grid;
+    std::vector<Line> lines;
+    CoordMap coord_to_lines_map;
+    // Flat cell indices (r * cols + c) of each line, and the lines through each cell
+    std::vector<std::vector<int>> line_cells;
+    std::vector<std::vector<int>> cell_lines;
+    PlacementTable placements;
+  };
+
+  // Returns the shared topology for the config's geometry, building and caching
+  // it on first use. Throws std::invalid_argument for inconsistent geometry.
+  std::shared_ptr<const Topology> get_topology(const EnvConfigCpp &config);
+
+} // namespace trianglengin::cpp
+
+#endif // TRIANGLENGIN_CPP_TOPOLOGY_H
@@ -0,0 +1,238 @@
+# File: src/trianglengin/dataset.py
+import mmap
+from collections.abc import Sequence
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Literal, cast
+
+import numpy as np
+from typing_extensions import Self
+
+from .game_interface import cpp_module, observation_shape
+from .replay import replay
+from .trajectory import (
+    FLAG_BOARDS,
+    ChunkInfo,
+    chunk_arrays,
+    decode_file_header,
+    scan_chunks,
+)
+
+if TYPE_CHECKING:
+    from .config import EnvConfig
+
+BoardSource = Literal["auto", "boards", "replay"]
+
+
+def _returns_to_go(rewards: np.ndarray, gamma: float) -> np.ndarray:
+    """
+    Discounted returns G[t] = sum_k gamma**k * rewards[t + k], vectorized as
+    a reversed cumulative sum of rewards scaled by gamma**t. Scaling is done
+    in blocks short enough for gamma**-t to stay well within float range.
+    """
+    if gamma == 1.0:
+        return cast("np.ndarray", np.cumsum(rewards[::-1])[::-1])
+    if gamma == 0.0:
+        return np.array(rewards, dtype=np.float64)
+    n = len(rewards)
+    block = n if abs(gamma) == 1 else int(100 / abs(np.log10(abs(gamma))))
+    block = max(block, 1)
+    to_go = np.empty_like(rewards)
+    carry = 0.0  # Return from the start of the following block
+    for hi in range(n, 0, -block):
+        lo = max(0, hi - block)
+        scale = np.power(gamma, np.arange(hi - lo, dtype=np.float64))
+        scaled = np.cumsum((rewards[lo:hi] * scale)[::-1])[::-1]
+        to_go[lo:hi] = scaled / scale + carry * gamma * scale[::-1]
+        carry = float(to_go[lo])
+    return to_go
+
+
+class TrajectoryDataset:
+    """
+    Serves training samples from trajectory files (see `trianglengin.trajectory`)
+    through read-only memory maps, so files are never loaded into RAM.
+    Each step of each recorded episode is one sample of
+    (observation planes, action mask, action, return). Observations are
+    reconstructed from stored bit-packed boards when available
+    (`source="auto"` or `"boards"`) or by replaying the episode from its seed
+    and actions natively (`source="replay"`, or for chunks recorded without
+    boards).
+    """
+
+    def __init__(
+        self,
+        paths: str | Path | Sequence[str | Path],
+        gamma: float = 1.0,
+        source: BoardSource = "auto",
+    ):
+        if source not in ("auto", "boards", "replay"):
+            raise ValueError(f"Unknown observation source '{source}'.")
+        path_list = [paths] if isinstance(paths, str | Path) else list(paths)
+        if not path_list:
+            raise ValueError("At least one trajectory file is required.")
+        self.gamma = gamma
+        self.source: BoardSource = source
+        self._maps: list[mmap.mmap] = []
+        self._chunks: list[tuple[int, ChunkInfo]] = []
+        fingerprint: int | None = None
+        try:
+            for path in path_list:
+                with Path(path).open("rb") as handle:
+                    buf = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps.append(buf)
+                config, file_fp, start = decode_file_header(buf)
+                if fingerprint is None:
+                    self.env_config: EnvConfig = config
+                    fingerprint = file_fp
+                elif file_fp != fingerprint:
+                    raise ValueError(f"{path} was recorded with a different EnvConfig.")
+                chunks, _ = scan_chunks(buf, start, file_fp)
+                self._chunks.extend(
+                    (len(self._maps) - 1, chunk) for chunk in chunks if chunk.num_steps
+                )
+            if source == "boards" and any(
+                not chunk.flags & FLAG_BOARDS for _, chunk in self._chunks
+            ):
+                raise ValueError("Some episodes were recorded without boards.")
+        except BaseException:
+            self.close()
+            raise
+        lengths = np.array([c.num_steps for _, c in self._chunks], dtype=np.int64)
+        # Global index of the first step of each episode, plus the total
+        self._step_starts = np.concatenate(([0], np.cumsum(lengths)))
+
+    @property
+    def num_episodes(self) -> int:
+        """Returns the number of (non-empty) recorded episodes."""
+        return len(self._chunks)
+
+    def __len__(self) -> int:
+        return int(self._step_starts[-1])
+
+    def episode(self, index: int) -> dict[str, np.ndarray]:
+        """
+        Returns copies of one episode's arrays: "actions", "rewards" and, if
+        recorded, "boards" and "slots", plus its "seed".
+        """
+        file_idx, chunk = self._chunks[index]
+        arrays = {
+            key: np.array(value)
+            for key, value in chunk_arrays(self._maps[file_idx], chunk).items()
+        }
+        arrays["seed"] = np.array(chunk.seed, dtype=np.uint64)
+        return arrays
+
+    def sample(
+        self, batch_size: int, rng: np.random.Generator | None = None
+    ) -> dict[str, np.ndarray]:
+        """Returns a batch of `batch_size` samples drawn uniformly over all steps."""
+        if len(self) == 0:
+            raise ValueError("Cannot sample from an empty dataset.")
+        generator = rng if rng is not None else np.random.default_rng()
+        return self.get_batch(generator.integers(0, len(self), size=batch_size))
+
+    def get_batch(self, indices: np.ndarray | Sequence[int]) -> dict[str, np.ndarray]:
+        """
+        Builds the samples at global step `indices`. Returns "observation"
+        (B, 2 + NUM_SHAPE_SLOTS, ROWS, COLS) float32, "action_mask"
+        (B, NUM_SHAPE_SLOTS, ROWS, COLS) bool, "action" int64 and the
+        discounted return-to-go "return" float32.
+        """
+        idx = np.asarray(indices, dtype=np.int64).reshape(-1)
+        if idx.size and (idx.min() < 0 or idx.max() >= len(self)):
+            raise IndexError("Sample index out of range.")
+        cfg = self.env_config
+        batch = len(idx)
+        observations = np.empty((batch, *observation_shape(cfg)), dtype=np.float32)
+        masks = np.empty((batch, cfg.NUM_SHAPE_SLOTS, cfg.ROWS, cfg.COLS), np.bool_)
+        actions = np.empty(batch, dtype=np.int64)
+        returns = np.empty(batch, dtype=np.float32)
+
+        episode_ids = np.searchsorted(self._step_starts, idx, side="right") - 1
+        order = np.argsort(episode_ids, kind="stable")
+        bounds = np.flatnonzero(np.diff(episode_ids[order])) + 1
+        # Samples with stored boards are gathered and encoded in one native call
+        stored: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        for group in np.split(order, bounds):
+            if not group.size:
+                continue
+            episode_id = int(episode_ids[group[0]])
+            steps = idx[group] - self._step_starts[episode_id]
+            self._fill_episode(
+                episode_id, group, steps, observations, masks, actions, returns, stored
+            )
+        if stored:
+            positions = np.concatenate([pos for pos, _, _ in stored])
+            obs = np.empty((len(positions), *observations.shape[1:]), np.float32)
+            mask = np.empty((len(positions), *masks.shape[1:]), np.bool_)
+            cpp_module.encode_board_batch(
+                cfg,
+                np.concatenate([boards for _, boards, _ in stored]),
+                np.concatenate([slots for _, _, slots in stored]),
+                obs,
+                mask,
+            )
+            observations[positions] = obs
+            masks[positions] = mask
+        return {
+            "observation": observations,
+            "action_mask": masks,
+            "action": actions,
+            "return": returns,
+        }
+
+    def _fill_episode(
+        self,
+        episode_id: int,
+        positions: np.ndarray,
+        steps: np.ndarray,
+        observations: np.ndarray,
+        masks: np.ndarray,
+        actions: np.ndarray,
+        returns: np.ndarray,
+        stored: list[tuple[np.ndarray, np.ndarray, np.ndarray]],
+    ) -> None:
+        """
+        Writes the samples of one episode at batch `positions`. Stored boards
+        are appended to `stored` as (positions, boards, slots) for encoding.
+        """
+        file_idx, chunk = self._chunks[episode_id]
+        arrays = chunk_arrays(self._maps[file_idx], chunk)
+        actions[positions] = arrays["actions"][steps]
+        to_go = _returns_to_go(arrays["rewards"].astype(np.float64), self.gamma)
+        returns[positions] = to_go[steps]
+
+        if self.source != "replay" and "boards" in arrays:
+            stored.append((positions, arrays["boards"][steps], arrays["slots"][steps]))
+            return
+
+        # Replay natively from the seed up to the last requested step
+        last = int(steps.max()) + 1
+        result = replay(
+            self.env_config,
+            chunk.seed,
+            arrays["actions"][:last],
+            emit=("observations", "masks"),
+        )
+        if result.steps < last:
+            raise ValueError(f"Episode {episode_id} ended before step {last - 1}.")
+        observations[positions] = result.arrays["observations"][steps]
+        masks[positions] = result.arrays["masks"][steps]
+
+    def close(self) -> None:
+        """Unmaps all files. The dataset cannot be used afterwards."""
+        for buf in self._maps:
+            buf.close()
+        self._maps = []
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,372 @@
+# File: src/trianglengin/distributed.py
+"""
+Self-play spread over actor processes on any number of hosts.
+
+A `Coordinator` listens on a TCP address, hands out tasks (a list of game
+seeds plus the current policy snapshot) to the actors that connect, and
+appends the trajectory chunks they return to one trajectory file. Actors
+(`run_actor`) play their tasks in batches and send back the encoded chunks
+(see `trianglengin.trajectory`), a few bytes per step.
+
+Backpressure: each actor holds one task at a time and only asks for the
+next after its results are accepted, and results are accepted only as fast
+as the coordinator's writer drains them, so a slow disk throttles actors
+instead of growing queues. Tasks held by an actor that disconnects are
+handed out again; if their original results still arrive, only the first
+result of each task is recorded.
+
+Messages are pickled over `multiprocessing.connection` and authenticated
+with a shared `authkey`; only expose the port to trusted hosts.
+"""
+
+import contextlib
+import logging
+import multiprocessing as mp
+import os
+import socket
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+import numpy as np
+from typing_extensions import Self
+
+from .config import EnvConfig
+from .game_interface import GameState
+from .selfplay import POLICIES, SelfPlayStats, choose_actions, index_path, play_games
+from .trajectory import TrajectoryRecorder, TrajectoryWriter, build_index
+
+log = logging.getLogger(__name__)
+
+Address = tuple[str, int]
+PolicyFn = Callable[[list[GameState], np.random.Generator], np.ndarray]
+PolicyLoader = Callable[[Any], PolicyFn]
+
+
+def builtin_policy(snapshot: Any) -> PolicyFn:
+    """Default policy loader: the snapshot names a built-in self-play policy."""
+    if snapshot not in POLICIES:
+        raise ValueError(f"Unknown policy '{snapshot}'.")
+    return lambda states, rng: choose_actions(states, snapshot, rng)
+
+
+class Coordinator:
+    """
+    Serves self-play tasks of `games_per_task` seeds (base_seed, base_seed + 1,
+    ...) to actors and records their games into the trajectory file `path`
+    (replacing it); its index is written next to it on close. Call `serve`
+    to run until every game is recorded. `set_policy` publishes a new policy
+    snapshot, any picklable object understood by the actors' policy loader.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        num_games: int,
+        authkey: bytes,
+        config: EnvConfig | None = None,
+        policy: Any = "random",
+        address: Address = ("127.0.0.1", 0),
+        games_per_task: int = 16,
+        base_seed: int = 0,
+        store_boards: bool = False,
+        max_pending: int = 256,
+        progress: Callable[[SelfPlayStats], None] | None = None,
+    ):
+        if num_games <= 0:
+            raise ValueError(f"num_games must be positive, got {num_games}.")
+        if games_per_task <= 0:
+            raise ValueError(f"games_per_task must be positive, got {games_per_task}.")
+        self.path = Path(path)
+        self.env_config: EnvConfig = config if config else EnvConfig()
+        self.store_boards = store_boards
+        self.stats = SelfPlayStats(shards=[self.path])
+        self._authkey = authkey
+        self._progress = progress
+        self._lock = threading.Lock()
+        self._policy = policy
+        self._policy_version = 0
+        end = base_seed + num_games
+        self._tasks: deque[tuple[int, list[int]]] = deque(
+            (k, list(range(lo, min(lo + games_per_task, end))))
+            for k, lo in enumerate(range(base_seed, end, games_per_task))
+        )
+        self._num_tasks = len(self._tasks)
+        self._claimed_tasks: set[int] = set()  # Results being or already recorded
+        self._done_tasks: set[int] = set()
+        self._finished = threading.Event()
+        self._stopping = False
+        self._closed = False
+        self._handlers: list[threading.Thread] = []
+        self.path.unlink(missing_ok=True)
+        self._writer = TrajectoryWriter(
+            self.path, self.env_config, store_boards, max_pending
+        )
+        self._listener = Listener(address, authkey=authkey)
+        self._start = time.perf_counter()
+        self._acceptor = threading.Thread(
+            target=self._accept_loop, name="coordinator-accept", daemon=True
+        )
+        self._acceptor.start()
+
+    @property
+    def address(self) -> Address:
+        """Returns the (host, port) actors connect to."""
+        host, port = self._listener.address
+        return str(host), int(port)
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def set_policy(self, snapshot: Any) -> int:
+        """Publishes a policy snapshot for subsequent tasks; returns its version."""
+        with self._lock:
+            self._policy = snapshot
+            self._policy_version += 1
+            return self._policy_version
+
+    def _accept_loop(self) -> None:
+        while not self._stopping:
+            try:
+                conn = self._listener.accept()
+            except (OSError, mp.AuthenticationError) as e:
+                if not self._stopping:
+                    log.warning(f"Rejected actor connection: {e}")
+                continue
+            if self._stopping:
+                conn.close()
+                return
+            handler = threading.Thread(
+                target=self._handle, args=(conn,), name="coordinator-actor", daemon=True
+            )
+            handler.start()
+            self._handlers.append(handler)
+
+    def _handle(self, conn: Connection) -> None:
+        """Serves one actor connection until it stops or disconnects."""
+        held: dict[int, list[int]] = {}
+        name = "?"
+        sent_version = -1  # Snapshots are only sent when they change
+        try:
+            _, name = conn.recv()
+            conn.send(
+                ("config", self.env_config.model_dump(mode="json"), self.store_boards)
+            )
+            while True:
+                message = conn.recv()
+                if message[0] == "result":
+                    _, task_id, chunks, games, steps = message
+                    if not self._claim(task_id):  # Reissued task finished twice
+                        held.pop(task_id, None)
+                        log.info(f"Dropped duplicate result of task {task_id}.")
+                        continue
+                    for chunk in chunks:  # Blocks while the writer is full
+                        self._writer.write_chunk(chunk)
+                    held.pop(task_id, None)
+                    self._complete(task_id, games, steps)
+                elif message[0] == "request":
+                    if self._finished.is_set() or self._stopping:
+                        conn.send(("stop",))
+                        return
+                    with self._lock:
+                        task = self._tasks.popleft() if self._tasks else None
+                        version, snapshot = self._policy_version, self._policy
+                    if task is None:
+                        conn.send(("wait",))
+                        continue
+                    held[task[0]] = task[1]
+                    payload = snapshot if version != sent_version else None
+                    sent_version = version
+                    conn.send(("task", task[0], task[1], version, payload))
+                else:
+                    raise ValueError(f"Unexpected message {message[0]!r}.")
+        except (EOFError, OSError) as e:
+            if held:
+                log.warning(f"Actor {name} disconnected with unfinished tasks: {e}")
+        except Exception:
+            log.exception(f"Error while serving actor {name}.")
+        finally:
+            if held:
+                with self._lock:
+                    self._tasks.extendleft(held.items())
+            conn.close()
+
+    def _claim(self, task_id: int) -> bool:
+        """Reserves a task's result for recording; False if one was already taken."""
+        with self._lock:
+            if task_id in self._claimed_tasks:
+                return False
+            self._claimed_tasks.add(task_id)
+            return True
+
+    def _complete(self, task_id: int, games: int, steps: int) -> None:
+        with self._lock:
+            self._done_tasks.add(task_id)
+            self.stats.games += games
+            self.stats.steps += steps
+            self.stats.seconds = time.perf_counter() - self._start
+            done = len(self._done_tasks) == self._num_tasks
+        if self._progress is not None:
+            self._progress(self.stats)
+        if done:
+            self._finished.set()
+
+    def serve(self, timeout: float | None = None) -> SelfPlayStats:
+        """
+        Blocks until every game is recorded, then closes the coordinator.
+        Raises TimeoutError if that takes longer than `timeout` seconds.
+        """
+        try:
+            if not self._finished.wait(timeout):
+                raise TimeoutError(
+                    f"Only {len(self._done_tasks)}/{self._num_tasks} tasks "
+                    f"finished within {timeout}s."
+                )
+        finally:
+            self.close()
+        return self.stats
+
+    def close(self) -> None:
+        """Stops serving, finishes the trajectory file and writes its index."""
+        if self._closed:
+            return
+        self._closed = True
+        self._stopping = True
+        for handler in list(self._handlers):
+            handler.join(timeout=1)
+        if self._acceptor.is_alive():
+            # Wake the blocked accept() with a throwaway connection
+            threading.Thread(target=self._wake_acceptor, daemon=True).start()
+            self._acceptor.join(timeout=1)
+        self._listener.close()
+        self._writer.close()
+        np.save(index_path(self.path), build_index(self.path))
+        log.info(
+            f"Coordinator finished: {self.stats.games} games, {self.stats.steps} "
+            f"steps in {self.stats.seconds:.1f}s ({self.stats.steps_per_sec:.0f} steps/s)."
+        )
+
+    def _wake_acceptor(self) -> None:
+        with contextlib.suppress(OSError, EOFError, mp.AuthenticationError):
+            Client(self.address, authkey=self._authkey).close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def _play_task(
+    config: EnvConfig,
+    store_boards: bool,
+    seeds: list[int],
+    policy: PolicyFn,
+    batch_size: int,
+) -> tuple[list[bytes], int, int]:
+    """Plays one task's games in memory. Returns: (chunks, games, steps)"""
+    rng = np.random.default_rng(seeds[0])
+    recorder = TrajectoryRecorder(None, config, store_boards=store_boards)
+    games, steps = play_games(
+        recorder, seeds, lambda states: policy(states, rng), batch_size
+    )
+    recorder.close()
+    return recorder.take_chunks(), games, steps
+
+
+def run_actor(
+    address: Address,
+    authkey: bytes,
+    policy_loader: PolicyLoader = builtin_policy,
+    batch_size: int = 64,
+    poll_interval: float = 0.05,
+) -> tuple[int, int]:
+    """
+    Connects to a coordinator and plays the tasks it hands out until told to
+    stop, `batch_size` games at a time, loading each new policy snapshot with
+    `policy_loader`. Returns: (games, steps) played by this actor.
+    """
+    games = steps = 0
+    with Client(address, authkey=authkey) as conn:
+        conn.send(("hello", f"{socket.gethostname()}:{os.getpid()}"))
+        _, config_data, store_boards = conn.recv()
+        config = EnvConfig.model_validate(config_data)
+        policy: PolicyFn | None = None
+        policy_version = -1
+        while True:
+            conn.send(("request",))
+            message = conn.recv()
+            if message[0] == "stop":
+                break
+            if message[0] == "wait":  # Remaining tasks are held by other actors
+                time.sleep(poll_interval)
+                continue
+            _, task_id, seeds, version, snapshot = message
+            if policy is None or version != policy_version:
+                policy, policy_version = policy_loader(snapshot), version
+            chunks, task_games, task_steps = _play_task(
+                config, store_boards, seeds, policy, batch_size
+            )
+            conn.send(("result", task_id, chunks, task_games, task_steps))
+            games += task_games
+            steps += task_steps
+    return games, steps
+
+
+def run_local(
+    path: str | Path,
+    num_games: int,
+    num_actors: int = 2,
+    config: EnvConfig | None = None,
+    policy: Any = "random",
+    policy_loader: PolicyLoader = builtin_policy,
+    games_per_task: int = 16,
+    batch_size: int = 64,
+    base_seed: int = 0,
+    store_boards: bool = False,
+    timeout: float | None = None,
+) -> SelfPlayStats:
+    """
+    Runs a coordinator in this process and `num_actors` actor processes
+    connected to it over localhost TCP, and returns the run's totals.
+    """
+    authkey = os.urandom(16)
+    coordinator = Coordinator(
+        path,
+        num_games,
+        authkey,
+        config,
+        policy,
+        games_per_task=games_per_task,
+        base_seed=base_seed,
+        store_boards=store_boards,
+    )
+    procs = [
+        mp.get_context().Process(
+            target=run_actor,
+            args=(coordinator.address, authkey, policy_loader, batch_size),
+            daemon=True,
+        )
+        for _ in range(num_actors)
+    ]
+    try:
+        for proc in procs:
+            proc.start()
+        return coordinator.serve(timeout)
+    finally:
+        coordinator.close()
+        for proc in procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
@@ -1,9 +1,10 @@
 # File: src/trianglengin/game_interface.py
 import logging
 import random
-from typing import Any, cast
+from typing import Any, NamedTuple, cast
 
 import numpy as np
+from numpy.typing import ArrayLike
 
 from .config import EnvConfig
 
@@ -64,8 +65,64 @@ class Shape:
         return self.triangles, self.color, self.color_id
 
 
+class StepInfo(NamedTuple):
+    """Compact record of a single step, as returned by `GameState.step_ex`."""
+
+    reward: float
+    done: bool
+    placed_count: int
+    cleared_count: int
+    lines_cleared: int
+    refilled: bool
+    # Flat cell indices (r * COLS + c); None unless requested via `with_cells`.
+    placed_cells: np.ndarray | None = None
+    cleared_cells: np.ndarray | None = None
+
+
 log = logging.getLogger(__name__)
 
+_TOPOLOGY_CACHE: dict[tuple[Any, ...], dict[str, np.ndarray]] = {}
+
+
+def observation_shape(config: EnvConfig) -> tuple[int, int, int]:
+    """Returns the (channels, rows, cols) shape of encoded observations."""
+    return (2 + config.NUM_SHAPE_SLOTS, config.ROWS, config.COLS)
+
+
+def board_feature_names(config: EnvConfig) -> list[str]:
+    """Returns the names of the entries of `GameState.board_features`, in order."""
+    return [
+        "empty_cells",
+        "empty_regions",
+        "isolated_empty",
+        "uncoverable_empty",
+        "near_complete_lines",
+    ] + [f"slot_{k}_mobility" for k in range(config.NUM_SHAPE_SLOTS)]
+
+
+def get_topology(config: EnvConfig) -> dict[str, np.ndarray]:
+    """
+    Returns the compiled board topology of `config` as read-only NumPy arrays:
+
+    - "death", "up": (ROWS, COLS) bool masks of death cells and up triangles.
+    - "line_offsets", "line_cells": lines in CSR form; line i covers the flat
+      cell indices (r * COLS + c) line_cells[line_offsets[i]:line_offsets[i + 1]].
+    - "cell_line_offsets", "cell_lines": the lines through each flat cell, in CSR form.
+    - "template_offsets", "template_cells": shape template footprints; template t
+      has the (dr, dc, is_up) rows template_cells[template_offsets[t]:template_offsets[t + 1]].
+
+    Line indices match `get_line_fill` and `get_line_threats`. The export is
+    computed once per board geometry and cached.
+    """
+    key = (config.ROWS, config.COLS, tuple(config.PLAYABLE_RANGE_PER_ROW))
+    topology = _TOPOLOGY_CACHE.get(key)
+    if topology is None:
+        topology = cast("dict[str, np.ndarray]", cpp_module.get_topology(config))
+        for array in topology.values():
+            array.flags.writeable = False
+        _TOPOLOGY_CACHE[key] = topology
+    return topology
+
 
 class GameState:
     """
@@ -89,10 +146,14 @@ class GameState:
             raise
         self._cached_shapes: list[Shape | None] | None = None
         self._cached_grid_data: dict[str, np.ndarray] | None = None
+        # Seed the game can be replayed from; None once that no longer holds
+        self.initial_seed: int | None = used_seed
 
     def reset(self) -> None:
         """Resets the game to an initial state."""
         self._cpp_state.reset()
+        # Reset continues the RNG stream, so the seed no longer reproduces the game
+        self.initial_seed = None
         self._clear_caches()
         log.debug("Python GameState wrapper reset.")
 
@@ -109,6 +170,21 @@ class GameState:
             log.exception(f"Error during C++ step execution for action {action}: {e}")
             return self.env_config.PENALTY_GAME_OVER, True
 
+    def step_ex(self, action: int, with_cells: bool = False) -> StepInfo:
+        """
+        Performs one game step and returns a `StepInfo` record with the reward,
+        done flag, placed/cleared triangle counts, lines cleared and whether the
+        shape slots were refilled. If `with_cells` is True, the flat indices of
+        placed and cleared cells are included as int32 arrays.
+        """
+        try:
+            info = StepInfo(*self._cpp_state.step_ex(action, with_cells))
+            self._clear_caches()
+            return info
+        except Exception as e:
+            log.exception(f"Error during C++ step execution for action {action}: {e}")
+            return StepInfo(self.env_config.PENALTY_GAME_OVER, True, 0, 0, 0, False)
+
     def is_over(self) -> bool:
         """Checks if the game is over."""
         return cast("bool", self._cpp_state.is_over())
@@ -135,6 +211,78 @@ class GameState:
             "set[int]", set(self._cpp_state.get_valid_actions(force_recalculate))
         )
 
+    def valid_action_mask(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Returns the valid-action mask with shape (NUM_SHAPE_SLOTS, ROWS, COLS).
+        The mask is filled directly from the C++ action cache. If `out` is given
+        (bool or uint8, C-contiguous, same number of elements) it is filled in
+        place and returned.
+        """
+        return cast("np.ndarray", self._cpp_state.get_valid_action_mask(out))
+
+    def valid_action_mask_flat(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Returns the valid-action mask as a flat array indexed by encoded action.
+        Accepts an optional `out` buffer like `valid_action_mask`.
+        """
+        return cast("np.ndarray", self._cpp_state.get_valid_action_mask(out, flat=True))
+
+    def can_place_many(
+        self, shape: Shape | int, rows: ArrayLike, cols: ArrayLike
+    ) -> np.ndarray:
+        """
+        Checks whether `shape` fits on the current board at every anchor
+        (rows[i], cols[i]) in one native call. `shape` is a Shape (it need not
+        be in a slot) or the index of a predefined shape template (see
+        `get_topology`). `rows` and `cols` are broadcast together; returns a
+        bool array of the broadcast shape.
+        """
+        rows_b, cols_b = np.broadcast_arrays(np.asarray(rows), np.asarray(cols))
+        shape_arg = (
+            int(shape) if isinstance(shape, (int, np.integer)) else shape.to_cpp_repr()
+        )
+        result = self._cpp_state.can_place_many(
+            shape_arg, rows_b.astype(np.int32), cols_b.astype(np.int32)
+        )
+        return cast("np.ndarray", result.reshape(rows_b.shape))
+
+    def get_line_table(self) -> dict[str, np.ndarray]:
+        """
+        Returns the maximal lines of the board: "cells" is an int32 array of
+        shape (num_lines, max_len) holding flat cell indices (r * COLS + c),
+        padded with -1, and "lengths" holds the length of each line.
+        """
+        return cast("dict[str, np.ndarray]", self._cpp_state.get_line_table())
+
+    def get_topology(self) -> dict[str, np.ndarray]:
+        """Returns the read-only topology arrays of this state's board (see `get_topology`)."""
+        return get_topology(self.env_config)
+
+    def get_line_fill(self) -> np.ndarray:
+        """
+        Returns the fraction of occupied cells of every line (float32), read
+        from the fill counters the engine maintains on placement and clearing.
+        """
+        return cast("np.ndarray", self._cpp_state.get_line_fill())
+
+    def get_line_threats(self) -> dict[str, np.ndarray]:
+        """
+        Returns the lines that are one placement away from completion, as
+        parallel arrays "line" (line index) and "action" (the valid action
+        that completes it). A line completable by several actions appears
+        once per action.
+        """
+        return cast("dict[str, np.ndarray]", self._cpp_state.get_line_threats())
+
+    def evaluate_actions(self) -> dict[str, np.ndarray]:
+        """
+        Computes the immediate outcome of every valid action in one native call,
+        without creating child states. Returns parallel arrays keyed by
+        action, reward, placed_count, cleared_count, lines_cleared, refilled
+        and done; each row matches what `step_ex` would report for that action.
+        """
+        return cast("dict[str, np.ndarray]", self._cpp_state.evaluate_actions())
+
     def get_shapes(self) -> list[Shape | None]:
         """Returns the list of current shapes in the preview slots."""
         if self._cached_shapes is None:
@@ -176,19 +324,79 @@ class GameState:
         """Returns the number of triangles cleared in the most recent step."""
         return cast("int", self._cpp_state.get_last_cleared_triangles())
 
+    def get_last_step_allocations(self) -> int:
+        """
+        Returns the number of heap allocations the engine made during the most
+        recent step. Steady-state steps on the default board make none; use
+        this to catch allocation regressions. Counting is a debug feature:
+        returns -1 unless the extension was built with
+        `CMAKE_ARGS="-DTRIANGLENGIN_COUNT_ALLOCS=ON"`.
+        """
+        return cast("int", self._cpp_state.get_last_step_allocations())
+
     def get_game_over_reason(self) -> str | None:
         """Returns the reason why the game ended, if it's over."""
         return cast("str | None", self._cpp_state.get_game_over_reason())
 
-    def copy(self) -> "GameState":
-        """Creates a deep copy of the game state."""
-        new_wrapper = GameState.__new__(GameState)
-        new_wrapper.env_config = self.env_config
-        new_wrapper._cpp_state = self._cpp_state.copy()
+    @classmethod
+    def _from_cpp(cls, cpp_state: Any, config: EnvConfig) -> "GameState":
+        """Wraps an existing C++ state without copying it."""
+        new_wrapper = cls.__new__(cls)
+        new_wrapper.env_config = config
+        new_wrapper._cpp_state = cpp_state
         new_wrapper._cached_shapes = None
         new_wrapper._cached_grid_data = None
+        new_wrapper.initial_seed = None
         return new_wrapper
 
+    def copy(self) -> "GameState":
+        """Creates a deep copy of the game state."""
+        new_state = GameState._from_cpp(self._cpp_state.copy(), self.env_config)
+        new_state.initial_seed = self.initial_seed
+        return new_state
+
+    def copy_from(self, other: "GameState") -> None:
+        """
+        Overwrites this state with `other` in place, reusing the existing C++
+        state and this wrapper instead of allocating new ones. Useful for
+        keeping a pool of scratch states during search and rollouts.
+        """
+        if other is self:
+            return
+        self._cpp_state.copy_from(other._cpp_state)
+        self.env_config = other.env_config
+        self.initial_seed = other.initial_seed
+        self._clear_caches()
+
+    def board_features(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Computes a fixed-length float32 feature vector of the board (see
+        `board_feature_names`): empty cells, empty regions, isolated empty
+        triangles, empty cells no template can cover, lines missing one
+        triangle, and the number of legal anchors of each slot.
+        """
+        return cast("np.ndarray", self._cpp_state.get_board_features(out))
+
+    def expand(self) -> "ChildBatch":
+        """
+        Creates every child state (one per valid action) in a single native call.
+        The children live in one contiguous C++ batch and are addressed by index.
+        """
+        return ChildBatch(self._cpp_state.expand(), self.env_config)
+
+    @property
+    def observation_shape(self) -> tuple[int, int, int]:
+        """Returns the (channels, rows, cols) shape of `get_observation`."""
+        return observation_shape(self.env_config)
+
+    def get_observation(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Encodes the state as float32 planes of shape (2 + NUM_SHAPE_SLOTS, ROWS, COLS):
+        occupied, death, then the valid anchor mask of each shape slot.
+        If `out` is given it is filled in place and returned.
+        """
+        return cast("np.ndarray", self._cpp_state.get_observation(out))
+
     def debug_toggle_cell(self, r: int, c: int) -> None:
         """Toggles the state of a cell via the C++ implementation."""
         self._cpp_state.debug_toggle_cell(r, c)
@@ -219,3 +427,38 @@ class GameState:
     def cpp_state(self) -> Any:
         """Returns the underlying C++ GameState object."""
         return self._cpp_state
+
+
+class ChildBatch:
+    """
+    The children of a GameState created by `GameState.expand`.
+    Child i is the result of stepping a copy of the parent with `actions[i]`.
+    """
+
+    def __init__(self, cpp_batch: Any, config: EnvConfig):
+        self._cpp_batch = cpp_batch
+        self.env_config = config
+        self.actions: np.ndarray = cpp_batch.get_actions()
+        self.rewards: np.ndarray = cpp_batch.get_rewards()
+        self.dones: np.ndarray = cpp_batch.get_dones()
+
+    def __len__(self) -> int:
+        return len(self._cpp_batch)
+
+    def state(self, index: int) -> GameState:
+        """
+        Returns a GameState view of child `index`. The view shares storage with
+        the batch (stepping it modifies the child); use `.copy()` to detach it.
+        """
+        return GameState._from_cpp(self._cpp_batch.get_state(index), self.env_config)
+
+    def observations(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Encodes all children as float32 planes of shape
+        (len(batch), 2 + NUM_SHAPE_SLOTS, ROWS, COLS), optionally filling `out`.
+        """
+        return cast("np.ndarray", self._cpp_batch.get_observations(out))
+
+    def board_features(self, out: np.ndarray | None = None) -> np.ndarray:
+        """Computes the board features of all children as (len(batch), F) float32."""
+        return cast("np.ndarray", self._cpp_batch.get_board_features(out))
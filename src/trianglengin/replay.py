@@ -0,0 +1,82 @@
+# File: src/trianglengin/replay.py
+from collections.abc import Iterable
+from typing import Literal, NamedTuple
+
+import numpy as np
+
+from .config import EnvConfig
+from .game_interface import cpp_module, observation_shape
+from .trajectory import board_bytes
+
+ReplayOutput = Literal["boards", "slots", "masks", "observations", "rewards"]
+
+
+class ReplayResult(NamedTuple):
+    """Outcome of `replay`: steps applied, final status and the emitted arrays."""
+
+    steps: int
+    done: bool
+    score: float
+    arrays: dict[str, np.ndarray]
+
+
+def _output_spec(config: EnvConfig, name: str) -> tuple[tuple[int, ...], type]:
+    """Returns the per-step shape and dtype of an emitted array."""
+    slots, rows, cols = config.NUM_SHAPE_SLOTS, config.ROWS, config.COLS
+    specs: dict[str, tuple[tuple[int, ...], type]] = {
+        "boards": ((board_bytes(config),), np.uint8),
+        "slots": ((slots,), np.int8),
+        "masks": ((slots, rows, cols), np.bool_),
+        "observations": (observation_shape(config), np.float32),
+        "rewards": ((), np.float64),
+    }
+    if name not in specs:
+        raise ValueError(f"Unknown replay output '{name}'.")
+    return specs[name]
+
+
+def replay(
+    config: EnvConfig,
+    seed: int,
+    actions: np.ndarray,
+    emit: Iterable[ReplayOutput] = ("rewards",),
+    out: dict[str, np.ndarray] | None = None,
+    verify: bool = True,
+) -> ReplayResult:
+    """
+    Rebuilds a game from its initial seed and action sequence in one native
+    call, with the GIL released. For each name in `emit` a per-step array is
+    filled, taken before each action except "rewards": "boards" (bit-packed
+    occupancy, as recorded in trajectory files), "slots" (template ids),
+    "masks" (valid actions), "observations" and "rewards". Arrays given in
+    `out` (one row per action) are filled in place instead of allocated.
+    Replay stops when the game ends; returned arrays are trimmed to the steps
+    applied. Actions outside the action space are illegal; with `verify`, an
+    illegal action raises ValueError.
+    """
+    actions_arr = np.ascontiguousarray(actions, dtype=np.int64).reshape(-1)
+    num_actions = len(actions_arr)
+    buffers = dict(out) if out else {}
+    for name in emit:
+        if name not in buffers:
+            shape, dtype = _output_spec(config, name)
+            buffers[name] = np.empty((num_actions, *shape), dtype=dtype)
+    for key in buffers:
+        _output_spec(config, key)  # Rejects unknown names
+    steps, invalid_step, done, score = cpp_module.replay(
+        config,
+        seed,
+        actions_arr,
+        buffers.get("boards"),
+        buffers.get("slots"),
+        buffers.get("masks"),
+        buffers.get("observations"),
+        buffers.get("rewards"),
+        verify,
+    )
+    if invalid_step >= 0:
+        raise ValueError(
+            f"Action {int(actions_arr[invalid_step])} at step {invalid_step} is not legal."
+        )
+    arrays = {name: buffer[:steps] for name, buffer in buffers.items()}
+    return ReplayResult(int(steps), bool(done), float(score), arrays)
@@ -0,0 +1,54 @@
+# File: src/trianglengin/sampling.py
+from collections.abc import Sequence
+from typing import Literal, cast
+
+import numpy as np
+
+from .game_interface import GameState, cpp_module
+from .vec_interface import VecGameState
+
+SampleMode = Literal["sample", "argmax"]
+
+
+def sample_actions(
+    states: VecGameState | Sequence[GameState],
+    logits: np.ndarray,
+    temperature: float = 1.0,
+    rng: np.random.Generator | None = None,
+    mode: SampleMode = "sample",
+    top_k: int | None = None,
+) -> np.ndarray:
+    """
+    Samples one valid action per state from policy logits in a single native call.
+
+    `logits` has shape (num_states, action_dim) or
+    (num_states, NUM_SHAPE_SLOTS, ROWS, COLS). Invalid actions are masked out
+    using each state's own action cache. In "sample" mode actions are drawn from
+    softmax(logits / temperature), optionally restricted to the `top_k` highest
+    valid logits; "argmax" (or temperature <= 0) picks the best valid action.
+    Non-finite logits (NaN, +-inf) are masked out as well; a state whose valid
+    logits are all non-finite gets a uniformly random valid action.
+    Returns an int64 array of encoded actions, with -1 for states that have no
+    valid action.
+    """
+    game_states = states.states if isinstance(states, VecGameState) else states
+    num_states = len(game_states)
+    logits_2d = np.asarray(logits).reshape(num_states, -1)
+    if mode == "argmax":
+        temperature = 0.0
+    elif mode != "sample":
+        raise ValueError(f"Unknown sampling mode: {mode!r}")
+    if top_k is not None and top_k <= 0:
+        raise ValueError(f"top_k must be positive, got {top_k}.")
+    generator = rng if rng is not None else np.random.default_rng()
+    uniforms = generator.random(num_states)
+    return cast(
+        "np.ndarray",
+        cpp_module.sample_actions_batch(
+            [gs.cpp_state for gs in game_states],
+            logits_2d,
+            uniforms,
+            temperature,
+            top_k or 0,
+        ),
+    )
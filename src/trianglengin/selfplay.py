@@ -0,0 +1,208 @@
+# File: src/trianglengin/selfplay.py
+import json
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+
+from .config import EnvConfig
+from .game_interface import GameState
+from .sampling import sample_actions
+from .trajectory import TrajectoryRecorder, build_index
+
+log = logging.getLogger(__name__)
+
+Policy = Literal["random", "greedy"]
+POLICIES: tuple[Policy, ...] = ("random", "greedy")
+
+
+@dataclass
+class SelfPlayStats:
+    """Running totals of a self-play run."""
+
+    games: int = 0
+    steps: int = 0
+    seconds: float = 0.0
+    shards: list[Path] = field(default_factory=list)
+
+    @property
+    def steps_per_sec(self) -> float:
+        return self.steps / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def games_per_sec(self) -> float:
+        return self.games / self.seconds if self.seconds > 0 else 0.0
+
+
+def choose_actions(
+    states: list[GameState], policy: Policy, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Picks one valid action per state with a built-in policy: "random" samples
+    uniformly, "greedy" takes the best immediate reward, avoiding game over
+    (ties broken at random).
+    """
+    if policy == "random":
+        cfg = states[0].env_config
+        action_dim = cfg.NUM_SHAPE_SLOTS * cfg.ROWS * cfg.COLS
+        logits = np.zeros((len(states), action_dim), dtype=np.float64)
+        return sample_actions(states, logits, rng=rng)
+    if policy != "greedy":
+        raise ValueError(f"Unknown policy '{policy}'.")
+    actions = np.empty(len(states), dtype=np.int64)
+    for i, state in enumerate(states):
+        outcomes = state.evaluate_actions()
+        value = outcomes["reward"] + np.where(
+            outcomes["done"], state.env_config.PENALTY_GAME_OVER, 0.0
+        )
+        best = np.flatnonzero(value == value.max())
+        actions[i] = outcomes["action"][rng.choice(best)]
+    return actions
+
+
+def play_games(
+    recorder: TrajectoryRecorder,
+    seeds: list[int],
+    choose: Callable[[list[GameState]], np.ndarray],
+    batch_size: int = 64,
+) -> tuple[int, int]:
+    """
+    Plays one game per seed to the end through `recorder`, stepping up to
+    `batch_size` games at a time with the actions picked by `choose`.
+    Returns: (games, steps)
+    """
+    config = recorder.env_config
+    pending = list(reversed(seeds))
+    games = steps = 0
+    active: list[GameState] = []
+    while active or pending:
+        while pending and len(active) < batch_size:
+            state = GameState(config, initial_seed=pending.pop())
+            if state.is_over():
+                games += 1
+            else:
+                active.append(state)
+        if not active:
+            break
+        for state, action in zip(active, choose(active), strict=True):
+            recorder.step(state, int(action))
+        steps += len(active)
+        still_active = [state for state in active if not state.is_over()]
+        games += len(active) - len(still_active)
+        active = still_active
+    return games, steps
+
+
+def play_shard(
+    path: Path,
+    config: EnvConfig,
+    seeds: list[int],
+    policy: Policy = "random",
+    batch_size: int = 64,
+    store_boards: bool = False,
+) -> tuple[int, int]:
+    """
+    Plays one game per seed, `batch_size` at a time, into the trajectory file
+    `path` (replacing it) and writes its index next to it (see `build_index`).
+    Returns: (games, steps)
+    """
+    path.unlink(missing_ok=True)
+    rng = np.random.default_rng(seeds[0] if seeds else 0)
+    with TrajectoryRecorder(path, config, store_boards=store_boards) as recorder:
+        games, steps = play_games(
+            recorder,
+            seeds,
+            lambda states: choose_actions(states, policy, rng),
+            batch_size,
+        )
+    np.save(index_path(path), build_index(path))
+    return games, steps
+
+
+def index_path(shard: Path) -> Path:
+    """Returns the path of the index written next to a shard file."""
+    return shard.with_suffix(".idx.npy")
+
+
+def run_selfplay(
+    out_dir: str | Path,
+    num_games: int,
+    config: EnvConfig | None = None,
+    policy: Policy = "random",
+    workers: int = 1,
+    num_shards: int | None = None,
+    batch_size: int = 64,
+    base_seed: int = 0,
+    store_boards: bool = False,
+    progress: Callable[[SelfPlayStats], None] | None = None,
+) -> SelfPlayStats:
+    """
+    Plays `num_games` games (seeds base_seed, base_seed + 1, ...) across a pool
+    of `workers` processes, writing one trajectory file plus index per shard
+    and a `manifest.json` into `out_dir`. `progress` is called with the running
+    totals after each finished shard. With workers <= 1 shards run in-process.
+    """
+    if num_games <= 0:
+        raise ValueError(f"num_games must be positive, got {num_games}.")
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy '{policy}'.")
+    env_config = config if config else EnvConfig()
+    shards = num_shards if num_shards else max(1, min(num_games, 4 * max(workers, 1)))
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    bounds = np.linspace(0, num_games, shards + 1).astype(int)
+    tasks = [
+        (
+            out / f"shard-{k:05d}.trj",
+            env_config,
+            list(range(base_seed + bounds[k], base_seed + bounds[k + 1])),
+            policy,
+            batch_size,
+            store_boards,
+        )
+        for k in range(shards)
+        if bounds[k + 1] > bounds[k]
+    ]
+
+    stats = SelfPlayStats()
+    start = time.perf_counter()
+
+    def record(path: Path, games: int, steps: int) -> None:
+        stats.games += games
+        stats.steps += steps
+        stats.shards.append(path)
+        stats.seconds = time.perf_counter() - start
+        if progress is not None:
+            progress(stats)
+
+    if workers <= 1:
+        for task in tasks:
+            record(task[0], *play_shard(*task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(play_shard, *task): task[0] for task in tasks}
+            for future in as_completed(futures):
+                record(futures[future], *future.result())
+
+    stats.shards.sort()
+    manifest = {
+        "config": env_config.model_dump(mode="json"),
+        "policy": policy,
+        "games": stats.games,
+        "steps": stats.steps,
+        "seconds": stats.seconds,
+        "shards": [
+            {"file": path.name, "index": index_path(path).name} for path in stats.shards
+        ],
+    }
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    log.info(
+        f"Self-play finished: {stats.games} games, {stats.steps} steps in "
+        f"{stats.seconds:.1f}s ({stats.steps_per_sec:.0f} steps/s)."
+    )
+    return stats
@@ -0,0 +1,143 @@
+# File: src/trianglengin/session.py
+import asyncio
+import itertools
+from concurrent.futures import Executor
+from typing import cast
+
+import numpy as np
+
+from .config import EnvConfig
+from .game_interface import GameState, StepInfo, cpp_module
+
+
+class GameSession:
+    """
+    One interactive game owned by a `SessionManager`. `state` may be read
+    freely between steps, but not while this session's `step` is awaited.
+    """
+
+    def __init__(self, manager: "SessionManager", session_id: int, state: GameState):
+        self._manager = manager
+        self.session_id = session_id
+        self.state = state
+        self._pending = False
+
+    @property
+    def closed(self) -> bool:
+        return self._manager.sessions.get(self.session_id) is not self
+
+    async def step(self, action: int) -> StepInfo:
+        """
+        Queues one step and waits for the batch it joins. Illegal actions end
+        the game with the configured penalty, as with `GameState.step`. A
+        cancelled step may still be applied by its batch. Raises RuntimeError
+        if the session is closed or already has a step pending.
+        """
+        if self.closed:
+            raise RuntimeError(f"Session {self.session_id} is closed.")
+        if self._pending:
+            raise RuntimeError(f"Session {self.session_id} already has a step pending.")
+        self._pending = True
+        try:
+            return await self._manager._submit(self, action)
+        finally:
+            self._pending = False
+
+
+class SessionManager:
+    """
+    Serves many concurrent `GameSession`s from one asyncio event loop.
+    Steps awaited by different sessions are queued and applied together in
+    a single native batch call that runs on `executor` (the loop's default
+    executor when None) with the GIL released, so the event loop never
+    blocks on the engine. While a batch runs, new steps queue up for the
+    next one; at most `max_batch` steps are applied per call.
+    """
+
+    def __init__(
+        self,
+        config: EnvConfig | None = None,
+        max_batch: int = 1024,
+        executor: Executor | None = None,
+    ):
+        if max_batch <= 0:
+            raise ValueError(f"max_batch must be positive, got {max_batch}.")
+        self.env_config: EnvConfig = config if config else EnvConfig()
+        self.max_batch = max_batch
+        self.sessions: dict[int, GameSession] = {}
+        self._executor = executor
+        self._ids = itertools.count()
+        self._queue: list[tuple[GameSession, int, asyncio.Future[StepInfo]]] = []
+        self._worker: asyncio.Task[None] | None = None
+        self.batches = 0  # Native batch calls made so far
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def __contains__(self, session_id: object) -> bool:
+        return session_id in self.sessions
+
+    def create_session(self, seed: int | None = None) -> GameSession:
+        """Starts a new game and returns its session."""
+        session_id = next(self._ids)
+        session = GameSession(self, session_id, GameState(self.env_config, seed))
+        self.sessions[session_id] = session
+        return session
+
+    def get(self, session_id: int) -> GameSession:
+        """Returns an open session by id; raises KeyError if unknown or closed."""
+        return self.sessions[session_id]
+
+    def close_session(self, session: GameSession | int) -> None:
+        """Closes a session; a step already queued for it still completes."""
+        session_id = session if isinstance(session, int) else session.session_id
+        self.sessions.pop(session_id, None)
+
+    def _submit(self, session: GameSession, action: int) -> "asyncio.Future[StepInfo]":
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[StepInfo] = loop.create_future()
+        self._queue.append((session, int(action), future))
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run_batches())
+        return future
+
+    async def _run_batches(self) -> None:
+        """Applies queued steps in batches until the queue is empty."""
+        loop = asyncio.get_running_loop()
+        while self._queue:
+            batch = self._queue[: self.max_batch]
+            del self._queue[: self.max_batch]
+            states = [session.state.cpp_state for session, _, _ in batch]
+            actions = np.fromiter(
+                (action for _, action, _ in batch), dtype=np.int64, count=len(batch)
+            )
+            try:
+                result = cast(
+                    "dict[str, np.ndarray]",
+                    await loop.run_in_executor(
+                        self._executor, cpp_module.step_ex_batch, states, actions
+                    ),
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            columns = [
+                result[name].tolist()
+                for name in (
+                    "reward",
+                    "done",
+                    "placed_count",
+                    "cleared_count",
+                    "lines_cleared",
+                    "refilled",
+                )
+            ]
+            for (session, _, future), fields in zip(
+                batch, zip(*columns, strict=True), strict=True
+            ):
+                session.state._clear_caches()
+                if not future.done():
+                    future.set_result(StepInfo(*fields))
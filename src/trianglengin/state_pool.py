@@ -0,0 +1,95 @@
+# File: src/trianglengin/state_pool.py
+from typing import Any
+
+import numpy as np
+
+from .config import EnvConfig
+from .game_interface import GameState, Shape, cpp_module
+
+
+class PooledGameState(GameState):
+    """
+    A GameState view of a pooled state. The view pins its slot, so the
+    native state stays alive while the view exists, and every access checks
+    the handle: once the state is released or the pool cleared, using the
+    view raises IndexError instead of reading another state.
+    """
+
+    def __init__(self, pin: Any, config: EnvConfig):
+        self._pin = pin
+        self.env_config = config
+        self._cached_shapes = None
+        self._cached_grid_data = None
+        self.initial_seed = None
+
+    @property
+    def _cpp_state(self) -> Any:
+        return self._pin.state()
+
+    @property
+    def handle(self) -> int:
+        return int(self._pin.handle)
+
+    @property
+    def valid(self) -> bool:
+        """True until the state is released or its pool cleared."""
+        return bool(self._pin.valid)
+
+    def get_shapes(self) -> list[Shape | None]:
+        self._pin.state()  # Cached shapes must not outlive the handle
+        return super().get_shapes()
+
+    def get_grid_data_np(self) -> dict[str, np.ndarray]:
+        self._pin.state()
+        return super().get_grid_data_np()
+
+
+class StatePool:
+    """
+    An arena of game states allocated from contiguous native slabs and
+    addressed by integer handles, for search trees holding many states.
+    Released slots are reused and `clear` releases every state at once
+    while keeping the slabs, so memory use stays predictable. Handles carry
+    a generation, so a released handle never refers to the slot's next state.
+    """
+
+    def __init__(self, config: EnvConfig | None = None, slab_size: int = 1024):
+        if slab_size <= 0:
+            raise ValueError(f"slab_size must be positive, got {slab_size}.")
+        self.env_config: EnvConfig = config if config else EnvConfig()
+        self._cpp_pool = cpp_module.StatePoolCpp(slab_size)
+
+    def clone(self, src: GameState | int) -> int:
+        """Copies a GameState or a pooled state (by handle) into the pool; returns the new handle."""
+        if isinstance(src, GameState):
+            if (
+                src.env_config is not self.env_config
+                and src.env_config != self.env_config
+            ):
+                raise ValueError("State config does not match the pool's EnvConfig.")
+            return int(self._cpp_pool.clone(src.cpp_state))
+        return int(self._cpp_pool.clone(src))
+
+    def state(self, handle: int) -> PooledGameState:
+        """
+        Returns a GameState view of a pooled state. The view shares the pooled
+        storage, so stepping it updates the pool. Raises IndexError for stale
+        handles, and the view raises on use once the handle is released.
+        """
+        return PooledGameState(self._cpp_pool.pin(handle), self.env_config)
+
+    def release(self, handle: int) -> None:
+        """Destroys a pooled state and frees its slot for reuse."""
+        self._cpp_pool.release(handle)
+
+    def clear(self) -> None:
+        """Destroys all pooled states, keeping the allocated slabs."""
+        self._cpp_pool.clear()
+
+    @property
+    def capacity(self) -> int:
+        """Returns the number of slots in the allocated slabs."""
+        return int(self._cpp_pool.capacity)
+
+    def __len__(self) -> int:
+        return len(self._cpp_pool)
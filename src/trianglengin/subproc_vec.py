@@ -0,0 +1,330 @@
+# File: src/trianglengin/subproc_vec.py
+import contextlib
+import multiprocessing as mp
+import random
+from collections.abc import Sequence
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from types import TracebackType
+from typing import cast
+
+import numpy as np
+from typing_extensions import Self
+
+from .config import EnvConfig
+from .game_interface import observation_shape
+from .vec_interface import VecGameState
+
+_ALIGN = 64  # Byte alignment of each shared buffer
+
+
+def _buffer_specs(config: EnvConfig) -> list[tuple[str, tuple[int, ...], type]]:
+    """Returns (name, per-env shape, dtype) of each buffer in the shared block."""
+    return [
+        ("observations", observation_shape(config), np.float32),
+        ("masks", (config.NUM_SHAPE_SLOTS, config.ROWS, config.COLS), np.bool_),
+        ("actions", (), np.int64),
+        ("rewards", (), np.float64),
+        ("dones", (), np.bool_),
+    ]
+
+
+def _layout(config: EnvConfig, num_envs: int) -> tuple[dict[str, int], int]:
+    """Returns the byte offset of each shared buffer and the total size."""
+    offsets: dict[str, int] = {}
+    size = 0
+    for name, shape, dtype in _buffer_specs(config):
+        offsets[name] = size
+        nbytes = (
+            num_envs * int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+        )
+        size += (nbytes + _ALIGN - 1) // _ALIGN * _ALIGN
+    return offsets, max(size, _ALIGN)
+
+
+class _SharedBlock:
+    """
+    Keeps a shared memory block mapped while NumPy arrays over it exist.
+    Arrays built from it hold it as their base, so the block is unmapped
+    only when the last of them is garbage collected.
+    """
+
+    def __init__(self, shm: SharedMemory):
+        self._shm = shm
+        # The temporary array is dropped at once, so no buffer export remains
+        address = np.frombuffer(cast("memoryview", shm.buf), np.uint8).ctypes.data
+        self.__array_interface__ = {
+            "shape": (shm.size,),
+            "typestr": "|u1",
+            "data": (address, False),
+            "version": 3,
+        }
+
+    def __del__(self) -> None:
+        self._shm.close()
+
+
+def _views(
+    shm: SharedMemory, config: EnvConfig, num_envs: int
+) -> dict[str, np.ndarray]:
+    """
+    Maps the shared buffers of `num_envs` environments as NumPy arrays. The
+    arrays keep the mapping alive, so `shm` must not be closed while they
+    are still in use.
+    """
+    raw = np.asarray(_SharedBlock(shm))
+    offsets, _ = _layout(config, num_envs)
+    return {
+        name: np.ndarray(
+            (num_envs, *shape), dtype=dtype, buffer=raw, offset=offsets[name]
+        )
+        for name, shape, dtype in _buffer_specs(config)
+    }
+
+
+def _serve(
+    conn: Connection,
+    shm: SharedMemory,
+    config: EnvConfig,
+    num_envs: int,
+    lo: int,
+    seeds: list[int],
+) -> None:
+    """Steps environments [lo, lo + len(seeds)) on command until told to close."""
+    views = {
+        name: view[lo : lo + len(seeds)]
+        for name, view in _views(shm, config, num_envs).items()
+    }
+    obs, masks, dones = views["observations"], views["masks"], views["dones"]
+    vec = VecGameState(len(seeds), config, seeds)
+
+    def publish() -> None:
+        vec.get_observations(out=obs)
+        vec.valid_action_mask(out=masks)
+        dones[:] = vec.is_over()
+
+    publish()
+    conn.send(None)
+    while True:
+        command = conn.recv()
+        if command == "close":
+            return
+        try:
+            if command == "step":
+                views["rewards"][:] = vec.step(views["actions"])[0]
+            elif command == "reset":
+                vec.reset()
+                views["rewards"][:] = 0.0
+            else:
+                raise ValueError(f"Unknown command {command!r}.")
+            publish()
+            conn.send(None)
+        except Exception as e:  # Reported to the parent
+            conn.send(repr(e))
+
+
+def _worker(
+    conn: Connection,
+    shm_name: str,
+    config: EnvConfig,
+    num_envs: int,
+    lo: int,
+    seeds: list[int],
+) -> None:
+    """Worker process entry point: attaches the shared block and serves it."""
+    shm = SharedMemory(name=shm_name)
+    try:
+        _serve(conn, shm, config, num_envs, lo, seeds)
+    except (EOFError, KeyboardInterrupt):
+        pass  # Parent went away
+    finally:
+        conn.close()
+        shm.close()
+
+
+class SubprocVecGameState:
+    """
+    A batch of environments sharded across worker processes, for setups where
+    threads cannot run the engine in parallel. Each worker owns a contiguous
+    shard and writes observations, valid-action masks, rewards and done flags
+    straight into shared memory; actions are read from a shared buffer, so a
+    batch step only exchanges a one-word message per worker.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        config: EnvConfig | None = None,
+        seeds: Sequence[int] | None = None,
+        num_workers: int | None = None,
+        start_method: str | None = None,
+    ):
+        if num_envs <= 0:
+            raise ValueError(f"num_envs must be positive, got {num_envs}.")
+        if seeds is not None and len(seeds) != num_envs:
+            raise ValueError(f"Expected {num_envs} seeds, got {len(seeds)}.")
+        self.env_config: EnvConfig = config if config else EnvConfig()
+        used_seeds = (
+            list(seeds)
+            if seeds is not None
+            else [random.randint(0, 2**32 - 1) for _ in range(num_envs)]
+        )
+        workers = min(num_envs, num_workers or mp.cpu_count())
+        _, size = _layout(self.env_config, num_envs)
+        self._shm = SharedMemory(create=True, size=size)
+        # Views handed out may outlive close(); they keep the block mapped
+        self._views = _views(self._shm, self.env_config, num_envs)
+        self._conns: list[Connection] = []
+        self._procs: list[mp.process.BaseProcess] = []
+        self._closed = False
+        ctx = cast("mp.context.DefaultContext", mp.get_context(start_method))
+        bounds = np.linspace(0, num_envs, workers + 1).astype(int)
+        try:
+            for k in range(workers):
+                lo, hi = int(bounds[k]), int(bounds[k + 1])
+                parent_conn, child_conn = ctx.Pipe()
+                proc = ctx.Process(
+                    target=_worker,
+                    args=(
+                        child_conn,
+                        self._shm.name,
+                        self.env_config,
+                        num_envs,
+                        lo,
+                        used_seeds[lo:hi],
+                    ),
+                    daemon=True,
+                )
+                proc.start()
+                child_conn.close()
+                self._conns.append(parent_conn)
+                self._procs.append(proc)
+            self._wait()
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def num_envs(self) -> int:
+        """Returns the number of environments in the batch."""
+        return int(self._views["actions"].shape[0])
+
+    @property
+    def num_workers(self) -> int:
+        """Returns the number of worker processes."""
+        return len(self._procs)
+
+    @property
+    def action_dim(self) -> int:
+        """Returns the size of the flat action space of each environment."""
+        cfg = self.env_config
+        return cfg.NUM_SHAPE_SLOTS * cfg.ROWS * cfg.COLS
+
+    def __len__(self) -> int:
+        return self.num_envs
+
+    @property
+    def observations(self) -> np.ndarray:
+        """
+        Shared (num_envs, 2 + NUM_SHAPE_SLOTS, ROWS, COLS) observation buffer,
+        updated in place by every `step` and `reset`.
+        """
+        return self._views["observations"]
+
+    @property
+    def action_masks(self) -> np.ndarray:
+        """Shared (num_envs, NUM_SHAPE_SLOTS, ROWS, COLS) valid-action buffer."""
+        return self._views["masks"]
+
+    def _send(self, command: str) -> None:
+        if self._closed:
+            raise RuntimeError("SubprocVecGameState is closed.")
+        for conn in self._conns:
+            conn.send(command)
+        self._wait()
+
+    def _wait(self) -> None:
+        errors = []
+        for conn in self._conns:
+            try:
+                error = conn.recv()
+            except EOFError:
+                error = "worker process exited unexpectedly"
+            if error is not None:
+                errors.append(error)
+        if errors:
+            raise RuntimeError(f"Worker failed: {errors[0]}")
+
+    def reset(self) -> None:
+        """Resets every environment in the batch."""
+        self._send("reset")
+
+    def step(
+        self, actions: np.ndarray | Sequence[int]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Steps every environment with its action in the workers.
+        Returns: copies of (rewards, dones); observations and masks are
+        refreshed in the shared buffers.
+        """
+        actions_np = np.asarray(actions, dtype=np.int64).reshape(-1)
+        if len(actions_np) != self.num_envs:
+            raise ValueError(
+                f"Expected {self.num_envs} actions, got {len(actions_np)}."
+            )
+        self._views["actions"][:] = actions_np
+        self._send("step")
+        return self._views["rewards"].copy(), self._views["dones"].copy()
+
+    def get_observations(self, out: np.ndarray | None = None) -> np.ndarray:
+        """Returns a copy of the current observations, optionally filling `out`."""
+        if out is None:
+            return np.array(self.observations)
+        np.copyto(out, self.observations)
+        return out
+
+    def valid_action_mask(self, out: np.ndarray | None = None) -> np.ndarray:
+        """Returns a copy of the current valid-action masks, optionally filling `out`."""
+        if out is None:
+            return np.array(self.action_masks)
+        np.copyto(out, self.action_masks)
+        return out
+
+    def is_over(self) -> np.ndarray:
+        """Returns a bool array with the game-over flag of each environment."""
+        return np.array(self._views["dones"])
+
+    def close(self) -> None:
+        """
+        Stops the workers and releases the shared memory. Arrays obtained from
+        `observations` or `action_masks` stay readable; the block is unmapped
+        once the last of them is garbage collected.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for conn in self._conns:
+            with contextlib.suppress(OSError):  # Worker already exited
+                conn.send("close")
+            conn.close()
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+        self._views = {}
+        self._shm.unlink()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        if not getattr(self, "_closed", True):
+            self.close()
@@ -0,0 +1,499 @@
+# File: src/trianglengin/trajectory.py
+"""
+Compact binary trajectory files.
+
+A trajectory file is a file header followed by append-only episode chunks,
+all little-endian and 8-byte aligned so every array can be viewed in place
+from a memory map:
+
+    file header   magic, version, config fingerprint, config JSON
+    chunk header  magic, flags, seed, fingerprint, steps, board bytes, slots,
+                  payload size
+    payload       actions int32[steps], rewards float32[steps] and, if boards
+                  are stored, occupancy uint8[steps, board_bytes] (bit-packed,
+                  little-endian bit order) and slot template ids
+                  int8[steps, slots], each taken before the step's action
+
+A game is fully determined by its seed and actions, so boards are optional.
+A chunk that was cut short (e.g. by a crash) is ignored by readers and
+truncated when the file is reopened for appending.
+"""
+
+import hashlib
+import logging
+import mmap
+import queue
+import struct
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO, NamedTuple
+
+import numpy as np
+from typing_extensions import Self
+
+from .config import EnvConfig
+from .game_interface import GameState, StepInfo
+from .vec_interface import VecGameState
+
+log = logging.getLogger(__name__)
+
+FILE_MAGIC = b"TRIATRAJ"
+CHUNK_MAGIC = b"TEPI"
+FORMAT_VERSION = 1
+
+# Buffers a trajectory file can be parsed from (file contents or a memory map)
+ByteBuffer = bytes | bytearray | memoryview | mmap.mmap
+
+# Chunk flags
+FLAG_BOARDS = 1
+FLAG_TERMINAL = 2
+
+_FILE_HEADER = struct.Struct("<8sIIQ")  # magic, version, config JSON size, fingerprint
+_CHUNK_HEADER = struct.Struct("<4sIQQIIIIQ")
+# magic, flags, seed, fingerprint, steps, board bytes, slots, reserved, payload size
+
+
+def _align8(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def config_fingerprint(config: EnvConfig) -> int:
+    """Returns a stable 64-bit fingerprint of an EnvConfig's values."""
+    digest = hashlib.blake2b(
+        config.model_dump_json().encode("utf-8"), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "little")
+
+
+def board_bytes(config: EnvConfig) -> int:
+    """Returns the size of one bit-packed occupancy snapshot in bytes."""
+    return (config.ROWS * config.COLS + 7) // 8
+
+
+class ChunkInfo(NamedTuple):
+    """Location and header fields of one episode chunk in a trajectory file."""
+
+    offset: int  # Offset of the payload
+    seed: int
+    num_steps: int
+    flags: int
+    board_bytes: int
+    num_slots: int
+
+
+def encode_file_header(config: EnvConfig) -> bytes:
+    """Serializes the file header for trajectories recorded with `config`."""
+    config_json = config.model_dump_json().encode("utf-8")
+    header = _FILE_HEADER.pack(
+        FILE_MAGIC, FORMAT_VERSION, len(config_json), config_fingerprint(config)
+    )
+    raw = header + config_json
+    return raw + b"\0" * (_align8(len(raw)) - len(raw))
+
+
+def decode_file_header(buf: ByteBuffer) -> tuple[EnvConfig, int, int]:
+    """
+    Parses a file header.
+    Returns: (config, fingerprint, offset of the first chunk)
+    """
+    if len(buf) < _FILE_HEADER.size:
+        raise ValueError("Not a trajectory file: header is truncated.")
+    magic, version, json_size, fingerprint = _FILE_HEADER.unpack_from(buf, 0)
+    if magic != FILE_MAGIC:
+        raise ValueError("Not a trajectory file: bad magic.")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported trajectory format version {version}.")
+    end = _FILE_HEADER.size + json_size
+    if len(buf) < end:
+        raise ValueError("Not a trajectory file: header is truncated.")
+    config = EnvConfig.model_validate_json(bytes(buf[_FILE_HEADER.size : end]))
+    return config, fingerprint, _align8(end)
+
+
+def scan_chunks(
+    buf: ByteBuffer, start: int, fingerprint: int
+) -> tuple[list[ChunkInfo], int]:
+    """
+    Walks the chunk headers from `start` without touching the payloads.
+    Returns: (complete chunks, offset just past the last complete chunk)
+    """
+    chunks: list[ChunkInfo] = []
+    offset = start
+    size = len(buf)
+    while offset + _CHUNK_HEADER.size <= size:
+        (magic, flags, seed, chunk_fp, steps, nbytes, slots, _, payload) = (
+            _CHUNK_HEADER.unpack_from(buf, offset)
+        )
+        if magic != CHUNK_MAGIC or chunk_fp != fingerprint:
+            break
+        payload_start = offset + _CHUNK_HEADER.size
+        if payload_start + payload > size:
+            break
+        chunks.append(ChunkInfo(payload_start, seed, steps, flags, nbytes, slots))
+        offset = payload_start + payload
+    return chunks, offset
+
+
+# Per-chunk index of a trajectory file (payload offset, as in ChunkInfo)
+INDEX_DTYPE = np.dtype(
+    [("seed", "<u8"), ("offset", "<u8"), ("num_steps", "<u4"), ("flags", "<u4")]
+)
+
+
+def build_index(path: str | Path) -> np.ndarray:
+    """Returns the INDEX_DTYPE index of a trajectory file, reading only chunk headers."""
+    with (
+        Path(path).open("rb") as handle,
+        mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buf,
+    ):
+        _, fingerprint, start = decode_file_header(buf)
+        chunks, _ = scan_chunks(buf, start, fingerprint)
+    return np.array(
+        [(c.seed, c.offset, c.num_steps, c.flags) for c in chunks], dtype=INDEX_DTYPE
+    )
+
+
+@dataclass
+class Episode:
+    """Steps of one episode, as recorded or read back from a chunk."""
+
+    seed: int
+    actions: list[int] = field(default_factory=list)
+    rewards: list[float] = field(default_factory=list)
+    boards: list[bytes] = field(default_factory=list)
+    slots: list[list[int]] = field(default_factory=list)
+    terminal: bool = False
+
+
+def encode_chunk(episode: Episode, config: EnvConfig, with_boards: bool) -> bytes:
+    """Serializes one episode as a chunk (header and payload)."""
+    steps = len(episode.actions)
+    nbytes = board_bytes(config) if with_boards else 0
+    slots = config.NUM_SHAPE_SLOTS if with_boards else 0
+    parts = [
+        np.asarray(episode.actions, dtype="<i4").tobytes(),
+        np.asarray(episode.rewards, dtype="<f4").tobytes(),
+    ]
+    parts = [part + b"\0" * (_align8(len(part)) - len(part)) for part in parts]
+    if with_boards:
+        boards = b"".join(episode.boards)
+        slot_ids = np.asarray(episode.slots, dtype=np.int8).reshape(steps, slots)
+        parts.append(boards + b"\0" * (_align8(len(boards)) - len(boards)))
+        slot_raw = slot_ids.tobytes()
+        parts.append(slot_raw + b"\0" * (_align8(len(slot_raw)) - len(slot_raw)))
+    payload = b"".join(parts)
+    flags = (FLAG_BOARDS if with_boards else 0) | (
+        FLAG_TERMINAL if episode.terminal else 0
+    )
+    header = _CHUNK_HEADER.pack(
+        CHUNK_MAGIC,
+        flags,
+        episode.seed,
+        config_fingerprint(config),
+        steps,
+        nbytes,
+        slots,
+        0,
+        len(payload),
+    )
+    return header + payload
+
+
+def chunk_arrays(buf: ByteBuffer, chunk: ChunkInfo) -> dict[str, np.ndarray]:
+    """
+    Returns zero-copy views of a chunk's arrays: "actions", "rewards" and, if
+    boards were stored, "boards" (steps x board bytes) and "slots".
+    """
+    steps = chunk.num_steps
+    offset = chunk.offset
+    arrays = {
+        "actions": np.frombuffer(buf, dtype="<i4", count=steps, offset=offset),
+    }
+    offset += _align8(4 * steps)
+    arrays["rewards"] = np.frombuffer(buf, dtype="<f4", count=steps, offset=offset)
+    offset += _align8(4 * steps)
+    if chunk.flags & FLAG_BOARDS:
+        nbytes = chunk.board_bytes * steps
+        arrays["boards"] = np.frombuffer(
+            buf, dtype=np.uint8, count=nbytes, offset=offset
+        ).reshape(steps, chunk.board_bytes)
+        offset += _align8(nbytes)
+        arrays["slots"] = np.frombuffer(
+            buf, dtype=np.int8, count=chunk.num_slots * steps, offset=offset
+        ).reshape(steps, chunk.num_slots)
+    return arrays
+
+
+class TrajectoryWriter:
+    """
+    Appends encoded episodes to a trajectory file from a background thread,
+    so producers never block on I/O unless `max_pending` episodes are queued.
+    Errors raised by the writer thread are re-raised on the next call.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        config: EnvConfig | None = None,
+        store_boards: bool = False,
+        max_pending: int = 256,
+    ):
+        self.path = Path(path)
+        self.env_config: EnvConfig = config if config else EnvConfig()
+        self.store_boards = store_boards
+        self._file = self._open(self.path)
+        self._queue: queue.Queue[Episode | bytes | None] = queue.Queue(
+            maxsize=max_pending
+        )
+        self._error: BaseException | None = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="trajectory-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _open(self, path: Path) -> BinaryIO:
+        """Opens `path` for appending, writing the header or validating it."""
+        handle: BinaryIO
+        if not path.exists() or path.stat().st_size == 0:
+            handle = path.open("wb")
+            handle.write(encode_file_header(self.env_config))
+            return handle
+        handle = path.open("r+b")
+        try:
+            # Map rather than read the file: shards can be many GB
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                config, fingerprint, start = decode_file_header(buf)
+                if fingerprint != config_fingerprint(self.env_config):
+                    raise ValueError(
+                        f"{path} was recorded with a different EnvConfig ({config})."
+                    )
+                _, end = scan_chunks(buf, start, fingerprint)
+                size = len(buf)
+            if end < size:
+                log.warning(f"Truncating incomplete trailing chunk of {path}.")
+                handle.truncate(end)
+            handle.seek(end)
+        except BaseException:
+            handle.close()
+            raise
+        return handle
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    self._file.flush()
+                    if self._closed:
+                        return
+                    continue
+                if self._error is None:
+                    self._file.write(
+                        item
+                        if isinstance(item, bytes)
+                        else encode_chunk(item, self.env_config, self.store_boards)
+                    )
+            except BaseException as e:  # Surfaced to the producer
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_pending_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"Trajectory writer failed: {error}") from error
+
+    def write(self, episode: Episode) -> None:
+        """Queues an episode to be appended as one chunk."""
+        if self._closed:
+            raise RuntimeError("TrajectoryWriter is closed.")
+        self._raise_pending_error()
+        self._queue.put(episode)
+
+    def write_chunk(self, chunk: bytes) -> None:
+        """
+        Queues an already encoded chunk (see `encode_chunk`) to be appended
+        as is. Raises ValueError if it was not encoded for this file's config
+        and board setting.
+        """
+        if self._closed:
+            raise RuntimeError("TrajectoryWriter is closed.")
+        self._raise_pending_error()
+        chunks, end = scan_chunks(chunk, 0, config_fingerprint(self.env_config))
+        if len(chunks) != 1 or end != len(chunk):
+            raise ValueError("Expected exactly one chunk encoded for this EnvConfig.")
+        if bool(chunks[0].flags & FLAG_BOARDS) != self.store_boards:
+            raise ValueError("Chunk board storage does not match the writer's.")
+        self._queue.put(chunk)
+
+    def flush(self) -> None:
+        """Blocks until all queued episodes are written and flushed."""
+        if not self._closed:
+            self._queue.put(None)
+            self._queue.join()
+        self._raise_pending_error()
+
+    def close(self) -> None:
+        """Writes all queued episodes, stops the writer thread and closes the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        self._raise_pending_error()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class TrajectoryRecorder:
+    """
+    Records the games played through it into a trajectory file, or, with
+    `path=None`, into a list of encoded chunks collected by `take_chunks`.
+    Each `GameState` stepped via `step` (or each environment of a
+    `VecGameState` stepped via `step_vec`) starts an episode on its first
+    step and submits it to the background writer when it ends. States must
+    be fresh (created from a seed and not yet stepped or reset) so that the
+    recorded seed and actions reproduce the game; states that are already
+    over are stepped without being recorded.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None,
+        config: EnvConfig | None = None,
+        store_boards: bool = False,
+        max_pending: int = 256,
+    ):
+        self.writer = (
+            TrajectoryWriter(path, config, store_boards, max_pending)
+            if path is not None
+            else None
+        )
+        self.env_config: EnvConfig = (
+            self.writer.env_config if self.writer else config if config else EnvConfig()
+        )
+        self.store_boards = store_boards
+        self._episodes: dict[int, tuple[GameState, Episode]] = {}
+        self._chunks: list[bytes] = []
+
+    def _submit(self, episode: Episode) -> None:
+        if self.writer is not None:
+            self.writer.write(episode)
+        else:
+            self._chunks.append(
+                encode_chunk(episode, self.env_config, self.store_boards)
+            )
+
+    def take_chunks(self) -> list[bytes]:
+        """Returns and forgets the chunks of the episodes finished so far (path=None)."""
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+    def _episode_for(self, state: GameState) -> Episode | None:
+        """Returns the open episode of `state`, starting one if needed (None if over)."""
+        entry = self._episodes.get(id(state))
+        if entry is not None:
+            return entry[1]
+        if state.is_over():
+            return None
+        if state.env_config != self.env_config:
+            raise ValueError("State config does not match the recorder's EnvConfig.")
+        if state.initial_seed is None or state.current_step != 0:
+            raise ValueError(
+                "Recording must start on a fresh GameState created from a seed."
+            )
+        episode = Episode(seed=state.initial_seed)
+        self._episodes[id(state)] = (state, episode)
+        return episode
+
+    def _snapshot(self, state: GameState, episode: Episode) -> None:
+        cpp_state = state.cpp_state
+        episode.boards.append(cpp_state.get_packed_occupancy())
+        episode.slots.append(cpp_state.get_slot_template_ids())
+
+    def _append(
+        self,
+        state: GameState,
+        episode: Episode | None,
+        action: int,
+        reward: float,
+        done: bool,
+    ) -> None:
+        if episode is None:
+            return
+        episode.actions.append(action)
+        episode.rewards.append(reward)
+        if done:
+            episode.terminal = True
+            del self._episodes[id(state)]
+            self._submit(episode)
+
+    def step(self, state: GameState, action: int) -> StepInfo:
+        """Steps `state` with `action` and records the step."""
+        episode = self._episode_for(state)
+        if self.store_boards and episode is not None:
+            self._snapshot(state, episode)
+        info = state.step_ex(action)
+        self._append(state, episode, action, info.reward, info.done)
+        return info
+
+    def step_vec(
+        self, vec: VecGameState, actions: np.ndarray | Sequence[int]
+    ) -> dict[str, np.ndarray]:
+        """Steps every environment of `vec` (see `VecGameState.step_ex`) and records the steps."""
+        episodes = [self._episode_for(gs) for gs in vec.states]
+        if self.store_boards:
+            for gs, episode in zip(vec.states, episodes, strict=True):
+                if episode is not None:
+                    self._snapshot(gs, episode)
+        actions_arr = np.asarray(actions, dtype=np.int64)
+        result = vec.step_ex(actions_arr)
+        rewards, dones = result["reward"], result["done"]
+        for i, (gs, episode) in enumerate(zip(vec.states, episodes, strict=True)):
+            self._append(
+                gs, episode, int(actions_arr[i]), float(rewards[i]), bool(dones[i])
+            )
+        return result
+
+    def finish(self, state: GameState) -> None:
+        """Submits the episode of `state` as truncated (not terminal), if any."""
+        entry = self._episodes.pop(id(state), None)
+        if entry is not None and entry[1].actions:
+            self._submit(entry[1])
+
+    def flush(self) -> None:
+        """Blocks until all submitted episodes are on disk."""
+        if self.writer is not None:
+            self.writer.flush()
+
+    def close(self) -> None:
+        """Submits unfinished episodes as truncated and closes the file."""
+        for state, _ in list(self._episodes.values()):
+            self.finish(state)
+        if self.writer is not None:
+            self.writer.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
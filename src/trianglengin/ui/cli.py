@@ -1,21 +1,25 @@
 # File: src/trianglengin/ui/cli.py
 import logging
+import os
 import random
 import sys
-from typing import Annotated
+from pathlib import Path
+from typing import Annotated, cast
 
 import numpy as np
 import typer  # Now a required dependency
 
 # Use absolute imports from core engine
 from trianglengin.config import EnvConfig
+from trianglengin.distributed import Coordinator, run_actor
+from trianglengin.selfplay import POLICIES, Policy, SelfPlayStats, run_selfplay
 
 # Import Application directly
 from trianglengin.ui.app import Application
 
 app = typer.Typer(
     name="trianglengin",
-    help="Core Triangle Engine - Interactive Modes.",
+    help="Core Triangle Engine - Interactive Modes and Self-Play.",
     add_completion=False,
 )
 
@@ -119,5 +123,148 @@ def debug(
     run_interactive_mode(mode="debug", seed=seed, log_level=log_level)
 
 
+@app.command()
+def selfplay(
+    out_dir: Annotated[
+        Path, typer.Argument(help="Directory for the trajectory shards.")
+    ] = Path("selfplay"),
+    games: Annotated[
+        int, typer.Option("--games", "-n", help="Number of games to play.")
+    ] = 1000,
+    workers: Annotated[
+        int, typer.Option("--workers", "-w", help="Number of worker processes.")
+    ] = max(1, (os.cpu_count() or 1)),
+    policy: Annotated[
+        str, typer.Option("--policy", "-p", help="Built-in policy: random or greedy.")
+    ] = "random",
+    shards: Annotated[
+        int | None,
+        typer.Option("--shards", help="Number of shard files (default: 4 per worker)."),
+    ] = None,
+    batch_size: Annotated[
+        int, typer.Option("--batch-size", help="Games played at once per worker.")
+    ] = 64,
+    store_boards: Annotated[
+        bool,
+        typer.Option("--store-boards", help="Store bit-packed boards in trajectories."),
+    ] = False,
+    log_level: LogLevelOption = "INFO",
+    seed: SeedOption = 0,
+) -> None:
+    """Generate self-play trajectories with a built-in policy across a worker pool."""
+    setup_logging(log_level)
+    if policy not in POLICIES:
+        raise typer.BadParameter(
+            f"Unknown policy '{policy}'. Choose from: {', '.join(POLICIES)}."
+        )
+
+    def report(stats: SelfPlayStats) -> None:
+        typer.echo(
+            f"{stats.games}/{games} games, {stats.steps} steps, "
+            f"{stats.steps_per_sec:,.0f} steps/s, {stats.games_per_sec:,.1f} games/s"
+        )
+
+    stats = run_selfplay(
+        out_dir,
+        games,
+        policy=cast("Policy", policy),
+        workers=workers,
+        num_shards=shards,
+        batch_size=batch_size,
+        base_seed=seed,
+        store_boards=store_boards,
+        progress=report,
+    )
+    typer.echo(f"Wrote {len(stats.shards)} shards to {out_dir}.")
+
+
+AuthkeyOption = Annotated[
+    str,
+    typer.Option(
+        "--authkey",
+        envvar="TRIANGLENGIN_AUTHKEY",
+        help="Shared secret authenticating actors and coordinator.",
+    ),
+]
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """Parses HOST:PORT."""
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise typer.BadParameter(f"Expected HOST:PORT, got '{address}'.")
+    return host, int(port)
+
+
+@app.command()
+def coordinator(
+    out_file: Annotated[Path, typer.Argument(help="Trajectory file to write.")],
+    authkey: AuthkeyOption,
+    games: Annotated[
+        int, typer.Option("--games", "-n", help="Number of games to play.")
+    ] = 1000,
+    bind: Annotated[
+        str,
+        typer.Option(
+            "--bind",
+            help="HOST:PORT to listen on for actors. Defaults to localhost; "
+            "pass an explicit address (e.g. 0.0.0.0:7650) to accept remote actors.",
+        ),
+    ] = "127.0.0.1:7650",
+    policy: Annotated[
+        str, typer.Option("--policy", "-p", help="Built-in policy: random or greedy.")
+    ] = "random",
+    games_per_task: Annotated[
+        int, typer.Option("--games-per-task", help="Games handed out per task.")
+    ] = 16,
+    store_boards: Annotated[
+        bool,
+        typer.Option("--store-boards", help="Store bit-packed boards in trajectories."),
+    ] = False,
+    log_level: LogLevelOption = "INFO",
+    seed: SeedOption = 0,
+) -> None:
+    """Hand out self-play games to actors over TCP and record their trajectories."""
+    setup_logging(log_level)
+    if policy not in POLICIES:
+        raise typer.BadParameter(
+            f"Unknown policy '{policy}'. Choose from: {', '.join(POLICIES)}."
+        )
+    server = Coordinator(
+        out_file,
+        games,
+        authkey.encode(),
+        policy=policy,
+        address=parse_address(bind),
+        games_per_task=games_per_task,
+        base_seed=seed,
+        store_boards=store_boards,
+        progress=lambda stats: typer.echo(
+            f"{stats.games}/{games} games, {stats.steps_per_sec:,.0f} steps/s"
+        ),
+    )
+    host, port = server.address
+    typer.echo(f"Coordinator listening on {host}:{port}.")
+    server.serve()
+    typer.echo(f"Wrote {server.stats.games} games to {out_file}.")
+
+
+@app.command()
+def actor(
+    address: Annotated[str, typer.Argument(help="Coordinator HOST:PORT.")],
+    authkey: AuthkeyOption,
+    batch_size: Annotated[
+        int, typer.Option("--batch-size", help="Games played at once.")
+    ] = 64,
+    log_level: LogLevelOption = "INFO",
+) -> None:
+    """Play self-play tasks for a coordinator until it has enough games."""
+    setup_logging(log_level)
+    games_played, steps = run_actor(
+        parse_address(address), authkey.encode(), batch_size=batch_size
+    )
+    typer.echo(f"Played {games_played} games ({steps} steps).")
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,234 @@
+# File: src/trianglengin/vec_interface.py
+import random
+from collections.abc import Sequence
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import cast
+
+import numpy as np
+
+from .config import EnvConfig
+from .game_interface import (
+    GameState,
+    board_feature_names,
+    cpp_module,
+    observation_shape,
+)
+
+
+class VecGameState:
+    """
+    A batch of independent GameState instances sharing one EnvConfig.
+    Batched operations run as single native calls over all C++ states,
+    with the GIL released while the engine works. `step_async` steps the
+    batch on `num_threads` background threads (one shard each) so callers
+    can overlap engine work with their own.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        config: EnvConfig | None = None,
+        seeds: Sequence[int] | None = None,
+        num_threads: int = 1,
+    ):
+        if num_envs <= 0:
+            raise ValueError(f"num_envs must be positive, got {num_envs}.")
+        if seeds is not None and len(seeds) != num_envs:
+            raise ValueError(f"Expected {num_envs} seeds, got {len(seeds)}.")
+        self.env_config: EnvConfig = config if config else EnvConfig()
+        used_seeds = (
+            list(seeds)
+            if seeds is not None
+            else [random.randint(0, 2**32 - 1) for _ in range(num_envs)]
+        )
+        self.states: list[GameState] = [
+            GameState(self.env_config, seed) for seed in used_seeds
+        ]
+        self._cpp_states = [gs.cpp_state for gs in self.states]
+        self.num_threads = max(1, min(num_threads, num_envs))
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: list[Future[dict[str, np.ndarray]]] | None = None
+        # Two sets of (observation, action_mask) outputs used in turn by step_async
+        self._async_buffers: list[tuple[np.ndarray, np.ndarray]] = []
+        self._async_slot = 0
+
+    @property
+    def num_envs(self) -> int:
+        """Returns the number of environments in the batch."""
+        return len(self.states)
+
+    @property
+    def action_dim(self) -> int:
+        """Returns the size of the flat action space of each environment."""
+        cfg = self.env_config
+        return cfg.NUM_SHAPE_SLOTS * cfg.ROWS * cfg.COLS
+
+    def __len__(self) -> int:
+        return self.num_envs
+
+    def __getitem__(self, index: int) -> GameState:
+        return self.states[index]
+
+    def reset(self) -> None:
+        """Resets every environment in the batch."""
+        self._check_idle()
+        for gs in self.states:
+            gs.reset()
+
+    def step(
+        self, actions: np.ndarray | Sequence[int]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Steps every environment with its action.
+        Returns: (rewards, dones) as arrays of length num_envs.
+        """
+        info = self.step_ex(actions)
+        return info["reward"], info["done"]
+
+    def step_ex(self, actions: np.ndarray | Sequence[int]) -> dict[str, np.ndarray]:
+        """
+        Steps every environment with its action in one native call.
+        Returns parallel arrays keyed like the fields of `StepInfo`
+        (reward, done, placed_count, cleared_count, lines_cleared, refilled).
+        """
+        self._check_idle()
+        actions_np = np.asarray(actions, dtype=np.int64)
+        result = cast(
+            "dict[str, np.ndarray]",
+            cpp_module.step_ex_batch(self._cpp_states, actions_np),
+        )
+        for gs in self.states:
+            gs._clear_caches()
+        return result
+
+    def valid_action_mask(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Returns the valid-action masks with shape
+        (num_envs, NUM_SHAPE_SLOTS, ROWS, COLS), optionally filling `out`.
+        """
+        self._check_idle()
+        if out is None:
+            cfg = self.env_config
+            out = np.empty(
+                (self.num_envs, cfg.NUM_SHAPE_SLOTS, cfg.ROWS, cfg.COLS),
+                dtype=np.bool_,
+            )
+        return cast(
+            "np.ndarray", cpp_module.get_valid_action_mask_batch(self._cpp_states, out)
+        )
+
+    def get_observations(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Encodes all environments as float32 planes of shape
+        (num_envs, 2 + NUM_SHAPE_SLOTS, ROWS, COLS), optionally filling `out`.
+        """
+        self._check_idle()
+        if out is None:
+            out = np.empty(
+                (self.num_envs, *observation_shape(self.env_config)), dtype=np.float32
+            )
+        return cast(
+            "np.ndarray", cpp_module.get_observation_batch(self._cpp_states, out)
+        )
+
+    def board_features(self, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Computes the board features of all environments as
+        (num_envs, len(board_feature_names(config))) float32.
+        """
+        self._check_idle()
+        if out is None:
+            num_features = len(board_feature_names(self.env_config))
+            out = np.empty((self.num_envs, num_features), dtype=np.float32)
+        return cast(
+            "np.ndarray", cpp_module.get_board_features_batch(self._cpp_states, out)
+        )
+
+    def is_over(self) -> np.ndarray:
+        """Returns a bool array with the game-over flag of each environment."""
+        self._check_idle()
+        return np.fromiter(
+            (gs.is_over() for gs in self.states), dtype=np.bool_, count=self.num_envs
+        )
+
+    def _check_idle(self) -> None:
+        if self._pending is not None:
+            raise RuntimeError("A step_async call is pending; call step_wait first.")
+
+    def _step_shard(
+        self, lo: int, hi: int, actions: np.ndarray, obs: np.ndarray, masks: np.ndarray
+    ) -> dict[str, np.ndarray]:
+        """Steps environments [lo, hi) and encodes their next observations."""
+        states = self._cpp_states[lo:hi]
+        result = cast(
+            "dict[str, np.ndarray]", cpp_module.step_ex_batch(states, actions[lo:hi])
+        )
+        cpp_module.get_observation_batch(states, obs[lo:hi])
+        cpp_module.get_valid_action_mask_batch(states, masks[lo:hi])
+        return result
+
+    def step_async(self, actions: np.ndarray | Sequence[int]) -> None:
+        """
+        Starts stepping every environment with its action on background
+        threads and returns immediately. Collect the results with `step_wait`;
+        until then reading or stepping the batch raises RuntimeError.
+        """
+        self._check_idle()
+        actions_np = np.array(actions, dtype=np.int64).reshape(-1)
+        if len(actions_np) != self.num_envs:
+            raise ValueError(
+                f"Expected {self.num_envs} actions, got {len(actions_np)}."
+            )
+        if not self._async_buffers:
+            cfg = self.env_config
+            obs_shape = (self.num_envs, *observation_shape(cfg))
+            mask_shape = (self.num_envs, cfg.NUM_SHAPE_SLOTS, cfg.ROWS, cfg.COLS)
+            self._async_buffers = [
+                (np.empty(obs_shape, np.float32), np.empty(mask_shape, np.bool_))
+                for _ in range(2)
+            ]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.num_threads, thread_name_prefix="trianglengin-step"
+            )
+        obs, masks = self._async_buffers[self._async_slot]
+        bounds = np.linspace(0, self.num_envs, self.num_threads + 1).astype(int)
+        self._pending = [
+            self._executor.submit(
+                self._step_shard, int(lo), int(hi), actions_np, obs, masks
+            )
+            for lo, hi in zip(bounds[:-1], bounds[1:], strict=True)
+        ]
+
+    def step_wait(self) -> dict[str, np.ndarray]:
+        """
+        Waits for the pending `step_async` and returns its step records (as
+        `step_ex`) plus the post-step "observation" and "action_mask" arrays.
+        Those two are double-buffered: they stay valid while the next batch
+        steps and are overwritten by the one after it.
+        """
+        if self._pending is None:
+            raise RuntimeError("No step_async call is pending.")
+        pending, self._pending = self._pending, None
+        wait(pending)
+        shards = [future.result() for future in pending]
+        for gs in self.states:
+            gs._clear_caches()
+        result = (
+            shards[0]
+            if len(shards) == 1
+            else {key: np.concatenate([r[key] for r in shards]) for key in shards[0]}
+        )
+        obs, masks = self._async_buffers[self._async_slot]
+        self._async_slot ^= 1
+        result["observation"] = obs
+        result["action_mask"] = masks
+        return result
+
+    def close(self) -> None:
+        """Waits for any pending step and stops the background threads."""
+        if self._pending is not None:
+            self.step_wait()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,183 @@
+# File: tests/core/environment/test_free_threading.py
+# Thread-safety tests for the engine. They also pass under the GIL, but are
+# aimed at free-threaded builds, where CI runs them with the GIL disabled.
+import os
+import queue
+import subprocess
+import sys
+import sysconfig
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import TypeVar
+
+import numpy as np
+import pytest
+
+from trianglengin import EnvConfig, GameState, Shape, StatePool, VecGameState
+
+T = TypeVar("T")
+
+NUM_THREADS = 8
+# Larger than the inline small-board limits, so copies share heap buffers
+LARGE_CONFIG = EnvConfig(ROWS=12, COLS=20, PLAYABLE_RANGE_PER_ROW=[(0, 20)] * 12)
+
+
+def run_threads(fn: Callable[[int], T], num_threads: int = NUM_THREADS) -> list[T]:
+    """Runs fn(i) for i < num_threads on threads released together."""
+    barrier = threading.Barrier(num_threads)
+
+    def start(i: int) -> T:
+        barrier.wait()
+        return fn(i)
+
+    with ThreadPoolExecutor(num_threads) as pool:
+        return list(pool.map(start, range(num_threads)))
+
+
+def play_min_actions(state: GameState, steps: int) -> list[int]:
+    """Steps `state` with its smallest valid action; returns the actions taken."""
+    actions = []
+    for _ in range(steps):
+        if state.is_over():
+            break
+        actions.append(min(state.valid_actions()))
+        state.step(actions[-1])
+    return actions
+
+
+def step_copy(
+    copies: list[GameState], actions: list[int], i: int
+) -> tuple[float, np.ndarray]:
+    """Plays `actions` on copies[i]; returns its score and occupancy grid."""
+    state = copies[i]
+    for action in actions:
+        state.step(action)
+    return state.game_score(), state.get_grid_data_np()["occupied"]
+
+
+@pytest.mark.skipif(
+    not sysconfig.get_config_var("Py_GIL_DISABLED"),
+    reason="requires a free-threaded Python build",
+)
+def test_extension_keeps_gil_disabled() -> None:
+    """Verify importing the extension does not re-enable the GIL."""
+    env = {k: v for k, v in os.environ.items() if k != "PYTHON_GIL"}
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-W",
+            "always::RuntimeWarning",
+            "-c",
+            "import trianglengin.trianglengin_cpp",
+        ],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    assert "trianglengin" not in result.stderr, result.stderr
+
+
+def test_concurrent_readers_share_states(default_env_config: EnvConfig) -> None:
+    """Verify threads reading the same fresh states (lazy caches unfilled) agree."""
+    seeds = list(range(48))
+    expected = VecGameState(48, default_env_config, seeds)
+    expected_masks = expected.valid_action_mask()
+    expected_obs = expected.get_observations()
+    shared = VecGameState(48, default_env_config, seeds)
+
+    def read(i: int) -> tuple[np.ndarray, np.ndarray, list[dict[str, np.ndarray]]]:
+        if i % 2:
+            return shared.get_observations(), shared.valid_action_mask(), []
+        return (
+            shared.valid_action_mask(),
+            shared.get_observations(),
+            [gs.cpp_state.evaluate_actions() for gs in shared.states[:4]],
+        )
+
+    for i, (first, second, outcomes) in enumerate(run_threads(read)):
+        masks, obs = (second, first) if i % 2 else (first, second)
+        assert np.array_equal(masks, expected_masks)
+        assert np.array_equal(obs, expected_obs)
+        for gs, outcome in zip(expected.states, outcomes, strict=False):
+            reference = gs.cpp_state.evaluate_actions()
+            for key, value in reference.items():
+                assert np.array_equal(outcome[key], value)
+
+
+@pytest.mark.parametrize("large", [False, True])
+def test_copies_step_independently_in_parallel(
+    default_env_config: EnvConfig, large: bool
+) -> None:
+    """Verify copies of one state (sharing copy-on-write buffers) step in parallel."""
+    config = LARGE_CONFIG if large else default_env_config
+    for seed in range(10):
+        reference = GameState(config, initial_seed=seed)
+        actions = play_min_actions(reference.copy(), 12)
+        for action in actions:
+            reference.step(action)
+        source = GameState(config, initial_seed=seed)
+        copies = [source.copy() for _ in range(NUM_THREADS)]
+        del source  # Leave the copies as the only owners of shared buffers
+        if large:
+            assert copies[0].cpp_state.has_shared_storage()
+
+        for score, occupied in run_threads(partial(step_copy, copies, actions)):
+            assert score == reference.game_score()
+            assert np.array_equal(occupied, reference.get_grid_data_np()["occupied"])
+
+
+def test_custom_shapes_intern_while_slots_refill(
+    default_env_config: EnvConfig,
+) -> None:
+    """Verify interning new shapes does not disturb concurrent slot refills."""
+    rows, cols = np.indices((default_env_config.ROWS, default_env_config.COLS))
+
+    def work(i: int) -> int:
+        state = GameState(default_env_config, initial_seed=i)
+        if i % 2:  # Refills draw predefined templates
+            steps = 0
+            for _ in range(20):
+                steps += len(play_min_actions(state, 50))
+                state.reset()
+            return steps
+        for k in range(1, 100):  # Each shape is a new footprint
+            shape = Shape([(0, 0, True), (k, i, k % 2 == 0)], (0, 0, 0), 0)
+            state.can_place_many(shape, rows, cols)
+        return 0
+
+    assert sum(run_threads(work)) > 0
+
+
+def test_state_pool_release_races_with_views(default_env_config: EnvConfig) -> None:
+    """Verify releasing pooled states while other threads use their views is safe."""
+    pool = StatePool(default_env_config, slab_size=8)
+    source = GameState(default_env_config, initial_seed=0)
+    action = min(source.valid_actions())
+    handles: queue.Queue[int | None] = queue.Queue()
+    num_producers = NUM_THREADS // 2
+    producers_done = threading.Barrier(num_producers)
+
+    def work(i: int) -> int:
+        if i >= num_producers:  # Consumers release whatever was published
+            while (handle := handles.get()) is not None:
+                pool.release(handle)
+            return 0
+        stale = 0
+        for _ in range(200):
+            handle = pool.clone(source)
+            view = pool.state(handle)
+            handles.put(handle)
+            try:
+                view.step(action)
+            except IndexError:  # Released before the step
+                stale += 1
+        if producers_done.wait() == 0:  # Every handle is queued by now
+            for _ in range(NUM_THREADS - num_producers):
+                handles.put(None)
+        return stale
+
+    run_threads(work)
+    assert len(pool) == 0
@@ -1,10 +1,18 @@
 # File: tests/core/environment/test_game_state.py
 import logging
+import random
 
 import numpy as np
 import pytest
 
-from trianglengin.game_interface import GameState, Shape  # Import Shape
+from trianglengin.config import EnvConfig
+from trianglengin.game_interface import (
+    GameState,
+    Shape,
+    board_feature_names,
+    cpp_module,
+    get_topology,
+)
 
 logging.basicConfig(level=logging.INFO)
 
@@ -305,6 +313,34 @@ def test_game_state_copy(game_state: GameState) -> None:
     assert gs2.get_shapes() != shapes1_before_gs2_step
 
 
+def test_game_state_copy_from(game_state: GameState, fixed_rng: random.Random) -> None:
+    """Verify copy_from overwrites a scratch state in place and stays independent."""
+    scratch = GameState(game_state.env_config, initial_seed=999)
+    scratch_cpp = scratch.cpp_state
+    scratch.get_shapes()  # Populate wrapper caches that copy_from must clear
+    for _ in range(3):
+        if game_state.is_over():
+            break
+        game_state.step(fixed_rng.choice(sorted(game_state.valid_actions())))
+    scratch.copy_from(game_state)
+    assert scratch.cpp_state is scratch_cpp
+    assert scratch.current_step == game_state.current_step
+    assert scratch.game_score() == game_state.game_score()
+    assert scratch.get_shapes() == game_state.get_shapes()
+    assert np.array_equal(
+        scratch.get_grid_data_np()["occupied"],
+        game_state.get_grid_data_np()["occupied"],
+    )
+    assert scratch.valid_actions() == game_state.valid_actions()
+    if game_state.is_over():
+        return
+    # Same RNG state: stepping both with the same action stays in lockstep
+    action = min(game_state.valid_actions())
+    occupied_before = game_state.get_grid_data_np()["occupied"].copy()
+    assert scratch.step(action) == game_state.copy().step(action)
+    assert np.array_equal(game_state.get_grid_data_np()["occupied"], occupied_before)
+
+
 def test_game_state_get_outcome(game_state: GameState) -> None:
     """Test get_outcome method."""
     # This test remains conceptual until get_outcome is implemented in C++ and exposed
@@ -480,3 +516,458 @@ def test_internal_score_line_clear(
 
     # Check that the score difference matches the returned reward
     assert score_after - score_before == pytest.approx(reward)
+
+
+def test_valid_action_mask_matches_set(game_state: GameState) -> None:
+    """Verify the mask marks exactly the actions in valid_actions()."""
+    config = game_state.env_config
+    mask = game_state.valid_action_mask()
+    assert mask.dtype == np.bool_
+    assert mask.shape == (config.NUM_SHAPE_SLOTS, config.ROWS, config.COLS)
+    assert set(np.flatnonzero(mask).tolist()) == game_state.valid_actions()
+
+    flat = game_state.valid_action_mask_flat()
+    assert flat.shape == (config.NUM_SHAPE_SLOTS * config.ROWS * config.COLS,)
+    assert np.array_equal(flat, mask.reshape(-1))
+
+
+def test_valid_action_mask_out_buffer(game_state: GameState) -> None:
+    """Verify the mask can be written into a caller-provided buffer."""
+    config = game_state.env_config
+    out = np.ones((config.NUM_SHAPE_SLOTS, config.ROWS, config.COLS), dtype=np.uint8)
+    result = game_state.valid_action_mask(out=out)
+    assert result is out
+    assert set(np.flatnonzero(out).tolist()) == game_state.valid_actions()
+
+    with pytest.raises(ValueError):
+        game_state.valid_action_mask_flat(out=np.zeros(3, dtype=np.bool_))
+    with pytest.raises(TypeError):
+        game_state.valid_action_mask_flat(out=np.zeros(out.size, dtype=np.float32))
+
+
+def test_step_ex_line_clear_record(
+    game_state_3x3: GameState, single_up_triangle_shape: Shape
+) -> None:
+    """Verify step_ex reports placed/cleared cells and line counts."""
+    gs = game_state_3x3
+    gs.debug_toggle_cell(0, 0)
+    gs.debug_toggle_cell(0, 2)
+    gs.debug_set_shapes([single_up_triangle_shape, None, None])
+    target_action = encode_action(0, 0, 1, gs)
+    assert target_action in gs.valid_actions()
+
+    info = gs.step_ex(target_action, with_cells=True)
+    assert info.placed_count == 1
+    assert info.cleared_count == 3
+    assert info.lines_cleared >= 1
+    assert info.refilled
+    assert info.done == gs.is_over()
+    assert info.placed_cells is not None and info.cleared_cells is not None
+    assert info.placed_cells.tolist() == [1]
+    assert sorted(info.cleared_cells.tolist()) == [0, 1, 2]
+    assert gs.get_last_cleared_triangles() == info.cleared_count
+    assert gs.game_score() == pytest.approx(info.reward)
+
+
+def test_step_ex_matches_step(game_state: GameState) -> None:
+    """Verify step_ex produces the same reward/done as step on a copy."""
+    action = get_first_valid_action(game_state)
+    if action is None:
+        pytest.skip("No valid actions.")
+    twin = game_state.copy()
+    reward, done = twin.step(action)
+    info = game_state.step_ex(action)
+    assert info.reward == pytest.approx(reward)
+    assert info.done == done
+    assert info.placed_cells is None and info.cleared_cells is None
+
+
+def test_lazy_game_over_matches_full_enumeration(
+    game_state: GameState, fixed_rng: random.Random
+) -> None:
+    """Verify the short-circuit game-over check agrees with valid_actions()."""
+    gs = game_state
+    for _ in range(200):
+        if gs.is_over():
+            break
+        valid = gs.valid_actions()
+        assert valid, "Game not over but no valid actions were enumerated."
+        assert gs.valid_action_mask_flat().sum() == len(valid)
+        gs.step(fixed_rng.choice(sorted(valid)))
+    if gs.is_over():
+        assert not gs.valid_actions()
+        assert gs.get_game_over_reason() is not None
+
+
+def test_evaluate_actions_matches_stepping_copies(game_state: GameState) -> None:
+    """Verify each evaluated outcome matches stepping a copy with that action."""
+    grid_before = game_state.get_grid_data_np()["occupied"].copy()
+    outcomes = game_state.evaluate_actions()
+    assert sorted(outcomes["action"].tolist()) == sorted(game_state.valid_actions())
+    assert np.array_equal(game_state.get_grid_data_np()["occupied"], grid_before)
+    for i, action in enumerate(outcomes["action"].tolist()[:25]):
+        info = game_state.copy().step_ex(action)
+        assert outcomes["reward"][i] == pytest.approx(info.reward)
+        assert outcomes["placed_count"][i] == info.placed_count
+        assert outcomes["cleared_count"][i] == info.cleared_count
+        assert outcomes["lines_cleared"][i] == info.lines_cleared
+        assert bool(outcomes["refilled"][i]) == info.refilled
+        assert bool(outcomes["done"][i]) == info.done
+
+
+def test_evaluate_actions_line_clear_and_refill(
+    game_state_3x3: GameState, single_up_triangle_shape: Shape
+) -> None:
+    """Verify a clearing, refilling action is evaluated without mutating state."""
+    gs = game_state_3x3
+    gs.debug_toggle_cell(0, 0)
+    gs.debug_toggle_cell(0, 2)
+    gs.debug_set_shapes([single_up_triangle_shape, None, None])
+    target_action = encode_action(0, 0, 1, gs)
+    outcomes = gs.evaluate_actions()
+    row = outcomes["action"].tolist().index(target_action)
+    assert outcomes["cleared_count"][row] == 3
+    assert outcomes["refilled"][row]
+    assert gs.get_grid_data_np()["occupied"][0].tolist() == [True, False, True]
+    info = gs.step_ex(target_action)
+    assert outcomes["reward"][row] == pytest.approx(info.reward)
+    assert bool(outcomes["done"][row]) == info.done
+
+
+def test_get_observation_planes(game_state: GameState) -> None:
+    """Verify observation planes match grid data and the valid-action mask."""
+    obs = game_state.get_observation()
+    assert obs.dtype == np.float32
+    assert obs.shape == game_state.observation_shape
+    grid_data = game_state.get_grid_data_np()
+    assert np.array_equal(obs[0] > 0, grid_data["occupied"])
+    assert np.array_equal(obs[1] > 0, grid_data["death"])
+    assert np.array_equal(obs[2:] > 0, game_state.valid_action_mask())
+
+
+def test_observation_batch_rejects_mixed_configs(
+    game_state: GameState, game_state_3x3: GameState
+) -> None:
+    """Verify batched observations reject states with different board layouts."""
+    states = [game_state_3x3.cpp_state, game_state.cpp_state]
+    out = np.empty((2, *game_state_3x3.observation_shape), dtype=np.float32)
+    with pytest.raises(ValueError, match="same rows, cols"):
+        cpp_module.get_observation_batch(states, out)
+
+
+def test_expand_matches_copy_and_step(game_state: GameState) -> None:
+    """Verify expanded children equal copies stepped with the same action."""
+    batch = game_state.expand()
+    assert len(batch) == len(game_state.valid_actions())
+    assert sorted(batch.actions.tolist()) == sorted(game_state.valid_actions())
+    observations = batch.observations()
+    assert observations.shape == (len(batch), *game_state.observation_shape)
+    for i in range(0, len(batch), 7):
+        twin = game_state.copy()
+        reward, done = twin.step(int(batch.actions[i]))
+        child = batch.state(i)
+        assert batch.rewards[i] == pytest.approx(reward)
+        assert bool(batch.dones[i]) == done
+        assert child.current_step == game_state.current_step + 1
+        assert np.array_equal(child.get_observation(), observations[i])
+        assert np.array_equal(twin.get_observation(), observations[i])
+    assert game_state.current_step == 0
+
+
+def test_expand_terminal_state_keeps_batch_shapes(game_state_3x3: GameState) -> None:
+    """Verify an empty expansion still reports the parent's observation shapes."""
+    gs = game_state_3x3
+    while not gs.is_over():
+        gs.step(min(gs.valid_actions()))
+    batch = gs.expand()
+    assert len(batch) == 0
+    assert batch.observations().shape == (0, *gs.observation_shape)
+    assert batch.board_features().shape == (
+        0,
+        len(board_feature_names(gs.env_config)),
+    )
+
+
+def _reference_empty_region_stats(gs: GameState) -> tuple[int, int, int]:
+    """Counts empty cells, edge-connected empty regions and isolated empties."""
+    grid_data = gs.get_grid_data_np()
+    empty = ~grid_data["occupied"] & ~grid_data["death"]
+    rows, cols = empty.shape
+
+    def neighbors(r: int, c: int) -> list[tuple[int, int]]:
+        vertical = r + 1 if (r + c) % 2 != 0 else r - 1
+        candidates = [(r, c - 1), (r, c + 1), (vertical, c)]
+        return [
+            (nr, nc)
+            for nr, nc in candidates
+            if 0 <= nr < rows and 0 <= nc < cols and empty[nr, nc]
+        ]
+
+    seen: set[tuple[int, int]] = set()
+    regions = 0
+    isolated = 0
+    for r, c in zip(*np.nonzero(empty), strict=True):
+        start = (int(r), int(c))
+        if not neighbors(*start):
+            isolated += 1
+        if start in seen:
+            continue
+        regions += 1
+        stack = [start]
+        seen.add(start)
+        while stack:
+            for nxt in neighbors(*stack.pop()):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append(nxt)
+    return int(empty.sum()), regions, isolated
+
+
+def test_board_features_match_reference(
+    game_state: GameState, fixed_rng: random.Random
+) -> None:
+    """Verify native board features against a Python reference during a rollout."""
+    names = board_feature_names(game_state.env_config)
+    for _ in range(15):
+        if game_state.is_over():
+            break
+        features = game_state.board_features()
+        assert features.dtype == np.float32 and features.shape == (len(names),)
+        empty_cells, regions, isolated = _reference_empty_region_stats(game_state)
+        assert features[names.index("empty_cells")] == empty_cells
+        assert features[names.index("empty_regions")] == regions
+        assert features[names.index("isolated_empty")] == isolated
+        assert features[names.index("uncoverable_empty")] <= empty_cells
+        mobility = game_state.valid_action_mask().sum(axis=(1, 2))
+        assert features[names.index("slot_0_mobility") :].tolist() == mobility.tolist()
+        game_state.step(fixed_rng.choice(sorted(game_state.valid_actions())))
+
+
+def test_board_features_batched_variants(game_state: GameState) -> None:
+    """Verify child-batch features equal per-child features."""
+    batch = game_state.expand()
+    features = batch.board_features()
+    assert features.shape == (
+        len(batch),
+        len(board_feature_names(game_state.env_config)),
+    )
+    for i in range(0, len(batch), 11):
+        assert np.array_equal(features[i], batch.state(i).board_features())
+
+
+def test_board_features_batch_rejects_mixed_configs(game_state: GameState) -> None:
+    """Verify batched features reject states with different slot counts."""
+    one_slot = GameState(
+        game_state.env_config.model_copy(update={"NUM_SHAPE_SLOTS": 1}),
+        initial_seed=0,
+    )
+    states = [one_slot.cpp_state, game_state.cpp_state]
+    out = np.empty((2, len(board_feature_names(one_slot.env_config))), dtype=np.float32)
+    with pytest.raises(ValueError, match="num_shape_slots"):
+        cpp_module.get_board_features_batch(states, out)
+
+
+def test_line_fill_counters_track_occupancy(
+    game_state: GameState, fixed_rng: random.Random
+) -> None:
+    """Verify incremental line fill ratios match a recount from the line table."""
+    table = game_state.get_line_table()
+    cells, lengths = table["cells"], table["lengths"]
+    assert cells.shape[0] == lengths.shape[0]
+    assert ((cells >= 0).sum(axis=1) == lengths).all()
+    for _ in range(20):
+        if game_state.is_over():
+            break
+        occupied = game_state.get_grid_data_np()["occupied"].reshape(-1)
+        padded = np.append(occupied, False)  # Index -1 maps to the False pad
+        expected = padded[cells].sum(axis=1) / lengths
+        assert np.allclose(game_state.get_line_fill(), expected)
+        game_state.step(fixed_rng.choice(sorted(game_state.valid_actions())))
+
+
+def test_line_threats_match_evaluated_clears(
+    game_state_3x3: GameState, single_up_triangle_shape: Shape
+) -> None:
+    """Verify threat actions are exactly the actions that clear a line."""
+    gs = game_state_3x3
+    gs.debug_toggle_cell(0, 0)
+    gs.debug_toggle_cell(0, 2)
+    gs.debug_set_shapes([single_up_triangle_shape, None, None])
+    threats = gs.get_line_threats()
+    outcomes = gs.evaluate_actions()
+    clearing = set(outcomes["action"][outcomes["lines_cleared"] > 0].tolist())
+    assert set(threats["action"].tolist()) == clearing
+    assert encode_action(0, 0, 1, gs) in clearing
+    cells = gs.get_line_table()["cells"]
+    for line_idx in threats["line"].tolist():
+        assert 1 in cells[line_idx].tolist()
+
+
+def test_topology_export_matches_line_table(game_state: GameState) -> None:
+    """Verify the CSR topology agrees with the line table and is cached read-only."""
+    topo = game_state.get_topology()
+    cfg = game_state.env_config
+    assert topo is get_topology(cfg)
+    assert not topo["line_cells"].flags.writeable
+
+    death = game_state.get_grid_data_np()["death"]
+    assert np.array_equal(topo["death"], death)
+    rows, cols = np.indices((cfg.ROWS, cfg.COLS))
+    assert np.array_equal(topo["up"], (rows + cols) % 2 == 1)
+
+    table = game_state.get_line_table()
+    offsets, line_cells = topo["line_offsets"], topo["line_cells"]
+    assert np.array_equal(np.diff(offsets), table["lengths"])
+    for i, length in enumerate(table["lengths"]):
+        assert np.array_equal(
+            line_cells[offsets[i] : offsets[i + 1]], table["cells"][i, :length]
+        )
+
+    # Cell-to-line CSR is the transpose of the line CSR
+    cell_offsets, cell_lines = topo["cell_line_offsets"], topo["cell_lines"]
+    assert len(cell_offsets) == cfg.ROWS * cfg.COLS + 1
+    line_ids = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    pairs = set(zip(line_cells.tolist(), line_ids.tolist(), strict=True))
+    cell_ids = np.repeat(np.arange(cfg.ROWS * cfg.COLS), np.diff(cell_offsets))
+    assert pairs == set(zip(cell_ids.tolist(), cell_lines.tolist(), strict=True))
+    assert not death.reshape(-1)[line_cells].any()
+
+    template_offsets = topo["template_offsets"]
+    assert topo["template_cells"].shape == (template_offsets[-1], 3)
+    assert (np.diff(template_offsets) > 0).all()
+
+
+def test_can_place_many_matches_valid_action_mask(game_state: GameState) -> None:
+    """Verify batched placement checks agree with the mask for every slot shape."""
+    cfg = game_state.env_config
+    mask = game_state.valid_action_mask()
+    rows, cols = np.indices((cfg.ROWS, cfg.COLS))
+    for slot, shape in enumerate(game_state.get_shapes()):
+        if shape is None:
+            continue
+        assert np.array_equal(game_state.can_place_many(shape, rows, cols), mask[slot])
+    # Out-of-board anchors are rejected rather than raising
+    assert not game_state.can_place_many(0, np.array([-5, 100]), 0).any()
+
+
+def test_can_place_many_template_index(game_state: GameState) -> None:
+    """Verify template indices behave like the equivalent Shape."""
+    topo = game_state.get_topology()
+    offsets, cells = topo["template_offsets"], topo["template_cells"]
+    rows, cols = np.indices((game_state.env_config.ROWS, game_state.env_config.COLS))
+    for t in range(len(offsets) - 1):
+        footprint = [
+            (int(dr), int(dc), bool(up))
+            for dr, dc, up in cells[offsets[t] : offsets[t + 1]]
+        ]
+        shape = Shape(footprint, (0, 0, 0), 0)
+        assert np.array_equal(
+            game_state.can_place_many(t, rows, cols),
+            game_state.can_place_many(shape, rows, cols),
+        )
+        assert np.array_equal(
+            game_state.can_place_many(np.int64(t), rows, cols),
+            game_state.can_place_many(t, rows, cols),
+        )
+    with pytest.raises(IndexError):
+        game_state.can_place_many(len(offsets), rows, cols)
+
+
+def test_inline_layout_selected_by_board_size(
+    game_state: GameState, fixed_rng: random.Random
+) -> None:
+    """Verify small boards use the inline layout and large boards fall back."""
+    assert game_state.cpp_state.has_inline_storage()
+    large_config = EnvConfig(
+        ROWS=12, COLS=16, PLAYABLE_RANGE_PER_ROW=[(0, 16)] * 12, NUM_SHAPE_SLOTS=3
+    )
+    large = GameState(large_config, initial_seed=7)
+    assert not large.cpp_state.has_inline_storage()
+    # The fallback layout behaves identically: copies stay in lockstep
+    for _ in range(10):
+        if large.is_over():
+            break
+        action = fixed_rng.choice(sorted(large.valid_actions()))
+        clone = large.copy()
+        assert clone.step(action) == large.step(action)
+        assert np.array_equal(
+            clone.get_grid_data_np()["occupied"], large.get_grid_data_np()["occupied"]
+        )
+        assert clone.valid_actions() == large.valid_actions()
+
+
+def test_large_board_copies_are_copy_on_write() -> None:
+    """Verify heap-backed copies share storage until the first mutation."""
+    large_config = EnvConfig(
+        ROWS=12, COLS=16, PLAYABLE_RANGE_PER_ROW=[(0, 16)] * 12, NUM_SHAPE_SLOTS=3
+    )
+    large = GameState(large_config, initial_seed=7)
+    before = large.get_grid_data_np()["occupied"].copy()
+    clone = large.copy()
+    assert clone.cpp_state.has_shared_storage()
+    # Read-only use of the clone keeps sharing
+    assert clone.valid_actions() == large.valid_actions()
+    clone.get_grid_data_np()
+    assert large.cpp_state.has_shared_storage()
+
+    clone.step(min(clone.valid_actions()))
+    assert np.array_equal(large.get_grid_data_np()["occupied"], before)
+    assert not np.array_equal(clone.get_grid_data_np()["occupied"], before)
+
+    toggled = large.copy()
+    toggled.debug_toggle_cell(0, 0)
+    assert toggled.get_grid_data_np()["occupied"][0, 0] != before[0, 0]
+    assert large.get_grid_data_np()["occupied"][0, 0] == before[0, 0]
+
+
+def test_template_placement_matches_reference(
+    game_state: GameState, fixed_rng: random.Random
+) -> None:
+    """Verify the precomputed placement masks agree with the placement rules."""
+    for _ in range(8):
+        if game_state.is_over():
+            break
+        game_state.step(fixed_rng.choice(sorted(game_state.valid_actions())))
+    cfg = game_state.env_config
+    topo = game_state.get_topology()
+    occupied = game_state.get_grid_data_np()["occupied"]
+    rows, cols = np.indices((cfg.ROWS, cfg.COLS))
+    offsets, cells = topo["template_offsets"], topo["template_cells"]
+    for t in range(len(offsets) - 1):
+        expected = np.ones((cfg.ROWS, cfg.COLS), dtype=bool)
+        for dr, dc, up in cells[offsets[t] : offsets[t + 1]]:
+            tr, tc = rows + dr, cols + dc
+            inside = (tr >= 0) & (tr < cfg.ROWS) & (tc >= 0) & (tc < cfg.COLS)
+            trc, tcc = tr.clip(0, cfg.ROWS - 1), tc.clip(0, cfg.COLS - 1)
+            expected &= inside & ~topo["death"][trc, tcc] & ~occupied[trc, tcc]
+            expected &= topo["up"][trc, tcc] == bool(up)
+        assert np.array_equal(game_state.can_place_many(t, rows, cols), expected)
+
+
+@pytest.mark.skipif(
+    not cpp_module.ALLOC_COUNTING,
+    reason="extension built without TRIANGLENGIN_COUNT_ALLOCS",
+)
+def test_steady_state_steps_do_not_allocate(fixed_rng: random.Random) -> None:
+    """Verify steps on the default board make no heap allocations."""
+    for seed in range(5):
+        gs = GameState(initial_seed=seed)
+        while not gs.is_over():
+            gs.step(fixed_rng.choice(sorted(gs.valid_actions())))
+            assert gs.get_last_step_allocations() == 0
+    gs = GameState(initial_seed=0)
+    gs.step(-1)
+    assert gs.get_last_step_allocations() == 0
+    assert gs.get_game_over_reason() == "Invalid action provided: -1"
+
+
+@pytest.mark.skipif(
+    cpp_module.ALLOC_COUNTING, reason="extension built with TRIANGLENGIN_COUNT_ALLOCS"
+)
+def test_allocation_count_unsupported_by_default() -> None:
+    """Verify release builds report -1 instead of counting allocations."""
+    gs = GameState(initial_seed=0)
+    assert gs.get_last_step_allocations() == -1
+    gs.step(next(iter(gs.valid_actions())))
+    assert gs.get_last_step_allocations() == -1
+    assert cpp_module.get_thread_allocation_count() == -1
@@ -0,0 +1,95 @@
+# File: tests/core/environment/test_state_pool.py
+import numpy as np
+import pytest
+
+from trianglengin import EnvConfig, GameState, StatePool
+
+
+@pytest.fixture
+def pool(default_env_config: EnvConfig) -> StatePool:
+    """Provides a pool with tiny slabs so tests exercise slab growth."""
+    return StatePool(default_env_config, slab_size=2)
+
+
+def test_state_pool_clone_is_independent(
+    pool: StatePool, game_state: GameState
+) -> None:
+    """Verify pooled clones match the source and evolve independently."""
+    handle = pool.clone(game_state)
+    view = pool.state(handle)
+    assert len(pool) == 1
+    assert view.game_score() == game_state.game_score()
+    assert np.array_equal(
+        view.get_grid_data_np()["occupied"], game_state.get_grid_data_np()["occupied"]
+    )
+
+    action = min(view.valid_actions())
+    view.step(action)
+    assert pool.state(handle).current_step == 1
+    assert game_state.current_step == 0
+
+    twin = pool.clone(handle)
+    assert pool.state(twin).current_step == 1
+
+
+def test_state_pool_release_reuses_slots(
+    pool: StatePool, game_state: GameState
+) -> None:
+    """Verify released slots are reused and slabs grow on demand."""
+    handles = [pool.clone(game_state) for _ in range(5)]
+    assert len(set(handles)) == 5
+    assert pool.capacity == 6
+
+    pool.release(handles[1])
+    assert len(pool) == 4
+    reused = pool.clone(game_state)
+    assert reused != handles[1]  # Same slot, new generation
+    assert pool.capacity == 6
+
+    pool.clear()
+    assert len(pool) == 0
+    assert pool.capacity == 6
+
+
+def test_state_pool_invalid_handles(pool: StatePool, game_state: GameState) -> None:
+    """Verify unknown or released handles raise and configs are checked."""
+    handle = pool.clone(game_state)
+    pool.release(handle)
+    with pytest.raises(IndexError):
+        pool.state(handle)
+    with pytest.raises(IndexError):
+        pool.release(handle)
+    with pytest.raises(IndexError):
+        pool.clone(99)
+    with pytest.raises(ValueError):
+        pool.clone(
+            GameState(EnvConfig(ROWS=3, COLS=3, PLAYABLE_RANGE_PER_ROW=[(0, 3)] * 3))
+        )
+    with pytest.raises(ValueError):
+        StatePool(slab_size=0)
+
+
+def test_state_pool_stale_views_raise(pool: StatePool, game_state: GameState) -> None:
+    """Verify views of released states raise instead of aliasing reused slots."""
+    handle = pool.clone(game_state)
+    view = pool.state(handle)
+    assert view.valid and view.handle == handle
+    view.get_shapes()  # Populate the Python-side cache
+    pool.release(handle)
+    other = pool.clone(GameState(pool.env_config, initial_seed=123))
+    assert not view.valid
+    with pytest.raises(IndexError):
+        view.game_score()
+    with pytest.raises(IndexError):
+        view.get_shapes()
+    assert pool.state(other).game_score() == 0.0
+
+    view = pool.state(other)
+    pool.clear()
+    with pytest.raises(IndexError):
+        view.valid_actions()
+    with pytest.raises(IndexError):
+        pool.clone(other)
+    del view  # The last pin destroys the released state
+    assert len(pool) == 0
+    assert pool.state(pool.clone(game_state)).current_step == game_state.current_step
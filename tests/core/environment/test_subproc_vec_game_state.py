@@ -0,0 +1,73 @@
+# File: tests/core/environment/test_subproc_vec_game_state.py
+import numpy as np
+import pytest
+
+from trianglengin import EnvConfig, SubprocVecGameState, VecGameState
+
+
+def first_valid_actions(masks: np.ndarray) -> np.ndarray:
+    """Picks the smallest valid action of every environment (0 when none)."""
+    flat = masks.reshape(len(masks), -1)
+    return np.where(flat.any(axis=1), flat.argmax(axis=1), 0).astype(np.int64)
+
+
+@pytest.mark.parametrize("num_workers", [1, 3])
+def test_subproc_matches_in_process_batch(
+    default_env_config: EnvConfig, num_workers: int
+) -> None:
+    """Verify worker processes produce the same trajectories as VecGameState."""
+    seeds = [11, 12, 13, 14, 15]
+    local = VecGameState(5, default_env_config, seeds)
+    with SubprocVecGameState(
+        5, default_env_config, seeds, num_workers=num_workers
+    ) as remote:
+        assert remote.num_workers == num_workers
+        assert remote.action_dim == local.action_dim
+        for _ in range(6):
+            assert np.array_equal(remote.observations, local.get_observations())
+            assert np.array_equal(remote.action_masks, local.valid_action_mask())
+            actions = first_valid_actions(local.valid_action_mask())
+            rewards, dones = remote.step(actions)
+            expected_rewards, expected_dones = local.step(actions)
+            assert np.allclose(rewards, expected_rewards)
+            assert np.array_equal(dones, expected_dones)
+            assert np.array_equal(remote.is_over(), local.is_over())
+
+        out = np.empty_like(remote.observations)
+        assert remote.get_observations(out=out) is out
+        assert np.array_equal(out, local.get_observations())
+        remote.reset()
+        local.reset()
+        assert np.array_equal(remote.valid_action_mask(), local.valid_action_mask())
+        assert not remote.is_over().any()
+
+
+def test_subproc_rejects_bad_input_and_closes(default_env_config: EnvConfig) -> None:
+    """Verify argument checks, worker error reporting and idempotent close."""
+    with pytest.raises(ValueError):
+        SubprocVecGameState(2, default_env_config, seeds=[1])
+    remote = SubprocVecGameState(2, default_env_config, seeds=[1, 2], num_workers=2)
+    with pytest.raises(ValueError):
+        remote.step([0])
+    with pytest.raises(RuntimeError):
+        remote._send("jump")
+    remote.step(first_valid_actions(remote.action_masks))  # Still usable
+    remote.close()
+    remote.close()
+    with pytest.raises(RuntimeError):
+        remote.reset()
+
+
+def test_subproc_views_outlive_close(default_env_config: EnvConfig) -> None:
+    """Verify shared views stay readable after close and unmap once dropped."""
+    remote = SubprocVecGameState(2, default_env_config, seeds=[1, 2], num_workers=1)
+    obs, masks = remote.observations, remote.action_masks
+    expected = remote.get_observations()
+    shm = remote._shm
+    remote.close()
+    assert np.array_equal(obs, expected)
+    assert masks.any()
+    del obs
+    assert shm.buf is not None
+    del masks
+    assert shm.buf is None  # Unmapped
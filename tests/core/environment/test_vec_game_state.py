@@ -0,0 +1,118 @@
+# File: tests/core/environment/test_vec_game_state.py
+from functools import partial
+
+import numpy as np
+import pytest
+
+from trianglengin import EnvConfig, GameState, VecGameState
+
+
+@pytest.fixture
+def vec_state(default_env_config: EnvConfig) -> VecGameState:
+    """Provides a small batch of environments with fixed seeds."""
+    return VecGameState(4, config=default_env_config, seeds=[1, 2, 3, 4])
+
+
+def first_valid_actions(vec: VecGameState) -> np.ndarray:
+    """Picks the smallest valid action of every environment."""
+    return np.array([min(gs.valid_actions()) for gs in vec.states], dtype=np.int64)
+
+
+def test_vec_step_ex_matches_single_states(vec_state: VecGameState) -> None:
+    """Verify batched stepping matches stepping identical single states."""
+    twins = [GameState(vec_state.env_config, seed) for seed in [1, 2, 3, 4]]
+    actions = first_valid_actions(vec_state)
+    result = vec_state.step_ex(actions)
+    assert set(result) == {
+        "reward",
+        "done",
+        "placed_count",
+        "cleared_count",
+        "lines_cleared",
+        "refilled",
+    }
+    for i, twin in enumerate(twins):
+        info = twin.step_ex(int(actions[i]))
+        assert result["reward"][i] == pytest.approx(info.reward)
+        assert bool(result["done"][i]) == info.done
+        assert result["placed_count"][i] == info.placed_count
+        assert vec_state[i].current_step == 1
+
+
+def test_vec_step_ex_rejects_out_of_range_actions(vec_state: VecGameState) -> None:
+    """Verify int64 actions are range-checked instead of truncated to 32 bits."""
+    actions = first_valid_actions(vec_state)
+    actions[0] += 2**32
+    result = vec_state.step_ex(actions)
+    cfg = vec_state.env_config
+    assert result["done"][0]
+    assert result["reward"][0] == cfg.PENALTY_GAME_OVER
+    assert result["placed_count"][0] == 0
+    assert vec_state[0].current_step == 0
+    assert not result["done"][1:].any()
+
+
+def test_vec_valid_action_mask(vec_state: VecGameState) -> None:
+    """Verify the batched mask matches each state's own mask."""
+    masks = vec_state.valid_action_mask()
+    cfg = vec_state.env_config
+    assert masks.shape == (4, cfg.NUM_SHAPE_SLOTS, cfg.ROWS, cfg.COLS)
+    for i, gs in enumerate(vec_state.states):
+        assert np.array_equal(masks[i], gs.valid_action_mask())
+
+
+def test_vec_step_rejects_wrong_action_count(vec_state: VecGameState) -> None:
+    """Verify the number of actions must match the batch size."""
+    with pytest.raises(ValueError):
+        vec_state.step([0, 1])
+
+
+def test_vec_get_observations(vec_state: VecGameState) -> None:
+    """Verify batched observations match each state's own encoding."""
+    observations = vec_state.get_observations()
+    for i, gs in enumerate(vec_state.states):
+        assert np.array_equal(observations[i], gs.get_observation())
+
+
+def test_vec_board_features(vec_state: VecGameState) -> None:
+    """Verify batched board features match each state's own features."""
+    features = vec_state.board_features()
+    for i, gs in enumerate(vec_state.states):
+        assert np.array_equal(features[i], gs.board_features())
+
+
+@pytest.mark.parametrize("num_threads", [1, 3])
+def test_vec_step_async_matches_step(
+    default_env_config: EnvConfig, num_threads: int
+) -> None:
+    """Verify async stepping matches synchronous stepping and double-buffers outputs."""
+    seeds = [5, 6, 7, 8, 9]
+    sync = VecGameState(5, default_env_config, seeds)
+    vec = VecGameState(5, default_env_config, seeds, num_threads=num_threads)
+    previous = None
+    for _ in range(3):
+        actions = first_valid_actions(sync)
+        expected = sync.step_ex(actions)
+        vec.step_async(actions)
+        for blocked in (
+            partial(vec.step, actions),
+            vec.valid_action_mask,
+            vec.get_observations,
+            vec.board_features,
+            vec.is_over,
+        ):
+            with pytest.raises(RuntimeError):
+                blocked()
+        result = vec.step_wait()
+        for key, value in expected.items():
+            assert np.array_equal(result[key], value)
+        assert np.array_equal(result["observation"], sync.get_observations())
+        assert np.array_equal(result["action_mask"], sync.valid_action_mask())
+        if previous is not None:
+            assert result["observation"] is not previous
+        previous = result["observation"]
+    with pytest.raises(RuntimeError):
+        vec.step_wait()
+    vec.step_async(first_valid_actions(sync))
+    vec.close()
+    assert vec[0].current_step == 4
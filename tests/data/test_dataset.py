@@ -0,0 +1,96 @@
+# File: tests/data/test_dataset.py
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from trianglengin import (
+    EnvConfig,
+    GameState,
+    TrajectoryDataset,
+    TrajectoryRecorder,
+    VecGameState,
+)
+from trianglengin.dataset import _returns_to_go
+
+
+@pytest.fixture
+def recorded(
+    tmp_path: Path, default_env_config: EnvConfig
+) -> tuple[Path, list[dict[str, np.ndarray]]]:
+    """Records three finished games with boards and keeps the live samples."""
+    path = tmp_path / "games.trj"
+    samples: list[dict[str, np.ndarray]] = []
+    with TrajectoryRecorder(path, default_env_config, store_boards=True) as rec:
+        for seed in (1, 2, 3):
+            state = GameState(default_env_config, initial_seed=seed)
+            rewards = []
+            while not state.is_over():
+                action = max(state.valid_actions())
+                samples.append(
+                    {
+                        "observation": state.get_observation(),
+                        "action_mask": state.valid_action_mask().copy(),
+                        "action": np.int64(action),
+                    }
+                )
+                rewards.append(rec.step(state, action).reward)
+            for k, to_go in enumerate(np.cumsum(rewards[::-1])[::-1]):
+                samples[len(samples) - len(rewards) + k]["return"] = to_go
+    return path, samples
+
+
+@pytest.mark.parametrize("source", ["boards", "replay"])
+def test_dataset_reconstructs_samples(
+    recorded: tuple[Path, list[dict[str, np.ndarray]]], source: str
+) -> None:
+    """Verify both observation sources reproduce the live training samples."""
+    path, samples = recorded
+    with TrajectoryDataset(path, source=source) as dataset:  # type: ignore[arg-type]
+        assert dataset.num_episodes == 3
+        assert len(dataset) == len(samples)
+        indices = np.array([len(samples) - 1, 0, 5, 1, len(samples) // 2])
+        batch = dataset.get_batch(indices)
+        for pos, i in enumerate(indices):
+            expected = samples[i]
+            assert np.array_equal(batch["observation"][pos], expected["observation"])
+            assert np.array_equal(batch["action_mask"][pos], expected["action_mask"])
+            assert batch["action"][pos] == expected["action"]
+            assert batch["return"][pos] == pytest.approx(expected["return"], rel=1e-5)
+
+
+def test_dataset_sampling_across_files(
+    tmp_path: Path,
+    recorded: tuple[Path, list[dict[str, np.ndarray]]],
+    default_env_config: EnvConfig,
+) -> None:
+    """Verify sampling spans several files, including ones without boards."""
+    path, samples = recorded
+    other = tmp_path / "actions_only.trj"
+    vec = VecGameState(2, config=default_env_config, seeds=[7, 8])
+    with TrajectoryRecorder(other, default_env_config) as rec:
+        for _ in range(3):
+            rec.step_vec(vec, [min(gs.valid_actions()) for gs in vec.states])
+    with TrajectoryDataset([path, other], gamma=0.5) as dataset:
+        assert len(dataset) == len(samples) + 6
+        batch = dataset.sample(16, rng=np.random.default_rng(0))
+        assert batch["observation"].shape == (16, 5, 8, 15)
+        masks = batch["action_mask"].reshape(16, -1)
+        assert masks[np.arange(16), batch["action"]].all()
+        assert dataset.episode(3)["seed"] == 7
+        with pytest.raises(IndexError):
+            dataset.get_batch([len(dataset)])
+    with pytest.raises(ValueError):
+        TrajectoryDataset(other, source="boards")
+
+
+@pytest.mark.parametrize("gamma", [0.0, 0.5, 0.99, 1.0])
+def test_returns_to_go_matches_recursion(gamma: float) -> None:
+    """Verify vectorized discounted returns match G[t] = r[t] + gamma * G[t+1]."""
+    rewards = np.random.default_rng(3).normal(size=2000)
+    expected = np.empty_like(rewards)
+    running = 0.0
+    for t in range(len(rewards) - 1, -1, -1):
+        running = rewards[t] + gamma * running
+        expected[t] = running
+    assert np.allclose(_returns_to_go(rewards, gamma), expected)
@@ -0,0 +1,78 @@
+# File: tests/data/test_replay.py
+import numpy as np
+import pytest
+
+from trianglengin import EnvConfig, GameState, replay
+
+
+def play_game(config: EnvConfig, seed: int) -> dict[str, np.ndarray]:
+    """Plays a full game with a fixed policy, keeping the live per-step data."""
+    state = GameState(config, initial_seed=seed)
+    live: dict[str, list] = {k: [] for k in ("actions", "boards", "masks", "obs")}
+    live["rewards"] = []
+    while not state.is_over():
+        valid = sorted(state.valid_actions())
+        action = valid[len(live["actions"]) % len(valid)]
+        live["actions"].append(action)
+        live["boards"].append(
+            np.frombuffer(state.cpp_state.get_packed_occupancy(), np.uint8)
+        )
+        live["masks"].append(state.valid_action_mask().copy())
+        live["obs"].append(state.get_observation())
+        live["rewards"].append(state.step(action)[0])
+    arrays = {k: np.array(v) for k, v in live.items()}
+    arrays["score"] = np.array(state.game_score())
+    return arrays
+
+
+def test_replay_reproduces_game(default_env_config: EnvConfig) -> None:
+    """Verify a replay from seed and actions emits the live per-step data."""
+    live = play_game(default_env_config, seed=11)
+    rewards = np.zeros(len(live["actions"]))
+    result = replay(
+        default_env_config,
+        11,
+        live["actions"],
+        emit=("boards", "slots", "masks", "observations"),
+        out={"rewards": rewards},
+    )
+    assert result.steps == len(live["actions"])
+    assert result.done
+    assert result.score == pytest.approx(float(live["score"]))
+    assert result.arrays["rewards"].base is rewards
+    assert np.allclose(rewards, live["rewards"])
+    assert np.array_equal(result.arrays["boards"], live["boards"])
+    assert np.array_equal(result.arrays["masks"], live["masks"])
+    assert np.array_equal(result.arrays["observations"], live["obs"])
+    assert (result.arrays["slots"] >= -1).all()
+
+
+def test_replay_verifies_actions(default_env_config: EnvConfig) -> None:
+    """Verify illegal actions are reported and replay stops at game end."""
+    live = play_game(default_env_config, seed=4)
+    actions = live["actions"].copy()
+    bad = len(actions) // 2
+    actions[bad] = -1
+    with pytest.raises(ValueError, match=f"step {bad}"):
+        replay(default_env_config, 4, actions)
+    unchecked = replay(default_env_config, 4, actions, verify=False)
+    assert unchecked.steps == bad + 1
+    assert unchecked.done
+
+    extended = np.concatenate([live["actions"], [0, 0]])
+    assert replay(default_env_config, 4, extended, verify=False).steps == len(
+        live["actions"]
+    )
+    with pytest.raises(ValueError):
+        replay(default_env_config, 4, actions, emit=("grids",))  # type: ignore[arg-type]
+
+
+def test_replay_rejects_out_of_range_actions(default_env_config: EnvConfig) -> None:
+    """Verify int64 actions are range-checked instead of truncated to 32 bits."""
+    live = play_game(default_env_config, seed=4)
+    wrapped = np.array([live["actions"][0] + 2**32], dtype=np.int64)
+    with pytest.raises(ValueError, match="step 0"):
+        replay(default_env_config, 4, wrapped)
+    unchecked = replay(default_env_config, 4, wrapped, verify=False)
+    assert unchecked.steps == 1
+    assert unchecked.done
@@ -0,0 +1,89 @@
+# File: tests/data/test_trajectory.py
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from trianglengin import EnvConfig, GameState, TrajectoryRecorder, VecGameState
+from trianglengin.trajectory import (
+    FLAG_TERMINAL,
+    chunk_arrays,
+    decode_file_header,
+    scan_chunks,
+)
+
+
+def read_chunks(path: Path) -> tuple[EnvConfig, list[dict[str, np.ndarray]], list]:
+    """Reads back every complete chunk of a trajectory file."""
+    data = path.read_bytes()
+    config, fingerprint, start = decode_file_header(data)
+    chunks, _ = scan_chunks(data, start, fingerprint)
+    return config, [chunk_arrays(data, chunk) for chunk in chunks], chunks
+
+
+def test_recorded_game_replays_from_seed(
+    tmp_path: Path, default_env_config: EnvConfig
+) -> None:
+    """Verify a recorded game stores its seed, actions, rewards and boards."""
+    path = tmp_path / "games.trj"
+    state = GameState(default_env_config, initial_seed=5)
+    boards, rewards = [], []
+    with TrajectoryRecorder(path, default_env_config, store_boards=True) as rec:
+        while not state.is_over():
+            occupied = state.get_grid_data_np()["occupied"].reshape(-1)
+            boards.append(np.packbits(occupied, bitorder="little"))
+            rewards.append(rec.step(state, min(state.valid_actions())).reward)
+
+    config, arrays, chunks = read_chunks(path)
+    assert config == default_env_config
+    assert len(chunks) == 1
+    assert chunks[0].seed == 5
+    assert chunks[0].flags & FLAG_TERMINAL
+    assert np.array_equal(arrays[0]["boards"], np.stack(boards))
+    assert np.allclose(arrays[0]["rewards"], rewards)
+    assert (arrays[0]["slots"] >= -1).all()
+
+    replayed = GameState(default_env_config, initial_seed=chunks[0].seed)
+    for action, reward in zip(arrays[0]["actions"], rewards, strict=True):
+        assert replayed.step(int(action))[0] == pytest.approx(reward)
+    assert replayed.is_over()
+
+
+def test_vec_recording_appends_and_recovers(
+    tmp_path: Path, default_env_config: EnvConfig
+) -> None:
+    """Verify batched recording, truncated episodes and appending to a file."""
+    path = tmp_path / "vec.trj"
+    vec = VecGameState(3, config=default_env_config, seeds=[1, 2, 3])
+    with TrajectoryRecorder(path, default_env_config) as rec:
+        for _ in range(4):
+            rec.step_vec(vec, [min(gs.valid_actions()) for gs in vec.states])
+    _, arrays, chunks = read_chunks(path)
+    assert [c.seed for c in chunks] == [1, 2, 3]
+    assert all(c.num_steps == 4 and not c.flags & FLAG_TERMINAL for c in chunks)
+    assert "boards" not in arrays[0]
+
+    # A partially written chunk is dropped when the file is reopened
+    with path.open("ab") as handle:
+        handle.write(b"TEPI" + b"\0" * 12)
+    with TrajectoryRecorder(path, default_env_config) as rec:
+        rec.step(GameState(default_env_config, initial_seed=9), 0)
+    _, _, chunks = read_chunks(path)
+    assert [c.seed for c in chunks] == [1, 2, 3, 9]
+    assert chunks[-1].num_steps == 1
+
+
+def test_recorder_rejects_unreplayable_states(
+    tmp_path: Path, default_env_config: EnvConfig, game_state_3x3: GameState
+) -> None:
+    """Verify states that cannot be replayed from their seed are rejected."""
+    path = tmp_path / "bad.trj"
+    with TrajectoryRecorder(path, default_env_config) as rec:
+        state = GameState(default_env_config, initial_seed=1)
+        state.reset()
+        with pytest.raises(ValueError):
+            rec.step(state, 0)
+        with pytest.raises(ValueError):
+            rec.step(game_state_3x3, 0)
+    with pytest.raises(ValueError):
+        TrajectoryRecorder(path, game_state_3x3.env_config)
@@ -0,0 +1,2 @@
+# File: trianglengin/tests/runtime/__init__.py
+# This file can be empty
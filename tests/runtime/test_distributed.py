@@ -0,0 +1,99 @@
+# File: tests/runtime/test_distributed.py
+import threading
+from multiprocessing.connection import Client
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from trianglengin import EnvConfig, TrajectoryDataset, replay
+from trianglengin.distributed import (
+    Coordinator,
+    PolicyFn,
+    _play_task,
+    builtin_policy,
+    run_actor,
+    run_local,
+)
+from trianglengin.selfplay import index_path
+from trianglengin.trajectory import build_index
+
+AUTHKEY = b"test-key"
+
+
+def test_run_local_records_every_game(tmp_path: Path) -> None:
+    """Verify actor processes play every seed once into a replayable file."""
+    path = tmp_path / "games.trj"
+    stats = run_local(path, 7, num_actors=2, games_per_task=3, timeout=60)
+    assert stats.games == 7
+    index = np.load(index_path(path))
+    assert np.array_equal(index, build_index(path))
+    assert sorted(index["seed"].tolist()) == list(range(7))
+    assert (index["flags"] & 2).all()
+    with TrajectoryDataset([path]) as dataset:
+        assert len(dataset) == stats.steps
+        for i in range(dataset.num_episodes):
+            episode = dataset.episode(i)
+            result = replay(
+                dataset.env_config, int(episode["seed"]), episode["actions"]
+            )
+            assert result.done
+            assert np.allclose(result.arrays["rewards"], episode["rewards"])
+
+
+def test_coordinator_requeues_and_publishes_policies(
+    tmp_path: Path, default_env_config: EnvConfig
+) -> None:
+    """Verify tasks of a dropped actor are reissued and policy snapshots reach actors."""
+    loaded: list[Any] = []
+
+    def loader(snapshot: Any) -> PolicyFn:
+        loaded.append(snapshot)
+        return builtin_policy(snapshot)
+
+    coordinator = Coordinator(
+        tmp_path / "games.trj", 4, AUTHKEY, default_env_config, games_per_task=2
+    )
+    # An actor that takes a task and disconnects without returning it
+    with Client(coordinator.address, authkey=AUTHKEY) as conn:
+        conn.send(("hello", "flaky"))
+        conn.recv()
+        conn.send(("request",))
+        assert conn.recv()[0] == "task"
+    assert coordinator.set_policy("greedy") == 1
+    actor = threading.Thread(
+        target=run_actor, args=(coordinator.address, AUTHKEY, loader)
+    )
+    actor.start()
+    stats = coordinator.serve(timeout=60)
+    actor.join(timeout=10)
+    assert stats.games == 4
+    assert loaded == ["greedy"]
+    assert sorted(build_index(coordinator.path)["seed"].tolist()) == [0, 1, 2, 3]
+
+
+def test_coordinator_drops_duplicate_results(
+    tmp_path: Path, default_env_config: EnvConfig
+) -> None:
+    """Verify a task's result is recorded once even if it arrives twice."""
+    coordinator = Coordinator(
+        tmp_path / "games.trj", 4, AUTHKEY, default_env_config, games_per_task=2
+    )
+    with Client(coordinator.address, authkey=AUTHKEY) as conn:
+        conn.send(("hello", "twice"))
+        conn.recv()
+        conn.send(("request",))
+        _, task_id, seeds, _, snapshot = conn.recv()
+        result = _play_task(
+            default_env_config, False, seeds, builtin_policy(snapshot), 64
+        )
+        for _ in range(2):
+            conn.send(("result", task_id, *result))
+        conn.send(("request",))  # Replied to once both results are handled
+        conn.recv()
+    actor = threading.Thread(target=run_actor, args=(coordinator.address, AUTHKEY))
+    actor.start()
+    stats = coordinator.serve(timeout=60)
+    actor.join(timeout=10)
+    assert stats.games == 4
+    assert sorted(build_index(coordinator.path)["seed"].tolist()) == [0, 1, 2, 3]
@@ -0,0 +1,69 @@
+# File: tests/runtime/test_sampling.py
+import numpy as np
+import pytest
+
+from trianglengin import EnvConfig, VecGameState, sample_actions
+
+
+@pytest.fixture
+def vec_state(default_env_config: EnvConfig) -> VecGameState:
+    """Provides a small batch of environments with fixed seeds."""
+    return VecGameState(3, config=default_env_config, seeds=[10, 20, 30])
+
+
+def test_sampled_actions_are_valid(vec_state: VecGameState) -> None:
+    """Verify sampled actions always come from the valid set."""
+    rng = np.random.default_rng(0)
+    logits = rng.normal(size=(3, vec_state.action_dim)).astype(np.float32)
+    for _ in range(20):
+        actions = sample_actions(vec_state, logits, rng=rng)
+        assert actions.dtype == np.int64
+        for gs, action in zip(vec_state.states, actions, strict=True):
+            assert int(action) in gs.valid_actions()
+
+
+def test_argmax_picks_best_valid_action(vec_state: VecGameState) -> None:
+    """Verify argmax ignores higher logits on invalid actions."""
+    masks = vec_state.valid_action_mask().reshape(3, -1)
+    logits = np.where(masks, 0.0, 100.0)
+    expected = []
+    for i, gs in enumerate(vec_state.states):
+        best = max(gs.valid_actions())
+        logits[i, best] = 1.0
+        expected.append(best)
+    actions = sample_actions(vec_state.states, logits, mode="argmax")
+    assert actions.tolist() == expected
+
+
+def test_top_k_one_equals_argmax(vec_state: VecGameState) -> None:
+    """Verify top_k=1 sampling reduces to the argmax."""
+    logits = np.random.default_rng(1).normal(size=(3, vec_state.action_dim))
+    greedy = sample_actions(vec_state, logits, mode="argmax")
+    top1 = sample_actions(vec_state, logits, top_k=1)
+    assert np.array_equal(greedy, top1)
+
+
+def test_sample_rejects_bad_mode(vec_state: VecGameState) -> None:
+    """Verify unknown modes raise ValueError."""
+    logits = np.zeros((3, vec_state.action_dim))
+    with pytest.raises(ValueError):
+        sample_actions(vec_state, logits, mode="nucleus")  # type: ignore[arg-type]
+
+
+def test_non_finite_logits_are_masked(vec_state: VecGameState) -> None:
+    """Verify NaN/inf logits are skipped and all-masked rows fall back to uniform."""
+    masks = vec_state.valid_action_mask().reshape(3, -1)
+    logits = np.full(masks.shape, -np.inf)
+    logits[0, masks[0]] = np.nan
+    logits[1, np.flatnonzero(masks[1])[::2]] = np.nan
+    logits[1, np.flatnonzero(masks[1])[1::2]] = 0.0
+    rng = np.random.default_rng(2)
+    seen: set[int] = set()
+    for _ in range(50):
+        actions = sample_actions(vec_state, logits, rng=rng)
+        assert masks[0, actions[0]] and masks[2, actions[2]]
+        assert logits[1, actions[1]] == 0.0
+        seen.add(int(actions[2]))
+    assert len(seen) > 1
+    greedy = sample_actions(vec_state, logits, mode="argmax")
+    assert logits[1, greedy[1]] == 0.0
@@ -0,0 +1,70 @@
+# File: tests/runtime/test_selfplay.py
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+from typer.testing import CliRunner
+
+from trianglengin import EnvConfig, GameState, TrajectoryDataset
+from trianglengin.selfplay import (
+    SelfPlayStats,
+    choose_actions,
+    index_path,
+    run_selfplay,
+)
+from trianglengin.trajectory import build_index
+from trianglengin.ui.cli import app
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_selfplay_writes_indexed_shards(tmp_path: Path, workers: int) -> None:
+    """Verify self-play plays every seed once into indexed shards."""
+    updates: list[SelfPlayStats] = []
+    stats = run_selfplay(
+        tmp_path,
+        7,
+        workers=workers,
+        num_shards=3,
+        batch_size=4,
+        progress=updates.append,
+    )
+    assert stats.games == 7
+    assert len(stats.shards) == 3
+    assert len(updates) == 3
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest["games"] == 7
+    assert manifest["steps"] == stats.steps
+
+    seeds = []
+    for shard in stats.shards:
+        index = np.load(index_path(shard))
+        assert np.array_equal(index, build_index(shard))
+        assert (index["flags"] & 2).all()  # Every game was played to the end
+        seeds.extend(index["seed"].tolist())
+    assert sorted(seeds) == list(range(7))
+    with TrajectoryDataset(stats.shards) as dataset:
+        assert len(dataset) == stats.steps
+
+
+def test_greedy_policy_picks_valid_actions(default_env_config: EnvConfig) -> None:
+    """Verify the greedy policy only picks valid, non-losing actions when possible."""
+    states = [GameState(default_env_config, initial_seed=s) for s in (1, 2)]
+    actions = choose_actions(states, "greedy", np.random.default_rng(0))
+    for state, action in zip(states, actions, strict=True):
+        assert int(action) in state.valid_actions()
+    with pytest.raises(ValueError):
+        choose_actions(states, "unknown", np.random.default_rng(0))  # type: ignore[arg-type]
+
+
+def test_selfplay_cli(tmp_path: Path) -> None:
+    """Verify the selfplay command reports throughput and writes shards."""
+    result = CliRunner().invoke(
+        app,
+        ["selfplay", str(tmp_path), "--games", "3", "--workers", "1", "--shards", "2"],
+    )
+    assert result.exit_code == 0, result.output
+    assert "steps/s" in result.output
+    assert len(list(tmp_path.glob("shard-*.trj"))) == 2
+    bad = CliRunner().invoke(app, ["selfplay", str(tmp_path), "--policy", "mcts"])
+    assert bad.exit_code != 0
@@ -0,0 +1,62 @@
+# File: tests/runtime/test_session.py
+import asyncio
+
+import pytest
+
+from trianglengin import EnvConfig, GameState, SessionManager
+
+
+def test_concurrent_sessions_are_batched(default_env_config: EnvConfig) -> None:
+    """Verify concurrent session steps share native batches and match GameState."""
+    seeds = list(range(20))
+
+    async def play(manager: SessionManager, seed: int) -> list[float]:
+        session = manager.create_session(seed)
+        twin = GameState(default_env_config, seed)
+        rewards = []
+        for _ in range(5):
+            if session.state.is_over():
+                break
+            action = min(session.state.valid_actions())
+            info = await session.step(action)
+            expected = twin.step_ex(action)
+            assert info == expected
+            assert session.state.current_step == twin.current_step
+            rewards.append(info.reward)
+        return rewards
+
+    async def main() -> SessionManager:
+        manager = SessionManager(default_env_config, max_batch=8)
+        results = await asyncio.gather(*(play(manager, s) for s in seeds))
+        assert all(results)
+        return manager
+
+    manager = asyncio.run(main())
+    assert len(manager) == len(seeds)
+    # 20 sessions x 5 steps in batches of at most 8, far fewer than 100 calls
+    assert 13 <= manager.batches < 40
+
+
+def test_session_lifecycle(default_env_config: EnvConfig) -> None:
+    """Verify pending-step and closed-session checks."""
+
+    async def main() -> None:
+        manager = SessionManager(default_env_config)
+        session = manager.create_session(3)
+        assert manager.get(session.session_id) is session
+        action = min(session.state.valid_actions())
+        first = asyncio.ensure_future(session.step(action))
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            await session.step(action)
+        await first
+        manager.close_session(session)
+        assert session.session_id not in manager
+        with pytest.raises(RuntimeError):
+            await session.step(action)
+        with pytest.raises(KeyError):
+            manager.get(session.session_id)
+
+    asyncio.run(main())
+    with pytest.raises(ValueError):
+        SessionManager(default_env_config, max_batch=0)